@@ -0,0 +1,437 @@
+"""
+Batched move generation for many JanggiGame boards at once, with NumPy.
+
+N boards are stored as an (N, 10, 9) int8 array of the same piece codes as
+JanggiGame, with a boolean per board for blue to move. The moves are
+generated from the move tables of JanggiGame, flattened into one list of
+entries (piece, from square, to square, squares in between) that is checked
+against every board at once:
+
+    chariots, horses, elephants, guards, generals and soldiers need every
+    square in between empty
+    cannons need exactly one piece in between, which is not a cannon, and
+    cannot take a cannon
+
+Boards with red to move are flipped top to bottom with the colors swapped,
+so the tables only hold the moves of blue.
+"""
+
+import numpy as np
+
+from JanggiGame import (
+    JanggiGame, ROWS, COLS, SQUARES, EMPTY, BLUE, RED, CHARIOT, ELEPHANT, HORSE, GUARD, GENERAL,
+    CANNON, SOLDIER, TYPE_MASK, COLOR_MASK, PIECE_CODES, START_POSITION, BLUE_PALACE, RED_PALACE, RAYS,
+    HORSE_MOVES, ELEPHANT_MOVES, PALACE_MOVES, SOLDIER_MOVES, to_square,
+)
+
+# an always empty square past the end of the board, used to pad square lists
+SENTINEL = SQUARES
+
+# the square each square lands on when the board is flipped top to bottom
+MIRROR = np.array([(ROWS - 1 - sq // COLS) * COLS + sq % COLS for sq in range(SQUARES)], dtype=np.intp)
+
+# boards checked at a time, to bound the memory of the entry arrays
+CHUNK_SIZE = 512
+
+# results of simulated games
+MOVE_LIMIT = 0
+BLUE_WON = 1
+RED_WON = 2
+
+DEFAULT_MAX_PLIES = 200
+
+
+def build_entries(color):
+    """
+    Returns the (piece, from, to, squares in between, needs a screen)
+    entries of every move the pieces of color can make on an empty board
+    """
+    entries = []
+    for sq in range(SQUARES):
+        for ray in RAYS[sq]:
+            for i, to in enumerate(ray):
+                entries.append((color | CHARIOT, sq, to, ray[:i], False))
+                if i > 0:
+                    entries.append((color | CANNON, sq, to, ray[:i], True))
+        for leg, to in HORSE_MOVES[sq]:
+            entries.append((color | HORSE, sq, to, (leg,), False))
+        for leg, second_leg, to in ELEPHANT_MOVES[sq]:
+            entries.append((color | ELEPHANT, sq, to, (leg, second_leg), False))
+        for to in SOLDIER_MOVES[color][sq]:
+            entries.append((color | SOLDIER, sq, to, (), False))
+        if divmod(sq, COLS) in (BLUE_PALACE if color == BLUE else RED_PALACE):
+            for to in PALACE_MOVES[sq]:
+                entries.append((color | GUARD, sq, to, (), False))
+                entries.append((color | GENERAL, sq, to, (), False))
+    return entries
+
+
+class MoveTable:
+    """
+    Move entries as parallel NumPy arrays
+    """
+
+    def __init__(self, entries):
+        """
+        Initializes the arrays from a list of entries built by build_entries.
+        A last entry for a piece that is never on the board pads the lists
+        of entries by target square
+        """
+        entries = entries + [(-1, SENTINEL, SENTINEL, (), False)]
+
+        self.piece = np.array([entry[0] for entry in entries], dtype=np.int8)
+        self.move_from = np.array([entry[1] for entry in entries], dtype=np.intp)
+        self.move_to = np.array([entry[2] for entry in entries], dtype=np.intp)
+        self.screen = np.array([entry[4] for entry in entries], dtype=bool)
+
+        # pieces needed in between, none or the one screen of a cannon
+        self.blockers = self.screen.astype(np.float32)
+
+        # squares in between, as a 0/1 matrix so that a product with the
+        # occupied squares of the boards counts the pieces in the way, and as
+        # lists padded with the sentinel square
+        width = max(len(entry[3]) for entry in entries)
+        self.between = np.zeros((SQUARES + 1, len(entries)), dtype=np.float32)
+        self.between_lists = np.full((len(entries), width), SENTINEL, dtype=np.intp)
+        for i, entry in enumerate(entries):
+            self.between[list(entry[3]), i] = 1
+            self.between_lists[i, :len(entry[3])] = entry[3]
+
+        # the entries of each piece code from each square, and the entries
+        # ending on each square, padded with the last entry
+        by_piece = {}
+        for i, entry in enumerate(entries[:-1]):
+            by_piece.setdefault((entry[0], entry[1]), []).append(i)
+        depth = max(len(i) for i in by_piece.values())
+        self.by_piece = np.full((COLOR_MASK + TYPE_MASK + 1, SQUARES + 1, depth), len(entries) - 1, dtype=np.intp)
+        for (piece, sq), i in by_piece.items():
+            self.by_piece[piece, sq, :len(i)] = i
+
+        by_target = [[] for sq in range(SQUARES + 1)]
+        for i, entry in enumerate(entries[:-1]):
+            by_target[entry[2]].append(i)
+        depth = max(len(i) for i in by_target)
+        self.by_target = np.full((SQUARES + 1, depth), len(entries) - 1, dtype=np.intp)
+        for sq, i in enumerate(by_target):
+            self.by_target[sq, :len(i)] = i
+
+    def playable(self, flat):
+        """
+        Returns the entries of the blue pieces that can be played on the flat
+        boards, without looking at checks, as arrays (board index, entry)
+        """
+        lane, sq = np.nonzero(flat[:, :SQUARES] & BLUE)
+        entries = self.by_piece[flat[lane, sq], sq]
+        used = entries != len(self.piece) - 1
+        lane = np.broadcast_to(lane[:, None], entries.shape)[used]
+        entry = entries[used]
+        between = flat[lane[:, None], self.between_lists[entry]]
+        target = flat[lane, self.move_to[entry]]
+        screen = self.screen[entry]
+
+        pieces = (between != EMPTY).sum(axis=1)
+        cannons = (between & TYPE_MASK == CANNON).sum(axis=1) + (target & TYPE_MASK == CANNON)
+        playable = (target & self.piece[entry] & COLOR_MASK == 0) & (pieces == screen) & (~screen | (cannons == 0))
+        return lane[playable], entry[playable]
+
+
+# the moves of blue, and the red moves that can reach the blue palace,
+# which are all the checks a blue general can be given
+MOVES = MoveTable(build_entries(BLUE))
+CHECKS = MoveTable([entry for entry in build_entries(RED) if divmod(entry[2], COLS) in BLUE_PALACE])
+
+# the red entries attacking each square of the blue palace, and none for
+# the sentinel square, by position of the square in CHECK_TARGETS
+CHECK_TARGETS = np.array(sorted(to_square(r, c) for r, c in BLUE_PALACE) + [SENTINEL], dtype=np.intp)
+TARGET_INDEX = np.full(SQUARES + 1, len(CHECK_TARGETS) - 1, dtype=np.intp)
+TARGET_INDEX[CHECK_TARGETS] = np.arange(len(CHECK_TARGETS))
+CHECK_ENTRIES = CHECKS.by_target[CHECK_TARGETS]
+
+
+def to_blue(boards, blue_turn):
+    """
+    Returns flat (N, 91) copies of the boards with the side to move as blue,
+    flipping the red to move boards and swapping their colors. The last
+    column is the empty sentinel square
+    """
+    flat = np.zeros((len(boards), SQUARES + 1), dtype=np.int8)
+    flat[:, :SQUARES] = boards.reshape(len(boards), SQUARES)
+    red = ~blue_turn
+    if red.any():
+        flipped = flat[red][:, np.append(MIRROR, SENTINEL)]
+        flat[red] = np.where(flipped != EMPTY, flipped ^ COLOR_MASK, EMPTY)
+    return flat
+
+
+def general_squares(flat):
+    """
+    Returns the square of the blue general of each flat board, or the
+    sentinel square if it has none
+    """
+    generals = flat[:, :SQUARES] == BLUE | GENERAL
+    return np.where(generals.any(axis=1), generals.argmax(axis=1), SENTINEL)
+
+
+def check_counts(flat):
+    """
+    Returns the red entries that could give check to a general on each
+    CHECK_TARGETS square of each flat board, as (N, targets, width) arrays of
+    the entries, whether their piece is in place, and the pieces and cannons
+    in between. A move only ever takes red pieces away, so the entries whose
+    piece is not in place are left out, as far as the width allows
+    """
+    in_place = flat[:, CHECKS.move_from[CHECK_ENTRIES]] == CHECKS.piece[CHECK_ENTRIES]
+    width = max(1, int(in_place.sum(axis=-1).max()))
+    order = np.argsort(~in_place, axis=-1, kind="stable")[..., :width]
+    entries = np.take_along_axis(np.broadcast_to(CHECK_ENTRIES, in_place.shape), order, axis=-1)
+    in_place = np.take_along_axis(in_place, order, axis=-1)
+
+    lanes = np.arange(len(flat))[:, None, None]
+    between = (flat != EMPTY).astype(np.float32) @ CHECKS.between
+    cannons = (flat & TYPE_MASK == CANNON).astype(np.float32) @ CHECKS.between
+    return entries, in_place, between[lanes, entries], cannons[lanes, entries]
+
+
+def checking(entries, in_place, between, cannons):
+    """
+    Returns which rows have an entry of a red piece giving check, the
+    general on the target square being no cannon
+    """
+    return (
+        in_place
+        & (between == CHECKS.blockers[entries])
+        & (~CHECKS.screen[entries] | (cannons == 0))
+    ).any(axis=-1)
+
+
+def legal_moves(boards, blue_turn):
+    """
+    Returns the legal moves of the side to move on each board, passing
+    not included, as arrays (board index, from square, to square)
+    """
+    lanes, froms, tos = [], [], []
+    for start in range(0, len(boards), CHUNK_SIZE):
+        chunk = slice(start, start + CHUNK_SIZE)
+        flat = to_blue(boards[chunk], blue_turn[chunk])
+        lane, entry = MOVES.playable(flat)
+        move_from = MOVES.move_from[entry]
+        move_to = MOVES.move_to[entry]
+
+        # the checks after each move are the checks of its board with the
+        # pieces in between changed on its two squares, and the pieces
+        # standing on them no longer giving check
+        piece = flat[lane, move_from]
+        captured = flat[lane, move_to]
+        general = np.where(piece == BLUE | GENERAL, move_to, general_squares(flat)[lane])
+        target = TARGET_INDEX[general]
+        entries, in_place, between, cannons = check_counts(flat)
+        entries = entries[lane, target]
+
+        leaves = CHECKS.between[move_from[:, None], entries]
+        lands = CHECKS.between[move_to[:, None], entries]
+        mover_cannon = (piece & TYPE_MASK == CANNON).astype(np.float32)[:, None]
+        captured_cannon = (captured & TYPE_MASK == CANNON).astype(np.float32)[:, None]
+        attacked = checking(
+            entries,
+            in_place[lane, target]
+            & (CHECKS.move_from[entries] != move_from[:, None])
+            & (CHECKS.move_from[entries] != move_to[:, None]),
+            between[lane, target] - leaves + lands * (captured == EMPTY)[:, None],
+            cannons[lane, target] - leaves * mover_cannon + lands * (mover_cannon - captured_cannon),
+        )
+        legal = ~attacked
+
+        lane = lane[legal] + start
+        move_from = move_from[legal]
+        move_to = move_to[legal]
+        red = ~blue_turn[lane]
+        lanes.append(lane)
+        froms.append(np.where(red, MIRROR[move_from], move_from))
+        tos.append(np.where(red, MIRROR[move_to], move_to))
+
+    if not lanes:
+        empty = np.zeros(0, dtype=np.intp)
+        return empty, empty, empty
+    return np.concatenate(lanes), np.concatenate(froms), np.concatenate(tos)
+
+
+def legal_move_masks(boards, blue_turn):
+    """
+    Returns an (N, 90, 90) boolean array, true at [board, from square, to
+    square] for every legal move of the side to move
+    """
+    masks = np.zeros((len(boards), SQUARES, SQUARES), dtype=bool)
+    masks[legal_moves(boards, blue_turn)] = True
+    return masks
+
+
+def in_check(boards, blue_turn):
+    """
+    Returns which boards have the side to move in check
+    """
+    flat = to_blue(boards, blue_turn)
+    lanes = np.arange(len(flat))
+    target = TARGET_INDEX[general_squares(flat)]
+    entries, in_place, between, cannons = check_counts(flat)
+    return checking(entries[lanes, target], in_place[lanes, target], between[lanes, target], cannons[lanes, target])
+
+
+class BatchBoards:
+    """
+    N Janggi boards, with the side to move of each
+    """
+
+    def __init__(self, n=None, boards=None, blue_turn=None):
+        """
+        Initializes n boards at the start position, or the given (N, 10, 9)
+        boards with blue to move unless blue_turn says otherwise
+        """
+        if boards is None:
+            start = np.array([[PIECE_CODES[i] for i in row] for row in START_POSITION], dtype=np.int8)
+            boards = np.repeat(start[None], n, axis=0)
+        self.boards = np.ascontiguousarray(boards, dtype=np.int8)
+        if blue_turn is None:
+            blue_turn = np.ones(len(self.boards), dtype=bool)
+        self.blue_turn = np.asarray(blue_turn, dtype=bool)
+
+    def __len__(self):
+        """
+        Returns the number of boards
+        """
+        return len(self.boards)
+
+    @classmethod
+    def from_games(cls, games):
+        """
+        Returns the boards of a list of JanggiGames
+        """
+        boards = np.array([np.frombuffer(bytes(g.get_squares()), dtype=np.int8) for g in games])
+        return cls(boards=boards.reshape(len(games), ROWS, COLS), blue_turn=[g.get_turn() for g in games])
+
+    def to_game(self, i):
+        """
+        Returns a JanggiGame set up with board i
+        """
+        game = JanggiGame()
+        game.set_position(self.boards[i].astype(np.uint8).tobytes(), bool(self.blue_turn[i]))
+        return game
+
+    def legal_moves(self):
+        """
+        Returns the legal moves of every board as arrays (board index, from
+        square, to square)
+        """
+        return legal_moves(self.boards, self.blue_turn)
+
+    def legal_move_masks(self):
+        """
+        Returns the (N, 90, 90) legal move masks of the boards
+        """
+        return legal_move_masks(self.boards, self.blue_turn)
+
+    def in_check(self):
+        """
+        Returns which boards have the side to move in check
+        """
+        return in_check(self.boards, self.blue_turn)
+
+    def subset(self, indexes):
+        """
+        Returns a copy of the boards at indexes
+        """
+        return BatchBoards(boards=self.boards[indexes], blue_turn=self.blue_turn[indexes])
+
+    def push(self, indexes, froms, tos):
+        """
+        Makes one move on each board at indexes, without validating it, and
+        passes the turn. A move from a square to itself is a pass
+        """
+        flat = self.boards.reshape(len(self.boards), SQUARES)
+        moved = froms != tos
+        flat[indexes[moved], tos[moved]] = flat[indexes[moved], froms[moved]]
+        flat[indexes[moved], froms[moved]] = EMPTY
+        self.blue_turn[indexes] = ~self.blue_turn[indexes]
+
+
+def random_policy(boards, lanes, froms, tos, rng):
+    """
+    Picks one of the legal moves of every board uniformly at random. The
+    moves are grouped by board, as legal_moves returns them, and the index
+    of the chosen move of each board is returned, ignored for the boards
+    without moves
+    """
+    counts = np.bincount(lanes, minlength=len(boards))
+    starts = np.cumsum(counts) - counts
+    return starts + (rng.random(len(boards)) * counts).astype(np.intp)
+
+
+def simulate(n_games, policy=random_policy, max_plies=DEFAULT_MAX_PLIES, seed=None, record=False):
+    """
+    Plays n_games from the start position in lockstep, every board making
+    one move per step, until each is checkmated or max_plies have been
+    played. policy(boards, lanes, froms, tos, rng) picks the moves of the
+    boards still playing, as random_policy does. A side without legal moves
+    that is not in check passes. Returns a dict of:
+        results: MOVE_LIMIT, BLUE_WON or RED_WON for each game
+        plies: the number of plies played in each game
+        blue_wins, red_wins, move_limit: how many games ended each way
+        total_plies: the plies played over all games
+        moves: with record, an (n_games, max_plies, 2) array of the (from,
+        to) squares played, -1 after the end of each game
+    """
+    rng = np.random.default_rng(seed)
+    boards = BatchBoards(n_games)
+    results = np.full(n_games, MOVE_LIMIT, dtype=np.int8)
+    plies = np.zeros(n_games, dtype=np.int32)
+    playing = np.arange(n_games)
+    moves = np.full((n_games, max_plies, 2), -1, dtype=np.int16) if record else None
+
+    # one more step than max_plies, to find the games mated by the last ply
+    for ply in range(max_plies + 1):
+        if not len(playing):
+            break
+        active = boards.subset(playing)
+        lanes, froms, tos = active.legal_moves()
+        stuck = np.bincount(lanes, minlength=len(active)) == 0
+
+        # the side to move is mated when in check without a move
+        mated = np.zeros(len(active), dtype=bool)
+        if stuck.any():
+            mated[stuck] = active.subset(stuck).in_check()
+            results[playing[mated]] = np.where(active.blue_turn[mated], RED_WON, BLUE_WON)
+        if ply == max_plies:
+            break
+
+        # the others move, or pass on their general when they cannot
+        move_from = np.zeros(len(active), dtype=np.intp)
+        move_to = np.zeros(len(active), dtype=np.intp)
+        if not stuck.all():
+            chosen = policy(active, lanes, froms, tos, rng)[~stuck]
+            move_from[~stuck] = froms[chosen]
+            move_to[~stuck] = tos[chosen]
+        passing = stuck & ~mated
+        if passing.any():
+            general = np.where(active.blue_turn[passing], BLUE | GENERAL, RED | GENERAL)
+            squares = active.boards.reshape(len(active), SQUARES)[passing] == general[:, None]
+            move_from[passing] = move_to[passing] = squares.argmax(axis=1)
+
+        playing = playing[~mated]
+        move_from = move_from[~mated]
+        move_to = move_to[~mated]
+        boards.push(playing, move_from, move_to)
+        if record:
+            moves[playing, ply, 0] = move_from
+            moves[playing, ply, 1] = move_to
+        plies[playing] += 1
+
+    stats = {
+        "results": results,
+        "plies": plies,
+        "blue_wins": int((results == BLUE_WON).sum()),
+        "red_wins": int((results == RED_WON).sum()),
+        "move_limit": int((results == MOVE_LIMIT).sum()),
+        "total_plies": int(plies.sum()),
+    }
+    if record:
+        stats["moves"] = moves
+    return stats
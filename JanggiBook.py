@@ -0,0 +1,199 @@
+"""
+Opening book for JanggiGame.
+
+The book is a binary file: a 16 byte header, the magic JGBOOK1 and the
+number of records, then 16 byte records sorted by position hash:
+
+    position hash   unsigned 64 bit
+    move            unsigned 16 bit, from square * 90 + to square
+    weight          unsigned 16 bit, how often the move was played
+    learn           signed 16 bit, wins minus losses of the side that played it
+
+The file is memory mapped and searched in place, so opening a book costs
+nothing and processes using the same file share its pages.
+
+Build a book from a text file with one game per line, moves written as
+c10-d8 and separated by spaces, optionally followed by the result of the
+game, BLUE_WON or RED_WON, to fill in learn:
+    python JanggiBook.py games.txt book.bin [max ply]
+"""
+
+import mmap
+import os
+import random
+import struct
+import sys
+
+from JanggiGame import JanggiGame, SQUARES
+
+MAGIC = b"JGBOOK1\0"
+HEADER = struct.Struct("<8sQ")
+RECORD = struct.Struct("<QHHh2x")
+
+DEFAULT_MAX_PLY = 20
+
+# game states a line of a text game file can end with
+GAME_RESULTS = ("BLUE_WON", "RED_WON", "UNFINISHED")
+
+
+class OpeningBook:
+    """
+    Read only view of a book file, looked up by binary search over a
+    memory map. Pickling a book sends only its path, the worker process
+    maps the same file again
+    """
+
+    def __init__(self, path):
+        """
+        Opens and maps the book file at path
+        """
+        self._path = path
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size < HEADER.size:
+            self._file.close()
+            raise ValueError("not an opening book: %s" % path)
+
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or HEADER.size + self._count * RECORD.size > size:
+            self.close()
+            raise ValueError("not an opening book: %s" % path)
+
+    def __len__(self):
+        """
+        Returns the number of records in the book
+        """
+        return self._count
+
+    def __getstate__(self):
+        return {"path": self._path}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"])
+
+    def close(self):
+        """
+        Unmaps and closes the book file
+        """
+        self._map.close()
+        self._file.close()
+
+    def record(self, i):
+        """
+        Returns record i as (position hash, move code, weight, learn)
+        """
+        return RECORD.unpack_from(self._map, HEADER.size + i * RECORD.size)
+
+    def lookup(self, key):
+        """
+        Returns the ((from square, to square), weight, learn) entries for the
+        position hash key, most played first
+        """
+        low = 0
+        high = self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self.record(middle)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        entries = []
+        while low < self._count:
+            record_key, move, weight, learn = self.record(low)
+            if record_key != key:
+                break
+            entries.append((divmod(move, SQUARES), weight, learn))
+            low += 1
+        return entries
+
+    def moves(self, game):
+        """
+        Returns the book entries for the position of game that are legal in it
+        """
+        return [entry for entry in self.lookup(game.get_hash()) if game.is_legal(entry[0])]
+
+    def choose(self, game, rng=random):
+        """
+        Picks a book move for game at random, weighted by how often it was
+        played, or returns None when the position is not in the book
+        """
+        entries = self.moves(game)
+        if not entries:
+            return None
+        return rng.choices([entry[0] for entry in entries], [max(1, entry[1]) for entry in entries])[0]
+
+
+def build_book(records, path, max_ply=DEFAULT_MAX_PLY, results=None):
+    """
+    Replays each record, a list of (start, end) moves as taken by make_move,
+    in board notation, square indexes or Moves, and writes the moves played in its first max_ply positions to the book
+    file at path. results, if given, has the final game state of each record
+    ("BLUE_WON", "RED_WON" or anything else for no result) to fill in learn.
+    Returns the number of records written
+    """
+    counts = {}
+    for index, record in enumerate(records):
+        result = results[index] if results is not None else None
+        game = JanggiGame()
+        for start, end in record[:max_ply]:
+            key = game.get_hash()
+            blue_moved = game.get_turn()
+            if not game.make_move(start, end):
+                break
+            move_from, move_to = game.get_moves()[-1]
+            if move_from == move_to:
+                # passes are not book moves
+                continue
+
+            move = move_from * SQUARES + move_to
+            weight, learn = counts.get((key, move), (0, 0))
+            if result == "BLUE_WON":
+                learn += 1 if blue_moved else -1
+            elif result == "RED_WON":
+                learn += -1 if blue_moved else 1
+            counts[(key, move)] = (weight + 1, learn)
+
+    entries = sorted(counts.items(), key=lambda item: (item[0][0], -item[1][0], item[0][1]))
+    with open(path, "wb") as book_file:
+        book_file.write(HEADER.pack(MAGIC, len(entries)))
+        for (key, move), (weight, learn) in entries:
+            book_file.write(RECORD.pack(key, move, min(weight, 0xFFFF), max(-0x8000, min(learn, 0x7FFF))))
+    return len(entries)
+
+
+def read_text_games(path, results=None):
+    """
+    Reads games written one per line as space separated c10-d8 moves. A
+    line can end with the result of the game, BLUE_WON, RED_WON or
+    UNFINISHED, which is appended to the results list if one is given,
+    None being appended for a line without one
+    """
+    records = []
+    with open(path) as games_file:
+        for line in games_file:
+            words = line.split()
+            result = None
+            if words and words[-1] in GAME_RESULTS:
+                result = words.pop()
+            moves = [tuple(move.split("-")) for move in words]
+            if moves:
+                records.append(moves)
+                if results is not None:
+                    results.append(result)
+    return records
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("usage: python JanggiBook.py games.txt book.bin [max ply]")
+        sys.exit(2)
+    results = []
+    written = build_book(
+        read_text_games(sys.argv[1], results),
+        sys.argv[2],
+        int(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_MAX_PLY,
+        results,
+    )
+    print("wrote %d book moves to %s" % (written, sys.argv[2]))
@@ -0,0 +1,196 @@
+"""
+Position database for JanggiGame, an SQLite index of the positions reached
+in a collection of games.
+
+Every game is replayed once when it is added, and each position it reaches
+is stored under its zobrist hash with the game, the ply and the move played
+next. Finding the games through a position is then one index lookup:
+
+    games       id, result, tags as key=value lines, moves encoded as in
+                JanggiRecord
+    positions   hash, game, ply, move played next as from square * 90 +
+                to square, both squares PASS for a pass as in the moves,
+                NULL after the last move of the game
+
+SQLite integers are signed, so hashes are stored as signed 64 bit numbers.
+
+Index the games of a record file with:
+    python JanggiDatabase.py games.jgr positions.db
+"""
+
+import sqlite3
+import sys
+
+from JanggiGame import JanggiGame, SQUARES
+from JanggiRecord import PASS, read_records, replay_moves, encode_moves, decode_moves, encode_tags, decode_tags
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    result TEXT NOT NULL,
+    tags TEXT NOT NULL,
+    moves BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS positions (
+    hash INTEGER NOT NULL,
+    game INTEGER NOT NULL,
+    ply INTEGER NOT NULL,
+    move INTEGER,
+    PRIMARY KEY (hash, game, ply)
+) WITHOUT ROWID;
+"""
+
+PASS_MOVE = PASS * SQUARES + PASS
+
+
+def signed_hash(key):
+    """
+    Returns a 64 bit hash as the signed number SQLite stores
+    """
+    return key - (1 << 64) if key >= 1 << 63 else key
+
+
+def move_code(move):
+    """
+    Returns the positions column value of a (from square, to square) move
+    """
+    if move[0] == move[1]:
+        return PASS_MOVE
+    return move[0] * SQUARES + move[1]
+
+
+def code_move(code):
+    """
+    Returns the (from square, to square) move of a positions column value,
+    None for a pass
+    """
+    if code == PASS_MOVE:
+        return None
+    return divmod(code, SQUARES)
+
+
+class PositionDatabase:
+    """
+    Games and the positions they reached, looked up by position hash
+    """
+
+    def __init__(self, path=":memory:"):
+        """
+        Opens or creates the database at path, in memory by default
+        """
+        self._connection = sqlite3.connect(path)
+        self._connection.executescript(SCHEMA)
+
+    def close(self):
+        """
+        Closes the database
+        """
+        self._connection.close()
+
+    def game_count(self):
+        """
+        Returns the number of games in the database
+        """
+        return self._connection.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+
+    def add_game(self, moves, result="UNFINISHED", tags=None):
+        """
+        Adds one game, its moves as (from square, to square) from the start
+        position with None for a pass, and returns its id
+        """
+        return self.add_games([(moves, result, tags)])[0]
+
+    def add_games(self, records):
+        """
+        Adds an iterable of (moves, result, tags) games, as read_records
+        yields them, in one transaction and returns their ids
+        """
+        ids = []
+        with self._connection:
+            for moves, result, tags in records:
+                cursor = self._connection.execute(
+                    "INSERT INTO games (result, tags, moves) VALUES (?, ?, ?)",
+                    (result, encode_tags(tags or {}).decode("utf-8"), bytes(encode_moves(moves))),
+                )
+                game_id = cursor.lastrowid
+                ids.append(game_id)
+                self._connection.executemany(
+                    "INSERT INTO positions VALUES (?, ?, ?, ?)",
+                    self.positions(game_id, moves),
+                )
+        return ids
+
+    def add_record_file(self, path):
+        """
+        Adds every game of a record file and returns the number added
+        """
+        return len(self.add_games(read_records(path)))
+
+    @staticmethod
+    def positions(game_id, moves):
+        """
+        Yields the position rows of a game, replaying its moves without
+        validating them
+        """
+        game = JanggiGame()
+        for ply, move in enumerate(replay_moves(moves, game)):
+            yield signed_hash(game.get_hash()), game_id, ply, move_code(move)
+        yield signed_hash(game.get_hash()), game_id, len(moves), None
+
+    def find(self, key):
+        """
+        Returns (game id, ply, next move, result) for every time a game
+        reached the position with hash key, a game or a hash. The next move
+        is (from square, to square), or None for a pass and at the end of
+        the game
+        """
+        if isinstance(key, JanggiGame):
+            key = key.get_hash()
+        rows = self._connection.execute(
+            "SELECT positions.game, positions.ply, positions.move, games.result"
+            " FROM positions JOIN games ON games.id = positions.game"
+            " WHERE positions.hash = ? ORDER BY positions.game, positions.ply",
+            (signed_hash(key),),
+        )
+        return [
+            (game_id, ply, code_move(move) if move is not None else None, result)
+            for game_id, ply, move, result in rows
+        ]
+
+    def next_moves(self, key):
+        """
+        Returns the moves played from the position with hash key, a game or
+        a hash, as ((from square, to square), games, blue wins, red wins),
+        most played first, with None for a pass
+        """
+        if isinstance(key, JanggiGame):
+            key = key.get_hash()
+        rows = self._connection.execute(
+            "SELECT positions.move, COUNT(*),"
+            " SUM(games.result = 'BLUE_WON'), SUM(games.result = 'RED_WON')"
+            " FROM positions JOIN games ON games.id = positions.game"
+            " WHERE positions.hash = ? AND positions.move IS NOT NULL"
+            " GROUP BY positions.move ORDER BY COUNT(*) DESC, positions.move",
+            (signed_hash(key),),
+        )
+        return [(code_move(move), count, blue_wins, red_wins) for move, count, blue_wins, red_wins in rows]
+
+    def game(self, game_id):
+        """
+        Returns (moves, result, tags) of a game as read_records gives them,
+        or None if there is no such game
+        """
+        row = self._connection.execute("SELECT moves, result, tags FROM games WHERE id = ?", (game_id,)).fetchone()
+        if row is None:
+            return None
+        return decode_moves(row[0]), row[1], decode_tags(row[2].encode("utf-8"))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("usage: python JanggiDatabase.py games.jgr positions.db")
+        sys.exit(2)
+    database = PositionDatabase(sys.argv[2])
+    added = database.add_record_file(sys.argv[1])
+    print("indexed %d games, %d in %s" % (added, database.game_count(), sys.argv[2]))
+    database.close()
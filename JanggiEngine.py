@@ -0,0 +1,599 @@
+"""
+Alpha-beta search engine for JanggiGame.
+
+The search works on the game itself, trying moves with push and pop, and
+always leaves the game as it found it.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, as_completed, wait
+from multiprocessing import shared_memory
+
+from JanggiGame import JanggiGame, EMPTY, SQUARES, TYPE_MASK, COLOR_MASK, PIECE_VALUES
+
+MATE_SCORE = 100000
+INFINITY = 1000000
+MAX_DEPTH = 64
+
+# how many nodes are searched between looks at the clock
+CHECK_TIME_NODES = 1024
+
+# bound types of transposition table scores
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+DEFAULT_TABLE_MB = 16
+
+# a move losing at least this much against the best move is a blunder
+BLUNDER_THRESHOLD = 300
+
+# score of a tablebase win, less the distance to mate. It sits below the
+# mate scores so it is stored in the table as it is, being the same at any ply
+TABLEBASE_WIN = MATE_SCORE - MAX_DEPTH * 2 - 1
+
+# games sent to a worker at a time by analyze_games
+ANALYSIS_CHUNK_SIZE = 8
+
+
+class SearchTimeout(Exception):
+    """
+    Raised inside the search when the time budget has run out
+    """
+
+
+class TranspositionTable:
+    """
+    Fixed size hash table of search results keyed by the zobrist hash of the
+    position. Entries are two 64 bit words, the packed data (move, depth,
+    bound type and score) and the key xor the data, and come in buckets of
+    two: the first slot keeps the deepest result, the second is always replaced.
+
+    The table can live in shared memory and be written by several processes
+    without locks, an entry torn by two writers no longer xors back to its
+    key and is simply not found
+    """
+
+    BUCKET_WORDS = 4
+
+    def __init__(self, size_mb=DEFAULT_TABLE_MB, buffer=None):
+        """
+        Initializes an empty table using at most size_mb megabytes, or a table
+        over an existing zeroed buffer of size_bytes(size_mb) such as shared memory
+        """
+        size = self.size_bytes(size_mb)
+        self._buckets = size // (self.BUCKET_WORDS * 8)
+        if buffer is None:
+            buffer = bytearray(size)
+        self._buffer = buffer
+        self._table = memoryview(buffer)[:size].cast("Q")
+
+    @classmethod
+    def size_bytes(cls, size_mb):
+        """
+        Returns the number of bytes used by a table of at most size_mb megabytes
+        """
+        bucket_bytes = cls.BUCKET_WORDS * 8
+        return max(1, int(size_mb * 1024 * 1024) // bucket_bytes) * bucket_bytes
+
+    def clear(self):
+        """
+        Empties the table
+        """
+        size = len(self._table) * 8
+        memoryview(self._buffer)[:size] = bytes(size)
+
+    def release(self):
+        """
+        Lets go of the buffer, needed before closing shared memory
+        """
+        self._table.release()
+
+    @staticmethod
+    def pack(depth, flag, score, move):
+        """
+        Packs a result into one 64 bit word, the move as from * 90 + to + 1 in
+        the low 14 bits (0 for no move), then depth, bound type and score
+        """
+        move_code = move[0] * 90 + move[1] + 1 if move is not None else 0
+        return move_code | depth << 14 | flag << 22 | (score + 0x80000000) << 32
+
+    @staticmethod
+    def unpack(data):
+        """
+        Returns the (depth, bound type, score, move) packed in data
+        """
+        move_code = data & 0x3FFF
+        move = divmod(move_code - 1, 90) if move_code else None
+        return (data >> 14) & 0xFF, (data >> 22) & 0x3, (data >> 32) - 0x80000000, move
+
+    def probe(self, key):
+        """
+        Returns the (depth, bound type, score, move) stored for key, or None
+        """
+        table = self._table
+        i = (key % self._buckets) * self.BUCKET_WORDS
+        data = table[i + 1]
+        if data and table[i] ^ data == key:
+            return self.unpack(data)
+        data = table[i + 3]
+        if data and table[i + 2] ^ data == key:
+            return self.unpack(data)
+        return None
+
+    def store(self, key, depth, flag, score, move):
+        """
+        Stores a result for key, in the first slot of its bucket if it is at
+        least as deep as the one there or for the same position, otherwise
+        in the second slot
+        """
+        table = self._table
+        i = (key % self._buckets) * self.BUCKET_WORDS
+        data = self.pack(depth, flag, score, move)
+        first = table[i + 1]
+        if not first or table[i] ^ first == key or depth >= (first >> 14) & 0xFF:
+            table[i] = key ^ data
+            table[i + 1] = data
+        else:
+            table[i + 2] = key ^ data
+            table[i + 3] = data
+
+
+class MoveOrderer:
+    """
+    Orders the moves of a search: the transposition table move first, then the
+    captures by most valuable victim and least valuable attacker, then the two
+    killer moves of the ply, then the other quiet moves by history score.
+    The moves are generated in stages, so when a capture causes a cutoff
+    the quiet moves are never generated
+    """
+
+    def __init__(self):
+        """
+        Initializes empty killer slots for every ply and an empty history
+        table indexed by piece code and to square
+        """
+        self.killers = [[None, None] for ply in range(MAX_DEPTH * 2 + 1)]
+        self.history = [[0] * SQUARES for code in range(COLOR_MASK + TYPE_MASK + 1)]
+
+    def moves(self, game, ply, hash_move=None):
+        """
+        Yields the legal moves of the side to move, best looking first
+        """
+        board = game.get_squares()
+
+        if hash_move is not None and game.is_legal(hash_move):
+            yield hash_move
+        else:
+            hash_move = None
+
+        captures = game.legal_moves(captures_only=True)
+        self.order_captures(board, captures)
+        for move in captures:
+            if move != hash_move:
+                yield move
+
+        killers = [
+            move for move in self.killers[ply]
+            if move is not None and move != hash_move and board[move[1]] == EMPTY and game.is_legal(move)
+        ]
+        for move in killers:
+            yield move
+
+        quiets = game.legal_moves(quiets_only=True)
+        history = self.history
+        quiets.sort(key=lambda move: -history[board[move[0]]][move[1]])
+        for move in quiets:
+            if move != hash_move and move not in killers:
+                yield move
+
+    @staticmethod
+    def order_captures(board, moves):
+        """
+        Sorts the moves by most valuable victim, then least valuable attacker
+        """
+        moves.sort(
+            key=lambda move: (
+                -PIECE_VALUES.get(board[move[1]] & TYPE_MASK, 0),
+                PIECE_VALUES[board[move[0]] & TYPE_MASK],
+            )
+        )
+
+    def add_cutoff(self, move, piece, depth, ply):
+        """
+        Records a quiet move of piece that caused a beta cutoff as a killer
+        of the ply and raises its history score
+        """
+        killers = self.killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+
+        history = self.history[piece]
+        history[move[1]] += depth * depth
+        if history[move[1]] > 1 << 20:
+            for scores in self.history:
+                for sq in range(SQUARES):
+                    scores[sq] //= 2
+
+
+class Search:
+    """
+    Iterative deepening negamax alpha-beta search of a JanggiGame position,
+    scores are from the point of view of the side to move
+    """
+
+    def __init__(self, game, depth=None, time_limit=None, table=None, start_depth=1, tablebases=None):
+        """
+        Initializes the search of game up to depth plies, or until time_limit
+        seconds have passed, whichever comes first. A transposition table can
+        be passed in to keep its results between searches, and the iterations
+        can start deeper than 1 ply. Positions covered by tablebases, a
+        JanggiTablebase.Tablebases, are scored from it without searching
+        """
+        self._game = game
+        self._tablebases = tablebases
+        self._start_depth = start_depth
+        self.table = table if table is not None else TranspositionTable()
+        self.ordering = MoveOrderer()
+        self._max_depth = depth if depth is not None else MAX_DEPTH
+        self._time_limit = time_limit
+        self._deadline = None
+        self.nodes = 0
+        self.depth = 0
+        self.score = 0
+        self.pv = []
+
+    def run(self):
+        """
+        Searches one ply deeper each iteration, keeping the result of the
+        last iteration that finished, and returns (best move, score)
+        """
+        if self._time_limit is not None:
+            self._deadline = time.perf_counter() + self._time_limit
+
+        for depth in range(min(self._start_depth, self._max_depth), self._max_depth + 1):
+            pv = []
+            try:
+                score = self.negamax(depth, -INFINITY, INFINITY, 0, pv)
+            except SearchTimeout:
+                break
+
+            self.depth = depth
+            self.score = score
+            self.pv = pv
+
+            # no need to look deeper once a forced mate has been found
+            if abs(score) >= MATE_SCORE - MAX_DEPTH:
+                break
+
+        best_move = self.pv[0] if self.pv else None
+        return best_move, self.score
+
+    def check_time(self):
+        """
+        Stops the search if the time budget has run out, but never
+        before the first iteration has finished
+        """
+        if self._deadline is not None and self.depth > 0 and time.perf_counter() >= self._deadline:
+            raise SearchTimeout()
+
+    def evaluate(self):
+        """
+        Scores the position for the side to move from the material and
+        square bonuses that push and pop keep up to date
+        """
+        score = self._game.get_score()
+        return score if self._game.get_turn() else -score
+
+    def negamax(self, depth, alpha, beta, ply, pv):
+        """
+        Returns the score of the position searched depth plies deep, filling
+        pv with the best line found
+        """
+        game = self._game
+        self.nodes += 1
+        if self.nodes % CHECK_TIME_NODES == 0:
+            self.check_time()
+
+        if self._tablebases is not None and ply > 0:
+            result = self._tablebases.probe(game)
+            if result is not None:
+                outcome, dtm = result
+                return outcome * (TABLEBASE_WIN - dtm) if outcome else 0
+
+        if depth <= 0:
+            return self.quiescence(alpha, beta, ply)
+
+        key = game.get_hash()
+        hash_move = None
+        entry = self.table.probe(key)
+        if entry is not None:
+            entry_depth, flag, score, hash_move = entry
+            score = score_from_table(score, ply)
+            if entry_depth >= depth and ply > 0:
+                if flag == EXACT:
+                    pv[:] = self.table_line(depth)
+                    return score
+                if flag == LOWER_BOUND and score >= beta:
+                    return score
+                if flag == UPPER_BOUND and score <= alpha:
+                    return score
+
+        board = game.get_squares()
+        original_alpha = alpha
+        best_score = -INFINITY
+        best_move = None
+        searched = 0
+        for move in self.ordering.moves(game, ply, hash_move):
+            searched += 1
+            piece = board[move[0]]
+            quiet = board[move[1]] == EMPTY
+            child_pv = []
+            game.push(move)
+            try:
+                score = -self.negamax(depth - 1, -beta, -alpha, ply + 1, child_pv)
+            finally:
+                game.pop()
+
+            if score > best_score:
+                best_score = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    pv[:] = [move] + child_pv
+                    if alpha >= beta:
+                        if quiet:
+                            self.ordering.add_cutoff(move, piece, depth, ply)
+                        break
+
+        if not searched:
+            if game.is_in_check("blue" if game.get_turn() else "red"):
+                return -MATE_SCORE + ply
+            # not mated, the side to move can only pass
+            return self.evaluate()
+
+        if best_score >= beta:
+            flag = LOWER_BOUND
+        elif best_score > original_alpha:
+            flag = EXACT
+        else:
+            flag = UPPER_BOUND
+        self.table.store(key, depth, flag, score_to_table(best_score, ply), best_move)
+
+        return best_score
+
+    def quiescence(self, alpha, beta, ply):
+        """
+        Extends a leaf with captures only, most valuable victim first, until
+        the position is quiet. The side to move can stand pat on the static
+        score, unless it is in check, where every evasion is searched
+        """
+        game = self._game
+        self.nodes += 1
+        if self.nodes % CHECK_TIME_NODES == 0:
+            self.check_time()
+
+        # the tables sized by ply hold MAX_DEPTH * 2 entries, a chain of
+        # checks stops there too
+        if ply >= MAX_DEPTH * 2:
+            return self.evaluate()
+
+        in_check = game.is_in_check("blue" if game.get_turn() else "red")
+        if in_check:
+            moves = game.legal_moves()
+            if not moves:
+                return -MATE_SCORE + ply
+            best_score = -INFINITY
+        else:
+            best_score = self.evaluate()
+            if best_score >= beta:
+                return best_score
+            alpha = max(alpha, best_score)
+            moves = game.legal_moves(captures_only=True)
+
+        self.ordering.order_captures(game.get_squares(), moves)
+
+        for move in moves:
+            game.push(move)
+            try:
+                score = -self.quiescence(-beta, -alpha, ply + 1)
+            finally:
+                game.pop()
+
+            if score > best_score:
+                best_score = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+
+        return best_score
+
+    def table_line(self, depth):
+        """
+        Follows the transposition table moves from the current position, up
+        to depth of them, to rebuild the principal variation below a table hit
+        """
+        game = self._game
+        line = []
+        while len(line) < depth:
+            entry = self.table.probe(game.get_hash())
+            if entry is None or entry[3] not in game.legal_moves():
+                break
+            line.append(entry[3])
+            game.push(entry[3])
+        for move in line:
+            game.pop()
+        return line
+
+
+def score_to_table(score, ply):
+    """
+    Makes mate scores relative to the position before storing them, so
+    they stay right when the position is reached at another ply
+    """
+    if score >= MATE_SCORE - MAX_DEPTH * 2:
+        return score + ply
+    if score <= -MATE_SCORE + MAX_DEPTH * 2:
+        return score - ply
+    return score
+
+
+def score_from_table(score, ply):
+    """
+    Turns a mate score read from the table back into a distance from the root
+    """
+    if score >= MATE_SCORE - MAX_DEPTH * 2:
+        return score - ply
+    if score <= -MATE_SCORE + MAX_DEPTH * 2:
+        return score + ply
+    return score
+
+
+def search(game, depth=None, time_limit=None, table=None, book=None, tablebases=None):
+    """
+    Searches the position of game up to depth plies or for time_limit seconds
+    and returns (best move, score), the move as (from square, to square).
+    With neither limit the search is 3 plies deep. Passing the same
+    TranspositionTable to consecutive searches lets them reuse its results.
+    If an OpeningBook is given and has the position, its move is played
+    without searching, with a score of 0. Tablebases score the positions
+    they cover exactly
+    """
+    if book is not None:
+        book_move = book.choose(game)
+        if book_move is not None:
+            return book_move, 0
+
+    if depth is None and time_limit is None:
+        depth = 3
+    return Search(game, depth, time_limit, table, tablebases=tablebases).run()
+
+
+def parallel_search(game, depth=None, time_limit=None, workers=None, table_mb=DEFAULT_TABLE_MB):
+    """
+    Lazy SMP search: workers processes search the same position with one
+    transposition table in shared memory, every other worker starting one
+    ply deeper so they fill the table ahead of each other. Returns the
+    (best move, score) of the worker that finished the deepest iteration
+    """
+    if depth is None and time_limit is None:
+        depth = 3
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    size = TranspositionTable.size_bytes(table_mb)
+    memory = shared_memory.SharedMemory(create=True, size=size)
+    try:
+        memoryview(memory.buf)[:size] = bytes(size)
+        with ProcessPoolExecutor(workers) as pool:
+            futures = [
+                pool.submit(parallel_search_worker, memory.name, table_mb, game, depth, time_limit, 1 + i % 2)
+                for i in range(workers)
+            ]
+            results = [future.result() for future in futures]
+    finally:
+        memory.close()
+        memory.unlink()
+
+    # the first of the deepest results, so the main worker wins ties
+    best = max(results, key=lambda result: result[0])
+    return best[1], best[2]
+
+
+def parallel_search_worker(memory_name, table_mb, game, depth, time_limit, start_depth):
+    """
+    Runs one Lazy SMP search in a worker process over the shared table and
+    returns (depth reached, best move, score)
+    """
+    memory = shared_memory.SharedMemory(name=memory_name)
+    table = TranspositionTable(table_mb, memory.buf)
+    try:
+        searcher = Search(game, depth, time_limit, table, start_depth)
+        move, score = searcher.run()
+        return searcher.depth, move, score
+    finally:
+        table.release()
+        memory.close()
+
+
+def analyze_games(records, depth=3, workers=None, chunk_size=ANALYSIS_CHUNK_SIZE,
+                  blunder_threshold=BLUNDER_THRESHOLD):
+    """
+    Analyzes finished games, each record a list of (start, end) moves as
+    taken by make_move, over a pool of workers processes fed chunk_size games
+    at a time. Yields (record index, analysis) as the chunks complete, so
+    not in record order, see analyze_game for the analysis. Records are
+    read only as workers free up, about two chunks per worker ahead, so a
+    generator over a large archive is never held in memory
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    with ProcessPoolExecutor(workers) as pool:
+        pending = set()
+        chunk = []
+        for index, record in enumerate(records):
+            chunk.append((index, list(record)))
+            if len(chunk) < chunk_size:
+                continue
+            pending.add(pool.submit(analyze_chunk, chunk, depth, blunder_threshold))
+            chunk = []
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for result in future.result():
+                        yield result
+        if chunk:
+            pending.add(pool.submit(analyze_chunk, chunk, depth, blunder_threshold))
+
+        for future in as_completed(pending):
+            for result in future.result():
+                yield result
+
+
+def analyze_chunk(chunk, depth, blunder_threshold):
+    """
+    Analyzes a list of (record index, record) in a worker process
+    """
+    return [(index, analyze_game(record, depth, blunder_threshold)) for index, record in chunk]
+
+
+def analyze_game(record, depth=3, blunder_threshold=BLUNDER_THRESHOLD):
+    """
+    Replays a game with make_move, searching every position depth plies deep,
+    and returns one dict per move played:
+        move: the (start, end) move played
+        best_move: the (from square, to square) move the engine preferred
+        best_score: the score of the best move for the side that moved
+        score: the score of the move played for the side that moved
+        loss: best_score - score, never below 0
+        blunder: whether loss is at least blunder_threshold
+    The analysis stops at the first move make_move refuses
+    """
+    game = JanggiGame()
+    table = TranspositionTable(DEFAULT_TABLE_MB // 4)
+    best_move, best_score = search(game, depth=depth, table=table)
+    analysis = []
+
+    for start, end in record:
+        if not game.make_move(start, end):
+            break
+        # the move played is searched depth - 1 plies below it, as the root
+        # search scored each move, so both scores come from the same depth
+        score = -Search(game, depth, table=table).negamax(depth - 1, -INFINITY, INFINITY, 1, [])
+        next_best_move, next_score = search(game, depth=depth, table=table)
+        loss = max(0, best_score - score)
+        analysis.append({
+            "move": (start, end),
+            "best_move": best_move,
+            "best_score": best_score,
+            "score": score,
+            "loss": loss,
+            "blunder": loss >= blunder_threshold,
+        })
+        best_move, best_score = next_best_move, next_score
+
+    return analysis
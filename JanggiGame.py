@@ -1,3 +1,480 @@
+import random
+from collections import namedtuple
+
+# the board is stored as a flat bytearray of 90 integer codes, one per square,
+# indexed by row * COLS + col. Each code packs the color of the piece in the
+# high bits and the type of the piece in the low bits, 0 is an empty square.
+
+ROWS = 10
+COLS = 9
+SQUARES = ROWS * COLS
+
+EMPTY = 0
+
+# piece types
+CHARIOT = 1
+ELEPHANT = 2
+HORSE = 3
+GUARD = 4
+GENERAL = 5
+CANNON = 6
+SOLDIER = 7
+
+# piece colors
+BLUE = 8
+RED = 16
+
+TYPE_MASK = 7
+COLOR_MASK = BLUE | RED
+
+# two character names used by the string view of the board
+# C: Chariot, E: Elephant, H: Horse, G: Guard, K: General, F: Cannon, S: Soldier
+PIECE_CODES = {"--": EMPTY}
+for _color_name, _color in (("b", BLUE), ("r", RED)):
+    for _type_name, _type in (
+        ("C", CHARIOT),
+        ("E", ELEPHANT),
+        ("H", HORSE),
+        ("G", GUARD),
+        ("K", GENERAL),
+        ("F", CANNON),
+        ("S", SOLDIER),
+    ):
+        PIECE_CODES[_color_name + _type_name] = _color | _type
+PIECE_NAMES = {code: name for name, code in PIECE_CODES.items()}
+
+START_POSITION = [
+    ["rC", "rE", "rH", "rG", "--", "rG", "rE", "rH", "rC"],
+    ["--", "--", "--", "--", "rK", "--", "--", "--", "--"],
+    ["--", "rF", "--", "--", "--", "--", "--", "rF", "--"],
+    ["rS", "--", "rS", "--", "rS", "--", "rS", "--", "rS"],
+    ["--", "--", "--", "--", "--", "--", "--", "--", "--"],
+    ["--", "--", "--", "--", "--", "--", "--", "--", "--"],
+    ["bS", "--", "bS", "--", "bS", "--", "bS", "--", "bS"],
+    ["--", "bF", "--", "--", "--", "--", "--", "bF", "--"],
+    ["--", "--", "--", "--", "bK", "--", "--", "--", "--"],
+    ["bC", "bE", "bH", "bG", "--", "bG", "bE", "bH", "bC"],
+]
+
+# FEN letters as used by Fairy-Stockfish for janggi, uppercase for blue.
+# Ranks are written from row 0, red's back rank, down to row 9, with a
+# digit for a run of empty squares, and "w" means blue to move
+FEN_LETTERS = {
+    CHARIOT: "r",
+    ELEPHANT: "b",
+    HORSE: "n",
+    GUARD: "a",
+    GENERAL: "k",
+    CANNON: "c",
+    SOLDIER: "p",
+}
+FEN_CODES = {}
+for _type, _letter in FEN_LETTERS.items():
+    FEN_CODES[_letter.upper()] = BLUE | _type
+    FEN_CODES[_letter] = RED | _type
+FEN_NAMES = {code: letter for letter, code in FEN_CODES.items()}
+
+# bytes each FEN character stands for on one rank
+FEN_RUNS = {letter: bytes([code]) for letter, code in FEN_CODES.items()}
+for _count in range(1, COLS + 1):
+    FEN_RUNS[str(_count)] = bytes(_count)
+
+# board notation of every square, a1 .. i10 with the letter for the column
+# and the row counted from 1, and the square of every name
+SQUARE_NAMES = tuple("abcdefghi"[sq % COLS] + str(sq // COLS + 1) for sq in range(SQUARES))
+SQUARE_INDEX = {name: sq for sq, name in enumerate(SQUARE_NAMES)}
+
+START_FEN = "rbna1abnr/4k4/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/4K4/RBNA1ABNR w - - 0 1"
+
+ORTHOGONAL = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+# the palaces are the 3x3 squares the generals and guards are confined to
+RED_PALACE = {(r, c) for r in range(0, 3) for c in range(3, 6)}
+BLUE_PALACE = {(r, c) for r in range(7, 10) for c in range(3, 6)}
+
+# diagonal lines drawn through each palace, pieces can move along them
+PALACE_DIAGONALS = (
+    ((0, 3), (1, 4), (2, 5)),
+    ((0, 5), (1, 4), (2, 3)),
+    ((7, 3), (8, 4), (9, 5)),
+    ((7, 5), (8, 4), (9, 3)),
+)
+
+
+# zobrist keys, one random 64 bit number per piece code and square plus one
+# for blue to move. The hash of a position is the xor of the keys of every
+# piece on the board, which lets a move update it with a few xors
+_zobrist_random = random.Random(0x4A414E47)
+ZOBRIST_PIECES = [
+    [_zobrist_random.getrandbits(64) for sq in range(SQUARES)]
+    for code in range(COLOR_MASK + TYPE_MASK + 1)
+]
+ZOBRIST_BLUE_TURN = _zobrist_random.getrandbits(64)
+
+
+def to_square(r, c):
+    """
+    Converts a row and column into a flat board index
+    """
+    return r * COLS + c
+
+
+def on_board(r, c):
+    """
+    Checks if a row and column are inside the board
+    """
+    return 0 <= r < ROWS and 0 <= c < COLS
+
+
+def palace_diagonal_rays(r, c):
+    """
+    Returns the rays, as lists of (row, col), that start next to (r, c) and
+    follow a palace diagonal away from it
+    """
+    rays = []
+    for line in PALACE_DIAGONALS:
+        if (r, c) in line:
+            i = line.index((r, c))
+            if line[i + 1:]:
+                rays.append(list(line[i + 1:]))
+            if line[:i]:
+                rays.append(list(reversed(line[:i])))
+    return rays
+
+
+def build_rays(r, c):
+    """
+    Returns the straight rays leaving (r, c), and the palace diagonal rays
+    if it is on one, as tuples of squares
+    """
+    rays = []
+    for dr, dc in ORTHOGONAL:
+        ray = []
+        i = 1
+        while on_board(r + dr * i, c + dc * i):
+            ray.append(to_square(r + dr * i, c + dc * i))
+            i += 1
+        if ray:
+            rays.append(tuple(ray))
+    for ray in palace_diagonal_rays(r, c):
+        rays.append(tuple(to_square(*i) for i in ray))
+    return tuple(rays)
+
+
+def build_horse_moves(r, c):
+    """
+    Returns the (leg, to) squares of the horse moves from (r, c), one step
+    straight onto the leg, which must be empty, then one step diagonally outwards
+    """
+    moves = []
+    for dr, dc in ORTHOGONAL:
+        for side in (-1, 1):
+            tr = r + 2 * dr + side * dc
+            tc = c + 2 * dc + side * dr
+            if on_board(tr, tc):
+                moves.append((to_square(r + dr, c + dc), to_square(tr, tc)))
+    return tuple(moves)
+
+
+def build_elephant_moves(r, c):
+    """
+    Returns the (leg, second leg, to) squares of the elephant moves from (r, c),
+    one step straight then two steps diagonally outwards, both legs must be empty
+    """
+    moves = []
+    for dr, dc in ORTHOGONAL:
+        for side in (-1, 1):
+            mr = r + 2 * dr + side * dc
+            mc = c + 2 * dc + side * dr
+            tr = r + 3 * dr + 2 * side * dc
+            tc = c + 3 * dc + 2 * side * dr
+            if on_board(tr, tc):
+                moves.append(
+                    (to_square(r + dr, c + dc), to_square(mr, mc), to_square(tr, tc))
+                )
+    return tuple(moves)
+
+
+def build_palace_moves(r, c):
+    """
+    Returns the squares one step away from (r, c) along the lines of its
+    palace, used by the guards and generals
+    """
+    if (r, c) in RED_PALACE:
+        palace = RED_PALACE
+    elif (r, c) in BLUE_PALACE:
+        palace = BLUE_PALACE
+    else:
+        return ()
+    steps = [(r + dr, c + dc) for dr, dc in ORTHOGONAL if (r + dr, c + dc) in palace]
+    steps += [ray[0] for ray in palace_diagonal_rays(r, c)]
+    return tuple(to_square(*i) for i in steps)
+
+
+def build_soldier_moves(r, c, color):
+    """
+    Returns the squares a soldier of color can step to from (r, c), forward
+    and sideways, and diagonally forward along the enemy palace lines
+    """
+    # blue moves up the board, red moves down
+    forward = -1 if color == BLUE else 1
+    steps = [(r + dr, c + dc) for dr, dc in ((forward, 0), (0, -1), (0, 1))]
+    steps += [ray[0] for ray in palace_diagonal_rays(r, c) if ray[0][0] == r + forward]
+    return tuple(to_square(*i) for i in steps if on_board(*i))
+
+
+# move tables, built once, indexed by square
+RAYS = tuple(build_rays(*divmod(sq, COLS)) for sq in range(SQUARES))
+HORSE_MOVES = tuple(build_horse_moves(*divmod(sq, COLS)) for sq in range(SQUARES))
+ELEPHANT_MOVES = tuple(build_elephant_moves(*divmod(sq, COLS)) for sq in range(SQUARES))
+PALACE_MOVES = tuple(build_palace_moves(*divmod(sq, COLS)) for sq in range(SQUARES))
+SOLDIER_MOVES = {
+    color: tuple(build_soldier_moves(*divmod(sq, COLS), color) for sq in range(SQUARES))
+    for color in (BLUE, RED)
+}
+
+
+def invert_moves(table):
+    """
+    Turns a table of moves indexed by the from square, whose entries end with
+    the to square, into a table indexed by the to square whose entries end
+    with the from square, so attacks can be looked up backwards
+    """
+    inverted = [[] for sq in range(SQUARES)]
+    for sq in range(SQUARES):
+        for move in table[sq]:
+            if isinstance(move, tuple):
+                inverted[move[-1]].append(move[:-1] + (sq,))
+            else:
+                inverted[move].append(sq)
+    return tuple(tuple(i) for i in inverted)
+
+
+# attack tables, indexed by the attacked square
+HORSE_ATTACKS = invert_moves(HORSE_MOVES)
+ELEPHANT_ATTACKS = invert_moves(ELEPHANT_MOVES)
+SOLDIER_ATTACKS = {color: invert_moves(SOLDIER_MOVES[color]) for color in (BLUE, RED)}
+
+
+def build_check_squares(sq):
+    """
+    Returns the squares whose occupancy decides whether a general on sq is
+    attacked, its lines and the legs of horses and elephants that could reach it
+    """
+    squares = set()
+    for ray in RAYS[sq]:
+        squares.update(ray)
+    for leg, attacker in HORSE_ATTACKS[sq]:
+        squares.add(leg)
+    for leg, second_leg, attacker in ELEPHANT_ATTACKS[sq]:
+        squares.add(leg)
+        squares.add(second_leg)
+    return frozenset(squares)
+
+
+# a move that neither leaves nor lands on one of these squares cannot
+# open, close or create a check on the general standing on the square
+CHECK_SQUARES = tuple(build_check_squares(sq) for sq in range(SQUARES))
+
+# material values of the pieces, chariot 13, cannon 7, horse 5, elephant 3,
+# guard 3 and soldier 2, in hundredths. The general is never captured
+PIECE_VALUES = {
+    CHARIOT: 1300,
+    ELEPHANT: 300,
+    HORSE: 500,
+    GUARD: 300,
+    GENERAL: 0,
+    CANNON: 700,
+    SOLDIER: 200,
+}
+
+# bonuses for standing on a square, seen from blue's side of the board
+# (blue starts on the bottom rows and moves up), red uses them upside down
+PIECE_SQUARE_TABLES = {
+    CHARIOT: [
+        [10, 10, 10, 20, 20, 20, 10, 10, 10],
+        [10, 10, 10, 30, 30, 30, 10, 10, 10],
+        [10, 10, 10, 20, 30, 20, 10, 10, 10],
+        [10, 10, 10, 10, 10, 10, 10, 10, 10],
+        [0, 5, 5, 10, 10, 10, 5, 5, 0],
+        [0, 5, 5, 10, 10, 10, 5, 5, 0],
+        [0, 0, 0, 5, 5, 5, 0, 0, 0],
+        [-5, 0, 0, 5, 5, 5, 0, 0, -5],
+        [-5, 0, 0, 5, 5, 5, 0, 0, -5],
+        [-10, 0, 0, 5, 0, 5, 0, 0, -10],
+    ],
+    ELEPHANT: [
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 5, 5, 5, 5, 5, 0, 0],
+        [0, 5, 5, 10, 10, 10, 5, 5, 0],
+        [0, 5, 10, 10, 10, 10, 10, 5, 0],
+        [0, 5, 10, 10, 10, 10, 10, 5, 0],
+        [0, 5, 5, 10, 10, 10, 5, 5, 0],
+        [0, 0, 5, 5, 5, 5, 5, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [-5, 0, 0, 0, 0, 0, 0, 0, -5],
+    ],
+    HORSE: [
+        [-10, 0, 0, 5, 5, 5, 0, 0, -10],
+        [0, 5, 10, 15, 15, 15, 10, 5, 0],
+        [0, 10, 15, 20, 20, 20, 15, 10, 0],
+        [0, 10, 15, 20, 20, 20, 15, 10, 0],
+        [0, 5, 15, 15, 20, 15, 15, 5, 0],
+        [0, 5, 10, 15, 15, 15, 10, 5, 0],
+        [-5, 0, 10, 10, 10, 10, 10, 0, -5],
+        [-5, 0, 5, 5, 5, 5, 5, 0, -5],
+        [-10, -5, 0, 0, -5, 0, 0, -5, -10],
+        [-15, -10, -5, -5, -10, -5, -5, -10, -15],
+    ],
+    GUARD: [
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 5, 10, 5, 0, 0, 0],
+        [0, 0, 0, 5, 0, 5, 0, 0, 0],
+    ],
+    GENERAL: [
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, -10, -15, -10, 0, 0, 0],
+        [0, 0, 0, 0, 10, 0, 0, 0, 0],
+        [0, 0, 0, 0, 5, 0, 0, 0, 0],
+    ],
+    CANNON: [
+        [0, 0, 0, 5, 10, 5, 0, 0, 0],
+        [0, 0, 0, 5, 5, 5, 0, 0, 0],
+        [0, 0, 0, 5, 10, 5, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [5, 5, 5, 10, 10, 10, 5, 5, 5],
+        [0, 0, 0, 10, 15, 10, 0, 0, 0],
+        [0, 0, 0, 5, 10, 5, 0, 0, 0],
+    ],
+    SOLDIER: [
+        [0, 0, 0, 20, 30, 20, 0, 0, 0],
+        [10, 10, 20, 40, 50, 40, 20, 10, 10],
+        [10, 20, 30, 40, 50, 40, 30, 20, 10],
+        [10, 20, 30, 30, 30, 30, 30, 20, 10],
+        [5, 10, 15, 20, 20, 20, 15, 10, 5],
+        [0, 5, 5, 10, 10, 10, 5, 5, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+    ],
+}
+
+
+def build_piece_square_values(code):
+    """
+    Returns the value of the piece code on each square, material plus its
+    square bonus, positive for blue pieces and negative for red ones
+    """
+    piece_type = code & TYPE_MASK
+    if code & COLOR_MASK not in (BLUE, RED) or piece_type not in PIECE_VALUES:
+        return (0,) * SQUARES
+    table = PIECE_SQUARE_TABLES[piece_type]
+    values = []
+    for sq in range(SQUARES):
+        r, c = divmod(sq, COLS)
+        if code & BLUE:
+            values.append(PIECE_VALUES[piece_type] + table[r][c])
+        else:
+            values.append(-(PIECE_VALUES[piece_type] + table[ROWS - 1 - r][c]))
+    return tuple(values)
+
+
+# value of every piece code on every square, indexed like ZOBRIST_PIECES
+PIECE_SQUARE_VALUES = tuple(
+    build_piece_square_values(code) for code in range(COLOR_MASK + TYPE_MASK + 1)
+)
+
+
+def parse_fen(fen):
+    """
+    Parses a FEN string into (90 byte board, blue to move, halfmove clock,
+    fullmove number). The side to move and the counters may be left out,
+    as may the two "-" fields Fairy-Stockfish writes between them
+    """
+    fields = fen.split()
+    if not fields:
+        raise ValueError("empty FEN")
+    ranks = fields[0].split("/")
+    if len(ranks) != ROWS:
+        raise ValueError("FEN should have %d ranks: %s" % (ROWS, fen))
+    try:
+        rows = [b"".join([FEN_RUNS[ch] for ch in rank]) for rank in ranks]
+    except KeyError as error:
+        raise ValueError("unknown FEN character %s: %s" % (error.args[0], fen))
+    board = b"".join(rows)
+    if len(board) != SQUARES or any(len(row) != COLS for row in rows):
+        raise ValueError("FEN ranks should have %d squares: %s" % (COLS, fen))
+
+    if len(fields) > 1 and fields[1] not in ("w", "b"):
+        raise ValueError("FEN side to move should be w or b: %s" % fen)
+    blue_turn = len(fields) < 2 or fields[1] == "w"
+    counters = [field for field in fields[2:] if field != "-"]
+    try:
+        halfmove = int(counters[0]) if counters else 0
+        fullmove = int(counters[1]) if len(counters) > 1 else 1
+    except ValueError:
+        raise ValueError("FEN move counters should be numbers: %s" % fen)
+    return board, blue_turn, halfmove, fullmove
+
+
+class Move(namedtuple("Move", ("move_from", "move_to"))):
+    """
+    A move as its from and to square indexes. It is a (from square, to
+    square) tuple, so it can be pushed and compared with legal_moves
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def parse(cls, text):
+        """
+        Returns the move written c10-d8
+        """
+        return parse_moves([text])[0]
+
+    def names(self):
+        """
+        Returns the board notation of the from and to squares
+        """
+        return SQUARE_NAMES[self.move_from], SQUARE_NAMES[self.move_to]
+
+    def __str__(self):
+        return SQUARE_NAMES[self.move_from] + "-" + SQUARE_NAMES[self.move_to]
+
+
+def parse_moves(pairs):
+    """
+    Turns a list of moves, as (start, end) pairs like ("c10", "d8") or as
+    strings like "c10-d8", into Moves
+    """
+    index = SQUARE_INDEX
+    moves = []
+    for pair in pairs:
+        start, end = pair.split("-", 1) if isinstance(pair, str) else pair
+        if start not in index or end not in index:
+            raise ValueError("unknown square in move %s %s" % (start, end))
+        moves.append(Move(index[start], index[end]))
+    return moves
+
+
 class JanggiGame:
     """
     This class is responsible for storing all the information about the current state of a Janggi game
@@ -8,36 +485,57 @@ class JanggiGame:
         """
         Initializes the board, the piece class, user turn, and game state
         """
-        # board is 9x10 2d list, each element of the list has 2 characters.
-        # the first character represents the color of the piece, "r" for red
-        # or "b" for blue. The second character represents the type of the piece
-        # C: Chariot, E: Elephant, H: Horse, G: Guard, K: General, F: Cannon, S: Soldier
-        # "--" represents an empty space with no piece
-
-        self._board = [
-            ["rC", "rE", "rH", "rG", "--", "rG", "rE", "rH", "rC"],
-            ["--", "--", "--", "--", "rK", "--", "--", "--", "--"],
-            ["--", "rF", "--", "--", "--", "--", "--", "rF", "--"],
-            ["rS", "--", "rS", "--", "rS", "--", "rS", "--", "rS"],
-            ["--", "--", "--", "--", "--", "--", "--", "--", "--"],
-            ["--", "--", "--", "--", "--", "--", "--", "--", "--"],
-            ["bS", "--", "bS", "--", "bS", "--", "bS", "--", "bS"],
-            ["--", "bF", "--", "--", "--", "--", "--", "bF", "--"],
-            ["--", "--", "--", "--", "bK", "--", "--", "--", "--"],
-            ["bC", "bE", "bH", "bG", "--", "bG", "bE", "bH", "bC"],
-        ]
+        # board is a flat bytearray of 90 piece codes, see the module
+        # constants above. get_board() gives the 9x10 grid of two character
+        # strings, "bC", "rK", ... with "--" for an empty space
+
+        self._board = bytearray(PIECE_CODES[i] for row in START_POSITION for i in row)
         self._piece = Piece(self)
         self._blue_turn = True
         self._game_state = "UNFINISHED"
 
+        # (from square, to square, captured piece, hash and score before
+        # the move) for every move made, used by pop()
+        self._undo = []
+        self._hash = self.compute_hash()
+
+        # halfmove clock and fullmove number before the first move in _undo,
+        # see to_fen()
+        self._start_counters = (0, 1)
+
+        # material and square bonuses of the position for blue, see get_score()
+        self._score = self.compute_score()
+
+        # squares of every piece, per color and indexed by piece type,
+        # and the square of each general, kept up to date by push and pop
+        self._pieces = {}
+        self._generals = {}
+        self.index_pieces()
+
     # Getters
 
     def get_board(self):
         """
-        Returns the current board
+        Returns the current board as a 9x10 grid of two character strings
+        """
+        board = self._board
+        return [
+            [PIECE_NAMES[board[r * COLS + c]] for c in range(COLS)]
+            for r in range(ROWS)
+        ]
+
+    def get_squares(self):
+        """
+        Returns the flat board of integer piece codes
         """
         return self._board
 
+    def get_hash(self):
+        """
+        Returns the 64 bit zobrist hash of the position and side to move
+        """
+        return self._hash
+
     def get_turn(self):
         """
         Returns the current turn
@@ -54,120 +552,413 @@ class JanggiGame:
 
     def print_board(self):
         """
-        Prints the board for a vizual representation 
+        Prints the board for a vizual representation
         """
-        for i in range(len(self._board)):
-            for j in range(len(self._board[i])):
-                print(self._board[i][j], end=" ")
+        for row in self.get_board():
+            for square in row:
+                print(square, end=" ")
             print()
 
-    def is_in_check(self, color):
+    def get_pieces(self, color):
         """
-        Checks if current player is in check
+        Returns the sets of squares holding the pieces of color, BLUE or RED,
+        indexed by piece type
         """
+        return self._pieces[color]
 
+    def get_general_square(self, color):
+        """
+        Returns the square of the general of color, BLUE or RED, or None
+        """
+        return self._generals[color]
+
+    def pass_move(self):
+        """
+        Returns the pass of the side to move, a move of its general onto itself
+        """
+        sq = self._generals[BLUE if self._blue_turn else RED]
+        return sq, sq
+
+    def index_pieces(self):
+        """
+        Rebuilds the piece lists and general squares from the board
+        """
+        board = self._board
+        self._pieces = {color: [set() for i in range(TYPE_MASK + 1)] for color in (BLUE, RED)}
+        self._generals = {BLUE: None, RED: None}
+        for sq in range(SQUARES):
+            if board[sq] != EMPTY:
+                color = board[sq] & COLOR_MASK
+                self._pieces[color][board[sq] & TYPE_MASK].add(sq)
+                if board[sq] & TYPE_MASK == GENERAL:
+                    self._generals[color] = sq
+
+    def set_position(self, squares, blue_turn=True, halfmove=0, fullmove=1):
+        """
+        Sets up the board from a flat list of 90 piece codes with blue or red
+        to move, clearing the move history
+        """
+        self._board[:] = bytes(squares)
+        self._blue_turn = blue_turn
+        self._game_state = "UNFINISHED"
+        self._undo = []
+        self._start_counters = (halfmove, fullmove)
+
+        # hash, score and piece lists in one pass over the occupied squares
+        # rather than compute_hash, compute_score and index_pieces, as
+        # set_fen may be called for millions of positions
+        h = ZOBRIST_BLUE_TURN if blue_turn else 0
+        score = 0
+        pieces = {color: [set() for i in range(TYPE_MASK + 1)] for color in (BLUE, RED)}
+        generals = {BLUE: None, RED: None}
+        for sq, code in enumerate(self._board):
+            if code != EMPTY:
+                h ^= ZOBRIST_PIECES[code][sq]
+                score += PIECE_SQUARE_VALUES[code][sq]
+                pieces[code & COLOR_MASK][code & TYPE_MASK].add(sq)
+                if code & TYPE_MASK == GENERAL:
+                    generals[code & COLOR_MASK] = sq
+        self._hash = h
+        self._score = score
+        self._pieces = pieces
+        self._generals = generals
+
+    def get_moves(self):
+        """
+        Returns the (from square, to square) moves made since the start or
+        the last set_position, a pass being a move of the general onto itself
+        """
+        return [entry[:2] for entry in self._undo]
+
+    @classmethod
+    def from_fen(cls, fen):
+        """
+        Returns a new game at the position of a FEN string
+        """
+        game = cls()
+        game.set_fen(fen)
+        return game
+
+    def set_fen(self, fen):
+        """
+        Sets up the position of a FEN string, clearing the move history.
+        Reusing one game this way is faster than from_fen for many positions
+        """
+        board, blue_turn, halfmove, fullmove = parse_fen(fen)
+        self.set_position(board, blue_turn, halfmove, fullmove)
+
+    def to_fen(self):
+        """
+        Returns the position as a FEN string, counting the moves made since
+        the start or the last set_position into the move counters
+        """
+        board = self._board
+        ranks = []
+        for r in range(ROWS):
+            rank = []
+            empty = 0
+            for code in board[r * COLS:(r + 1) * COLS]:
+                if code == EMPTY:
+                    empty += 1
+                    continue
+                if empty:
+                    rank.append(str(empty))
+                    empty = 0
+                rank.append(FEN_NAMES[code])
+            if empty:
+                rank.append(str(empty))
+            ranks.append("".join(rank))
+
+        halfmove, fullmove = self._start_counters
+        plies = len(self._undo)
+        for i in range(plies - 1, -1, -1):
+            if self._undo[i][2] != EMPTY:
+                halfmove = plies - 1 - i
+                break
+        else:
+            halfmove += plies
+        blue_started = self._blue_turn == (plies % 2 == 0)
+        fullmove += plies // 2 if blue_started else (plies + 1) // 2
+
+        return "%s %s - - %d %d" % ("/".join(ranks), "w" if self._blue_turn else "b", halfmove, fullmove)
+
+    def get_score(self):
+        """
+        Returns the static evaluation of the position, material plus square
+        bonuses, positive when blue is ahead
+        """
+        return self._score
+
+    def compute_score(self):
+        """
+        Computes the static evaluation of the position from scratch
+        """
+        board = self._board
+        return sum(PIECE_SQUARE_VALUES[board[sq]][sq] for sq in range(SQUARES))
+
+    def compute_hash(self):
+        """
+        Computes the zobrist hash of the position from scratch
+        """
+        board = self._board
+        h = ZOBRIST_BLUE_TURN if self._blue_turn else 0
+        for sq in range(SQUARES):
+            if board[sq] != EMPTY:
+                h ^= ZOBRIST_PIECES[board[sq]][sq]
+        return h
+
+    def is_in_check(self, color):
+        """
+        Checks if the general of color, "blue" or "red", is attacked
+        """
         if color == "blue":
-            blue_gen_pos = []
-
-            for r in range(len(self._board)):
-                for c in range(len(self._board[r])):
-                    if self._board[r][c][0:2] == "bK":
-                        blue_gen_pos.append((r, c))
-            
-            red_moves = [i[2] for i in self.temp_change_turn() if "r" in i[0]]
-        
-            if blue_gen_pos[0] in red_moves:
-                return True            
-            
-        if color == "red":
-            red_gen_pos = []
-
-            for r in range(len(self._board)):
-                for c in range(len(self._board[r])):
-                    if self._board[r][c][0:2] == "rK":
-                        red_gen_pos.append((r, c))
-            
-            blue_moves = [i[2] for i in self.temp_change_turn() if "b" in i[0]]
-
-            if red_gen_pos[0] in blue_moves:
+            general = self._generals[BLUE]
+            enemy = RED
+        else:
+            general = self._generals[RED]
+            enemy = BLUE
+
+        if general is None:
+            return False
+
+        return self.square_attacked_by(general, enemy)
+
+    def square_attacked_by(self, square, color):
+        """
+        Checks if any piece of color, BLUE or RED, could move to square,
+        by looking backwards from the square along each way a piece can attack it
+        """
+        board = self._board
+        chariot = color | CHARIOT
+        cannon = color | CANNON
+        can_jump = board[square] & TYPE_MASK != CANNON
+
+        # chariots and cannons along the straight lines and palace diagonals
+        for ray in RAYS[square]:
+            screened = False
+            for sq in ray:
+                piece = board[sq]
+                if piece == EMPTY:
+                    continue
+                if not screened:
+                    if piece == chariot:
+                        return True
+                    if piece & TYPE_MASK == CANNON:
+                        break
+                    screened = True
+                else:
+                    if piece == cannon and can_jump:
+                        return True
+                    break
+
+        # horses and elephants whose legs are free
+        horse = color | HORSE
+        for leg, sq in HORSE_ATTACKS[square]:
+            if board[sq] == horse and board[leg] == EMPTY:
+                return True
+
+        elephant = color | ELEPHANT
+        for leg, second_leg, sq in ELEPHANT_ATTACKS[square]:
+            if board[sq] == elephant and board[leg] == EMPTY and board[second_leg] == EMPTY:
+                return True
+
+        # soldiers, and the guards and general of the same palace
+        soldier = color | SOLDIER
+        for sq in SOLDIER_ATTACKS[color][square]:
+            if board[sq] == soldier:
+                return True
+
+        for sq in PALACE_MOVES[square]:
+            if board[sq] == color | GUARD or board[sq] == color | GENERAL:
                 return True
 
         return False
 
-    def temp_change_turn(self):
+    def is_checkmated(self):
         """
-        Temporarily changes whose turn it is in order to verify if current
-        player is attackable by the other team
+        Checks to see if the team whose turn it is has been checkmated,
+        it is in check and has no legal move left
         """
+        if self._blue_turn:
+            color = "blue"
+        else:
+            color = "red"
 
-        self._blue_turn = not self._blue_turn
-        self._piece.reset_moves_list()
-        self._piece.get_all_valid_moves()
-        self._blue_turn = not self._blue_turn
+        if not self.is_in_check(color) or self.legal_moves():
+            return False
 
-        return self._piece.get_all_valid_moves()
+        if self._blue_turn:
+            self._game_state = "RED_WON"
+        else:
+            self._game_state = "BLUE_WON"
+        return True
 
-    def is_checkmated(self):
+    def legal_moves(self, captures_only=False, quiets_only=False):
         """
-        Checks to see if the other team is in checkmake
-        by attempting all the opposing team's valid moves,
-        if no valid moves remain then checkmate has occurred
+        Returns the (from square, to square) moves of the side to move that do
+        not leave its general attacked, passing is not included. With
+        captures_only only the moves capturing an enemy piece are generated,
+        with quiets_only only the ones that do not
         """
-        # switch player
-        self._blue_turn = not self._blue_turn
+        color = BLUE if self._blue_turn else RED
+        enemy = RED if self._blue_turn else BLUE
+        board = self._board
+        generals = self._generals
 
-        # reset player move list
         self._piece.reset_moves_list()
-        
-        # Make a list of all valid moves
-        valid_moves = [(i[1], i[2]) for i in self._piece.get_all_valid_moves()]
+        moves = [(i[1], i[2]) for i in self._piece.get_all_valid_moves(captures_only, quiets_only)]
+        self._piece.reset_moves_list()
 
-        # attempt each move on valid list and check for check
-        for i in reversed(valid_moves):
+        general = generals[color]
+        if general is None:
+            return moves
+
+        in_check = self.square_attacked_by(general, enemy)
+        check_squares = CHECK_SQUARES[general]
+        legal = []
+
+        for move in moves:
+            move_from, move_to = move
+            if move_from != general and move_from not in check_squares and move_to not in check_squares:
+                # the move cannot change whether the general is attacked, when in
+                # check only taking the attacker could still get out of it
+                if not in_check:
+                    legal.append(move)
+                    continue
+                if board[move_to] == EMPTY:
+                    continue
+
+            self.push(move)
+            attacked = self.square_attacked_by(generals[color], enemy)
+            self.pop()
+            if not attacked:
+                legal.append(move)
+
+        return legal
+
+    def is_legal(self, move):
+        """
+        Checks if a (from square, to square) move is legal for the side to
+        move, without generating the moves of the other pieces
+        """
+        move_from, move_to = move
+        color = BLUE if self._blue_turn else RED
+        enemy = RED if self._blue_turn else BLUE
 
-            board_backup = [list(i) for i in self._board]   
+        if move_from == move_to or not self._board[move_from] & color:
+            return False
 
-            # attempt each move on valid list and check for check
-            move_from_row = i[0][0]
-            move_from_col = i[0][1]
-            move_to_row = i[1][0]
-            move_to_col = i[1][1]
-            piece_moved = self._board[move_from_row][move_from_col]
+        self._piece.reset_moves_list()
+        pseudo_legal = any(i[2] == move_to for i in self._piece.get_piece_moves(move_from))
+        self._piece.reset_moves_list()
+        if not pseudo_legal:
+            return False
 
-            self._board[move_from_row][move_from_col] = "--"
-            self._board[move_to_row][move_to_col] = piece_moved
+        self.push(move)
+        general = self._generals[color]
+        attacked = general is not None and self.square_attacked_by(general, enemy)
+        self.pop()
+        return not attacked
 
-            # generate color for the player moving
-            if self._blue_turn:
-                color = "blue"
-            else:
-                color = "red"
-            
-            # remove the move if check still occurs
-            if self.is_in_check(color):
-                valid_moves.remove(i)
-                self._board = board_backup
-                if len(valid_moves) == 3:
-
-                    if self._blue_turn:
-                        self._game_state = "RED_WON"
-                        return True
-                    else:
-                        self._game_state = "BLUE_WON"
-                        return True
-            else:
-                self._blue_turn = not self._blue_turn
-                self._board = board_backup
-                return False
+    def perft(self, depth):
+        """
+        Counts the positions reached by every sequence of depth legal moves,
+        used to check and benchmark the move generator. Passes are not counted
+        """
+        if depth == 0:
+            return 1
 
+        moves = self.legal_moves()
+        if depth == 1:
+            return len(moves)
+
+        nodes = 0
+        for move in moves:
+            self.push(move)
+            nodes += self.perft(depth - 1)
+            self.pop()
+        return nodes
+
+    def divide(self, depth):
+        """
+        Returns the perft count below each legal move, keyed by (from square, to square),
+        to find which move a wrong count comes from
+        """
+        counts = {}
+        for move in self.legal_moves():
+            self.push(move)
+            counts[move] = self.perft(depth - 1)
+            self.pop()
+        return counts
+
+    def push(self, move):
+        """
+        Makes a (from square, to square) move without validating it and
+        records it on the undo stack, a move from a square to itself passes the turn
+        """
+        move_from, move_to = move
+        board = self._board
+        captured = EMPTY
+        h = self._hash
+        score = self._score
+
+        if move_from != move_to:
+            piece = board[move_from]
+            captured = board[move_to]
+            h ^= ZOBRIST_PIECES[piece][move_from] ^ ZOBRIST_PIECES[piece][move_to]
+            values = PIECE_SQUARE_VALUES[piece]
+            score += values[move_to] - values[move_from]
+            if captured != EMPTY:
+                h ^= ZOBRIST_PIECES[captured][move_to]
+                score -= PIECE_SQUARE_VALUES[captured][move_to]
+                self._pieces[captured & COLOR_MASK][captured & TYPE_MASK].discard(move_to)
+                if captured & TYPE_MASK == GENERAL:
+                    self._generals[captured & COLOR_MASK] = None
+            board[move_to] = piece
+            board[move_from] = EMPTY
+
+            squares = self._pieces[piece & COLOR_MASK][piece & TYPE_MASK]
+            squares.discard(move_from)
+            squares.add(move_to)
+            if piece & TYPE_MASK == GENERAL:
+                self._generals[piece & COLOR_MASK] = move_to
+
+        self._undo.append((move_from, move_to, captured, self._hash, self._score))
+        self._hash = h ^ ZOBRIST_BLUE_TURN
+        self._score = score
         self._blue_turn = not self._blue_turn
 
-        return False
+    def pop(self):
+        """
+        Takes back the last move made with push and returns it
+        """
+        move_from, move_to, captured, self._hash, self._score = self._undo.pop()
+        board = self._board
 
-    def make_move(self, start, end):
+        if move_from != move_to:
+            piece = board[move_to]
+            board[move_from] = piece
+            board[move_to] = captured
+
+            squares = self._pieces[piece & COLOR_MASK][piece & TYPE_MASK]
+            squares.discard(move_to)
+            squares.add(move_from)
+            if piece & TYPE_MASK == GENERAL:
+                self._generals[piece & COLOR_MASK] = move_from
+
+            if captured != EMPTY:
+                self._pieces[captured & COLOR_MASK][captured & TYPE_MASK].add(move_to)
+                if captured & TYPE_MASK == GENERAL:
+                    self._generals[captured & COLOR_MASK] = move_to
+
+        self._blue_turn = not self._blue_turn
+        return move_from, move_to
+
+    def make_move(self, start, end=None):
         """
-        Moves the pieces after validating that the move can be 
-        made
+        Moves the pieces after validating that the move can be
+        made. The squares are given in board notation like c10 or as
+        square indexes, or the whole move as a Move passed alone
         """
         # check g state
         if self._game_state != "UNFINISHED":
@@ -175,36 +966,39 @@ class JanggiGame:
 
         self._piece.reset_moves_list()
 
+        if end is None:
+            try:
+                start, end = start
+            except (TypeError, ValueError):
+                return False
+
         # converts user input to board index notation
-        start_sq = self.convert_user_input(start)
-        end_sq = self.convert_user_input(end)
+        move_from = SQUARE_INDEX.get(start) if isinstance(start, str) else start
+        move_to = SQUARE_INDEX.get(end) if isinstance(end, str) else end
+        if move_from is None or move_to is None or not (0 <= move_from < SQUARES and 0 <= move_to < SQUARES):
+            return False
 
-        move_from_row = int(start_sq[0])
-        move_from_col = int(start_sq[1])
-        move_to_row = int(end_sq[0])
-        move_to_col = int(end_sq[1])
-        piece_moved = self._board[move_from_row][move_from_col]
-        piece_taken = self._board[move_to_row][move_to_col]
+        piece_moved = self._board[move_from]
+        piece_taken = self._board[move_to]
 
         # pass the turn to the other player
-        if start == end and piece_moved != "--":
-            # change player turn
-            self._blue_turn = not self._blue_turn
+        if move_from == move_to and piece_moved != EMPTY:
+            self.push((move_from, move_to))
             return True
 
         # check if piece exists on starting spot
-        if piece_moved == "--":
+        if piece_moved == EMPTY:
             return False
 
         # check if it is correct turn
-        if self._blue_turn is False and piece_moved[0] == "b":
+        if self._blue_turn is False and piece_moved & BLUE:
             return False
 
-        if self._blue_turn is True and piece_moved[0] == "r":
+        if self._blue_turn is True and piece_moved & RED:
             return False
 
         # check if piece is trying to capture its own piece
-        if piece_moved[0] == piece_taken[0]:
+        if piece_moved & COLOR_MASK == piece_taken & COLOR_MASK:
             return False
 
         # set colors
@@ -214,84 +1008,41 @@ class JanggiGame:
             color = "red"
 
         # create validation tuples
-        validate = (piece_moved, (int(end_sq[0]), int(end_sq[1])))
-
-        valid_moves = [(i[0],i[2]) for i in self._piece.get_all_valid_moves()]
+        validate = (piece_moved, move_from, move_to)
 
-        # make a copy of the board before move
-        board_backup = [list(i) for i in self._board]
+        # only the moving piece needs its moves generated
+        valid_moves = self._piece.get_piece_moves(move_from)
 
-        # if all is good, move the piece
+        # if all is good, move the piece, this also switches players
         if validate in valid_moves:
-            self._board[move_from_row][move_from_col] = "--"
-            self._board[move_to_row][move_to_col] = piece_moved
+            self.push((move_from, move_to))
         else:
             return False
 
         # verifies that move did not put current color in check
-        # and verify checkmate condition
         if self.is_in_check(color):
-            self._board = board_backup
+            self.pop()
             return False
 
         # check if the other team is mated
-        if self.is_checkmated():
-            return True
-
-        # switch players
-        self._blue_turn = not self._blue_turn
+        self.is_checkmated()
 
         return True
 
     def convert_user_input(self, input):
         """
-        Converts the user input into index value notation
-        """
-        row_value = input[1:3]
-        col_value = input[0]
-
-        convert_rows = {
-            "0": "1",
-            "1": "2",
-            "2": "3",
-            "3": "4",
-            "4": "5",
-            "5": "6",
-            "6": "7",
-            "7": "8",
-            "8": "9",
-            "9": "10",
-        }
-
-        convert_col = {
-            "0": "a",
-            "1": "b",
-            "2": "c",
-            "3": "d",
-            "4": "e",
-            "5": "f",
-            "6": "g",
-            "7": "h",
-            "8": "i",
-        }
-
-        for key, value in convert_rows.items():
-            if value == row_value:
-                row = key
-
-        for key, value in convert_col.items():
-            if value == col_value:
-                col = key
-
-        converted_input = row + col
-
-        return converted_input
+        Converts the user input into index value notation, the row and
+        column digits of the square. Nothing here calls it any more, it is
+        kept only for compatibility with code written against it
+        """
+        return "%d%d" % divmod(SQUARE_INDEX[input], COLS)
 
 
 class Piece:
     """
     Represents pieces of the board that each have their own unique movement
-    and tracks all the pieces' valid movements
+    and tracks all the pieces' valid movements.
+    Moves are stored as (piece code, from square, to square) tuples
     """
 
     def __init__(self, game):
@@ -300,14 +1051,16 @@ class Piece:
         """
         self._game = game
         self._moves = []
+        self._captures_only = False
+        self._quiets_only = False
         self._move_functions = {
-            "C": self.get_chariot_moves,
-            "E": self.get_elephant_moves,
-            "H": self.get_horse_moves,
-            "G": self.get_guard_moves,
-            "K": self.get_general_moves,
-            "F": self.get_cannon_moves,    
-            "S": self.get_soldier_moves    
+            CHARIOT: self.get_chariot_moves,
+            ELEPHANT: self.get_elephant_moves,
+            HORSE: self.get_horse_moves,
+            GUARD: self.get_guard_moves,
+            GENERAL: self.get_general_moves,
+            CANNON: self.get_cannon_moves,
+            SOLDIER: self.get_soldier_moves,
         }
 
     def reset_moves_list(self):
@@ -316,1291 +1069,140 @@ class Piece:
         """
         self._moves.clear()
 
-
-    def get_all_valid_moves(self):
+    def get_all_valid_moves(self, captures_only=False, quiets_only=False):
         """
-        Gets all the valid moves for each piece
+        Gets all the valid moves for each piece, or only the ones
+        capturing an enemy piece, or only the ones that do not
         """
+        color = BLUE if self._game.get_turn() else RED
+        pieces = self._game.get_pieces(color)
+        self._captures_only = captures_only
+        self._quiets_only = quiets_only
 
-        for r in range(len(self._game.get_board())):
-            for c in range(len(self._game.get_board()[r])):
-                color = self._game.get_board()[r][c][0]
-                if (color == "b" and self._game.get_turn()) or (
-                    color == "r" and not self._game.get_turn()
-                ):
-                    piece = self._game.get_board()[r][c][1]
-                    self._move_functions[piece](r, c)
+        for piece_type, move_function in self._move_functions.items():
+            for sq in pieces[piece_type]:
+                move_function(sq)
 
+        self._captures_only = False
+        self._quiets_only = False
         return self._moves
 
-    def get_chariot_moves(self, r, c):
+    def get_piece_moves(self, sq):
         """
-        Gets all the valid moves for the chariot piece
+        Gets the valid moves of the piece on sq
         """
-        piece = "bC" if self._game.get_turn() else "rC"
-        takeable = "r" if self._game.get_turn() else "b"
-        board = self._game.get_board()
-        move_valid = ["r", "-"] if self._game.get_turn() else ["b", "-"]
-        moves = self._moves
-        red_palace = self.get_red_palace_moves()
-        blue_palace = self.get_blue_palace_moves()
+        self._move_functions[self._game.get_squares()[sq] & TYPE_MASK](sq)
+        return self._moves
 
-        # move up
+    def add_move(self, sq, to):
+        """
+        Adds the move from sq to an empty or enemy occupied square
+        """
+        board = self._game.get_squares()
+        piece = board[sq]
+        target = board[to]
+        if target == EMPTY:
+            if not self._captures_only:
+                self._moves.append((piece, sq, to))
+        elif target & piece & COLOR_MASK == 0 and not self._quiets_only:
+            self._moves.append((piece, sq, to))
+
+    def slide(self, sq, ray):
+        """
+        Adds the moves along a ray of squares until the first piece,
+        capturing it if it belongs to the enemy
+        """
+        board = self._game.get_squares()
+        piece = board[sq]
+        for to in ray:
+            if board[to] == EMPTY:
+                if not self._captures_only:
+                    self._moves.append((piece, sq, to))
+            else:
+                if board[to] & piece & COLOR_MASK == 0 and not self._quiets_only:
+                    self._moves.append((piece, sq, to))
+                break
 
-        for i in range(1, 11):
-            if 0 <= r - i < 9:
-                if board[r - i][c][0] in piece:
-                    break
-                elif board[r - i][c][0] == takeable:
-                    moves.append((piece, (r, c), (r - i, c)))
-                    break
-                else:
-                    if board[r - i][c][0] in move_valid:
-                        moves.append((piece, (r, c ), (r - i, c)))
-        # move down
-        for i in range(1, 11):
-            if 0 <= r + i < 9:
-                if board[r + i][c][0] in piece:
-                    break
-                elif board[r + i][c][0] == takeable:
-                    moves.append((piece, (r, c ), (r + i, c)))
-                    break
-                else:
-                    if board[r + i][c][0] in move_valid:
-                        moves.append((piece, (r, c), (r + i, c)))
-        # move right
-        for i in range(1, 10):
-            if 0 <= c + i < 8:
-                if board[r][c + i][0] in piece:
-                    break
-                elif board[r][c + i][0] == takeable:
-                    moves.append((piece, (r, c), (r, c + i)))
-                    break
-                else:
-                    if board[r][c + i][0] in move_valid:
-                        moves.append((piece, (r, c), (r, c + i)))
-        # move left 
-        for i in range(1, 10):
-            if 0 <= c - i < 8:
-                if board[r][c - i][0] in piece:
-                    break
-                elif board[r][c - i][0] == takeable:
-                    moves.append((piece, (r, c), (r, c - i)))
-                    break
-                else:
-                    if board[r][c - i][0] in move_valid:
-                        moves.append((piece, (r, c), (r, c - i)))
-
-        # if in red palace
-
-        # if in palace can move diagonally up to the right
-        if (
-            (r, c) in red_palace
-            and (r - 2 >= 0 or r - 1 >= 0)
-            and (c + 2 <= 5 or c + 1 <= 5)
-            and (r, c) not in [(3, 1), (4, 0), (5, 1), (4, 2)]
-        ):
-            for i in range(1, 3):
-                if board[r - i][c + i][0] in piece:
-                    break
-                elif board[r - i][c + i][0] == takeable:
-                    moves.append((piece, (r, c), (r - i, c + i)))
-                    break
-                else:
-                    if board[r - i][c + i][0] in move_valid:
-                        moves.append((piece, (r, c), (r - i, c + i)))
-        # if in palace can move diagonally up to the left
-        if (
-            (r, c) in red_palace
-            and (r - 2 >= 0 or r - 1 >= 0)
-            and (c - 2 >= 3 or c - 1 >= 3)
-            and (r, c) not in [(3, 1), (4, 0), (5, 1), (4, 2)]
-        ):
-            for i in range(1, 3):
-                if board[r - i][c - i][0] in piece:
-                    break
-                elif board[r - i][c - i][0] == takeable:
-                    moves.append((piece, (r, c), (r - i, c + i)))
-                    break
-                else:
-                    if board[r - i][c - i][0] in move_valid:
-                        moves.append((piece, (r, c), (r - i, c - i)))
-        # if in palace can move diagonally down to the left
-        if (
-            (r, c) in red_palace
-            and (r + 2 <= 2 or r + 1 <= 2)
-            and (c - 2 >= 3 or c - 1 >= 3)
-            and (r, c) not in [(3, 1), (4, 0), (5, 1), (4, 2)]
-        ):
-            for i in range(1, 3):
-                if board[r + i][c - i][0] in piece:
-                    break
-                elif board[r + i][c - i][0] == takeable:
-                    moves.append((piece, (r, c), (r - i, c - i)))
-                    break
-                else:
-                    if board[r + i][c - i][0] in move_valid:
-                        moves.append((piece, (r, c), (r + i, c - i)))
-        # if in palace can move diag down to right
-        if (
-            (r, c) in red_palace
-            and (r + 2 <= 2 or r + 1 <= 2)
-            and (c + 2 <= 5 or c + 1 <= 5)
-            and (r, c) not in [(3, 1), (4, 0), (5, 1), (4, 2)]
-        ):
-            for i in range(1, 3):
-                if board[r + i][c + i][0] in piece:
-                    break
-                elif board[r + i][c + i][0] == takeable:
-                    moves.append((piece, (r, c), (r - i, c + i)))
-                    break
-                else:
-                    if board[r + i][c + i][0] in move_valid:
-                        moves.append((piece, (r, c), (r + i, c + i)))
-
-        # if in blue palace
-
-        # if in palace can move diagonally up to the right
-        if (
-            (r, c) in blue_palace
-            and (r - 2 >= 7 or r - 1 >= 7)
-            and (c + 2 <= 5 or c + 1 <= 5)
-            and (r, c) not in [(7, 4), (8, 3), (8, 5), (9, 4)]
-        ):
-            for i in range(1, 3):
-                if board[r - i][c + i][0] in piece:
-                    break
-                elif board[r - i][c + i][0] == takeable:
-                    moves.append((piece, (r, c), (r - i, c + i)))
-                    break
-                else:
-                    if board[r - i][c + i][0] in move_valid:
-                        moves.append((piece, (r, c), (r - i, c + i)))
-        # if in palace can move diagonally up to the left
-        if (
-            (r, c) in blue_palace
-            and (r - 2 >= 7 or r - 1 >= 7)
-            and (c - 2 >= 3 or c - 1 >= 3)
-            and (r, c) not in [(7, 4), (8, 3), (8, 5), (9, 4)]
-        ):
-            for i in range(1, 3):
-                if board[r - i][c - i][0] in piece:
-                    break
-                elif board[r - i][c - i][0] == takeable:
-                    moves.append((piece, (r, c), (r - i, c + i)))
-                    break
-                else:
-                    if board[r - i][c - i][0] in move_valid:
-                        moves.append((piece, (r, c), (r - i, c - i)))
-        # if in palace can move diagonally down to the left
-        if (
-            (r, c) in blue_palace
-            and (r + 2 <= 0 or r + 1 <= 0)
-            and (c - 2 >= 3 or c - 1 >= 3)
-            and (r, c) not in [(7, 4), (8, 3), (8, 5), (9, 4)]
-        ):
-            for i in range(1, 3):
-                if board[r + i][c - i][0] in piece:
-                    break
-                elif board[r + i][c - i][0] == takeable:
-                    moves.append((piece, (r, c), (r - i, c - i)))
-                    break
-                else:
-                    if board[r + i][c - i][0] in move_valid:
-                        moves.append((piece, (r, c), (r + i, c - i)))
-        # if in palace can move diag down to right
-        if (
-            (r, c) in blue_palace
-            and (r + 2 <= 0 or r + 1 <= 0)
-            and (c + 2 <= 5 or c + 1 <= 5)
-            and (r, c) not in [(7, 4), (8, 3), (8, 5), (9, 4)]
-        ):
-            for i in range(1, 3):
-                if board[r + i][c + i][0] in piece:
-                    break
-                elif board[r + i][c + i][0] == takeable:
-                    moves.append((piece, (r, c), (r - i, c + i)))
-                    break
-                else:
-                    if board[r + i][c + i][0] in move_valid:
-                        moves.append((piece, (r, c), (r + i, c + i)))
+    def jump(self, sq, ray):
+        """
+        Adds the cannon moves along a ray of squares, the cannon has to
+        jump exactly one piece that is not a cannon and cannot capture a cannon
+        """
+        board = self._game.get_squares()
+        piece = board[sq]
+        screened = False
+        for to in ray:
+            target = board[to]
+            if not screened:
+                if target != EMPTY:
+                    if target & TYPE_MASK == CANNON:
+                        break
+                    screened = True
+            elif target == EMPTY:
+                if not self._captures_only:
+                    self._moves.append((piece, sq, to))
+            else:
+                if (
+                    target & TYPE_MASK != CANNON
+                    and target & piece & COLOR_MASK == 0
+                    and not self._quiets_only
+                ):
+                    self._moves.append((piece, sq, to))
+                break
 
-    def get_elephant_moves(self, r, c):
+    def get_chariot_moves(self, sq):
         """
-        Gets all the valid moves for the elephant piece
+        Gets all the valid moves for the chariot piece
         """
-        piece = "bE" if self._game.get_turn() else "rE"
-        board = self._game.get_board()
-        move_valid = ["r", "-"] if self._game.get_turn() else ["b", "-"]
-        moves = self._moves
-        blockers = ["b", "r"]
-
-        # move up moves
-
-        # check up boundaries
-        if r - 3 >= 0:
-            # check first space for blockers
-            if board[r - 1][c][0] not in blockers:
-                # check right boundary
-                if c + 2 <= 8:
-                    # check right for blockers
-                    if board[r - 2][c + 1][0] not in blockers:
-                        # check final spot for enemy or blank space
-                        if board[r - 3][c + 2][0] in move_valid:
-                            # append valid moves
-                            moves.append((piece, (r, c), (r - 3, c + 2)))
-
-                # check left boundaries
-                if c - 2 >= 0:
-                    # check left for blockers
-                    if board[r - 2][c - 1][0] not in blockers:
-                        # check final spot for enemy or blank space
-                        if board[r - 3][c - 2][0] in move_valid:
-                            # append valid moves
-                            moves.append((piece, (r, c), (r - 3, c - 2)))
-
-        # move down moves
-
-        # check down boundaries
-        if r + 3 <= 9:
-            # check first space for blockers
-            if board[r + 1][c][0] not in blockers:
-                # check right boundary
-                if c + 2 <= 8:
-                    # check right for blockers
-                    if board[r + 2][c + 1][0] not in blockers:
-                        # check final spot for enemy or blank space
-                        if board[r + 3][c + 2][0] in move_valid:
-                            # append valid moves
-                            moves.append((piece, (r, c), (r + 3, c + 2)))
-                # check left boundary
-                if c - 2 >= 0:
-                    # check left for blockers
-                    if board[r + 2][c - 1][0] not in blockers:
-                        # check final spot for enemy or blank space
-                        if board[r + 3][c - 2][0] in move_valid:
-                            # append valid moves
-                            moves.append((piece, (r, c), (r + 3, c - 2)))
-
-        # move left moves
-
-        # check left boundaries
-        if c - 3 >= 0:
-            # check first space for blockers
-            if board[r][c - 1][0] not in blockers:
-                # check up boundary
-                if r - 2 >= 0:
-                    # check up for blockers
-                    if board[r - 1][c - 2][0] not in blockers:
-                        # check final spot for enemy or blank space
-                        if board[r - 2][c - 3][0] in move_valid:
-                            # append valid moves
-                            moves.append((piece, (r, c), (r - 2, c - 3)))
-                # check down boundary
-                if r + 2 <= 9:
-                    # check down for blockers
-                    if board[r + 1][c - 2][0] not in blockers:
-                        # check final spot for enemy or blank space
-                        if board[r + 2][c - 3][0] in move_valid:
-                            # append valid moves
-                            moves.append((piece, (r, c), (r + 2, c - 3)))
-
-        # move right moves
-
-        # check right boundaries
-        if c + 3 <= 8:
-            # check first space for blockers
-            if board[r][c + 1][0] not in blockers:
-                # check up boundary
-                if r - 2 >= 0:
-                    # check up for blockers
-                    if board[r - 1][c + 2][0] not in blockers:
-                        # check final spot for enemy or blank space
-                        if board[r - 2][c + 3][0] in move_valid:
-                            # append valid moves
-                            moves.append((piece, (r, c), (r - 2, c + 3)))
-                # check down boundary
-                if r + 2 <= 9:
-                    # check down for blockers
-                    if board[r + 1][c + 2][0] not in blockers:
-                        # check final spot for enemy or blank space
-                        if board[r + 2][c + 3][0] in move_valid:
-                            # append valid moves
-                            moves.append((piece, (r, c), (r + 2, c + 3)))
-
-    def get_horse_moves(self, r, c):
+        for ray in RAYS[sq]:
+            self.slide(sq, ray)
+
+    def get_cannon_moves(self, sq):
+        """
+        Gets all the valid moves for the cannon piece
+        """
+        for ray in RAYS[sq]:
+            self.jump(sq, ray)
+
+    def get_horse_moves(self, sq):
         """
         Gets all the valid moves for the horse piece
         """
+        board = self._game.get_squares()
+        for leg, to in HORSE_MOVES[sq]:
+            if board[leg] == EMPTY:
+                self.add_move(sq, to)
 
-        piece = "bH" if self._game.get_turn() else "rH"
-        board = self._game.get_board()
-        move_valid = ["r", "-"] if self._game.get_turn() else ["b", "-"]
-
-        # check bounds
-        if r - 2 >= 0:
-            # if not blocked up
-            if board[r - 1][c][0] not in ["r", "b"]:
-                # Move up left
-                if c - 1 >= 0 and r - 2 >= 0:
-                    if board[r - 2][c - 1][0] in move_valid:
-                        self._moves.append((piece, (r, c), (r - 2, c - 1)))
-                # Move up right
-                if c + 1 <= 8:
-                    if board[r - 2][c + 1][0] in move_valid:
-                        self._moves.append((piece, (r, c), (r - 2, c + 1)))
-        # check left in bounds
-        if c - 2 >= 0:
-            # if not blocked left
-            if board[r][c - 1][0] not in ["r", "b"]:
-                # Move left up
-                if c - 2 >= 0 and r - 1 >= 0:
-                    if board[r - 1][c - 2][0] in move_valid:
-                        self._moves.append((piece, (r, c), (r - 1, c - 2)))
-                # Move left down
-                if c - 2 >= 0 and r + 1 <= 9:
-                    if board[r + 1][c - 2][0] in move_valid:
-                        self._moves.append((piece, (r, c), (r + 1, c - 2)))
-        # check right in bounds
-        if c + 2 <= 8:
-            # if not blocked right
-            if board[r][c + 1][0] not in ["r", "b"]:
-                # Move right up
-                if r - 1 >= 0 and c + 2 <= 8:
-                    if board[r - 1][c + 2][0] in move_valid:
-                        self._moves.append((piece, (r, c), (r - 1, c + 2)))
-                # move right down
-                if r + 1 <= 9 and c + 2 <= 8:
-                    if board[r + 1][c + 2][0] in move_valid:
-                        self._moves.append((piece, (r, c), (r + 1, c + 2)))
-        # check bottom bounds
-        if r + 2 <= 9:
-            # if not blocked down
-            if board[r + 1][c][0] not in ["r", "b"]:
-                # move down left
-                if c - 1 >= 0:
-                    if board[r + 2][c - 1][0] in move_valid:
-                        self._moves.append((piece, (r, c), (r + 2, c - 1)))
-                # move down right
-                if c + 1 <= 8:
-                    if board[r + 2][c + 1][0] in move_valid:
-                        self._moves.append((piece, (r, c), (r + 2, c + 1)))
-
-    def get_guard_moves(self, r, c):
+    def get_elephant_moves(self, sq):
         """
-        Gets all the valid moves for the guard piece
+        Gets all the valid moves for the elephant piece
         """
-        bg = "bG"
-        rg = "rG"
-        board = self._game.get_board()
-        blue_move_valid = ["r", "-"]
-        red_move_valid = ["b", "-"]
-        moves = self._moves
-
-        if self._game.get_turn():
-            # if on 7,3
-            # check right
-            if r == 7 and c == 3:
-                if board[r][c + 1][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r, c + 1)))
-                # check diagonal
-                if board[r + 1][c + 1][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r + 1, c + 1)))
-                # check down
-                if board[r + 1][c][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r + 1, c)))
-            # if on 7,4
-            if r == 7 and c == 4:
-                # check right
-                if board[r][c + 1][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r, c + 1)))
-                # check down
-                if board[r + 1][c][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r + 1, c)))
-                # check left
-                if board[r][c - 1][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r, c - 1)))
-            # if on 7,5
-            if r == 7 and c == 5:
-                # check left
-                if board[r][c - 1][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r, c - 1)))
-                # check diagonal
-                if board[r + 1][c - 1][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r + 1, c - 1)))
-                # check down
-                if board[r + 1][c][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r + 1, c)))
-            # if on 8,3
-            if r == 8 and c == 3:
-                # check up
-                if board[r - 1][c][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r - 1, c)))
-                # check right
-                if board[r][c + 1][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r, c + 1)))
-                # check down
-                if board[r + 1][c][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r + 1, c)))
-            # if on 8,4
-            if r == 8 and c == 4:
-                # check up
-                if board[r - 1][c][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r - 1, c)))
-                # check diagonal up right
-                if board[r - 1][c + 1][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r - 1, c + 1)))
-                # check right
-                if board[r][c + 1][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r, c + 1)))
-                # check diagonal down right
-                if board[r + 1][c + 1][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r + 1, c + 1)))
-                # check down
-                if board[r + 1][c][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r + 1, c)))
-                # check diagonal down left
-                if board[r + 1][c - 1][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r + 1, c - 1)))
-                # check left
-                if board[r][c - 1][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r, c - 1)))
-                # check diagonal up left
-                if board[r - 1][c - 1][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r - 1, c - 1)))
-            # if on 8,5
-            if r == 8 and c == 5:
-                # check up
-                if board[r - 1][c][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r - 1, c)))
-                # check left
-                if board[r][c - 1][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r, c - 1)))
-                # check down
-                if board[r + 1][c][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r + 1, c)))
-
-            # if on 9,3
-            if r == 9 and c == 3:
-                # check right
-                if board[r][c + 1][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r, c + 1)))
-                # check diag up right
-                if board[r - 1][c + 1][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r - 1, c + 1)))
-                # check up
-                if board[r - 1][c][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r - 1, c)))
-
-            # if on 9,4
-            if r == 9 and c == 4:
-                # check left
-                if board[r][c - 1][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r, c - 1)))
-                # check right
-                if board[r][c + 1][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r, c + 1)))
-                # check up
-                if board[r - 1][c][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r - 1, c)))
-
-            # if on 9,5
-            if r == 9 and c == 5:
-                # check up
-                if board[r - 1][c][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r - 1, c)))
-                # check left
-                if board[r][c - 1][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r, c - 1)))
-                # check diag up left
-                if board[r - 1][c - 1][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r - 1, c - 1)))
-
-        if not self._game.get_turn():  # red turn
-            # if on 2,7
-            if r == 2 and c == 3:
-                # check right
-                if board[r][c + 1][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r, c + 1)))
-                # check diagonal
-                if board[r - 1][c + 1][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r - 1, c + 1)))
-                # check up
-                if board[r - 1][c][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r - 1, c)))
-            # if on 3,4
-            if r == 2 and c == 4:
-                # check right
-                if board[r][c + 1][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r, c + 1)))
-                # check up
-                if board[r - 1][c][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r - 1, c)))
-                # check left
-                if board[r][c - 1][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r, c - 1)))
-            # if on 3,5
-            if r == 2 and c == 5:
-                # check left
-                if board[r][c - 1][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r, c - 1)))
-                # check diagonal
-                if board[r - 1][c - 1][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r - 1, c - 1)))
-                # check up
-                if board[r - 1][c][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r - 1, c)))
-            # if on 1,3
-            if r == 1 and c == 3:
-                # check up
-                if board[r - 1][c][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r - 1, c)))
-                # check right
-                if board[r][c + 1][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r, c + 1)))
-                # check down
-                if board[r + 1][c][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r + 1, c)))
-            # if on 1,4
-            if r == 1 and c == 4:
-                # check up
-                if board[r - 1][c][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r - 1, c)))
-                # check diagonal up right
-                if board[r - 1][c + 1][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r - 1, c + 1)))
-                # check right
-                if board[r][c + 1][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r, c + 1)))
-                # check diagonal down right
-                if board[r + 1][c + 1][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r + 1, c + 1)))
-                # check down
-                if board[r + 1][c][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r + 1, c)))
-                # check diagonal down left
-                if board[r + 1][c - 1][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r + 1, c - 1)))
-                # check left
-                if board[r][c - 1][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r, c - 1)))
-                # check diagonal up left
-                if board[r - 1][c - 1][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r - 1, c - 1)))
-            # if on 1,5
-            if r == 1 and c == 5:
-                # check up
-                if board[r - 1][c][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r - 1, c)))
-                # check left
-                if board[r][c - 1][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r, c - 1)))
-                # check down
-                if board[r + 1][c][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r + 1, c)))
-
-            # if on 0,3
-            if r == 0 and c == 3:
-                # check right
-                if board[r][c + 1][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r, c + 1)))
-                # check diag down right
-                if board[r + 1][c + 1][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r + 1, c + 1)))
-                # check down
-                if board[r + 1][c][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r + 1, c)))
-
-            # if on 0,4
-            if r == 0 and c == 4:
-                # check left
-                if board[r][c - 1][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r, c - 1)))
-                # check right
-                if board[r][c + 1][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r, c + 1)))
-                # check down
-                if board[r + 1][c][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r + 1, c)))
-
-            # if on 0,5
-            if r == 0 and c == 5:
-                # check down
-                if board[r + 1][c][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r + 1, c)))
-                # check left
-                if board[r][c - 1][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r, c - 1)))
-                # check diag down left
-                if board[r + 1][c - 1][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r + 1, c - 1)))
-
-    def get_general_moves(self, r, c):
+        board = self._game.get_squares()
+        for leg, second_leg, to in ELEPHANT_MOVES[sq]:
+            if board[leg] == EMPTY and board[second_leg] == EMPTY:
+                self.add_move(sq, to)
+
+    def get_guard_moves(self, sq):
         """
-        Gets all the valid moves for the general piece
+        Gets all the valid moves for the guard piece
         """
-        bg = "bK"
-        rg = "rK"
-        board = self._game.get_board()
-        blue_move_valid = ["r", "-"]
-        red_move_valid = ["b", "-"]
-        moves = self._moves
-
-        if self._game.get_turn():
-            # if on 7,3
-            # check right
-            if r == 7 and c == 3:
-                if board[r][c + 1][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r, c + 1)))
-                # check diagonal
-                if board[r + 1][c + 1][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r + 1, c + 1)))
-                # check down
-                if board[r + 1][c][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r + 1, c)))
-            # if on 7,4
-            if r == 7 and c == 4:
-                # check right
-                if board[r][c + 1][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r, c + 1)))
-                # check down
-                if board[r + 1][c][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r + 1, c)))
-                # check left
-                if board[r][c - 1][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r, c - 1)))
-            # if on 7,5
-            if r == 7 and c == 5:
-                # check left
-                if board[r][c - 1][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r, c - 1)))
-                # check diagonal
-                if board[r + 1][c - 1][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r + 1, c - 1)))
-                # check down
-                if board[r + 1][c][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r + 1, c)))
-            # if on 8,3
-            if r == 8 and c == 3:
-                # check up
-                if board[r - 1][c][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r - 1, c)))
-                # check right
-                if board[r][c + 1][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r, c + 1)))
-                # check down
-                if board[r + 1][c][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r + 1, c)))
-            # if on 8,4
-            if r == 8 and c == 4:
-                # check up
-                if board[r - 1][c][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r - 1, c)))
-                # check diagonal up right
-                if board[r - 1][c + 1][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r - 1, c + 1)))
-                # check right
-                if board[r][c + 1][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r, c + 1)))
-                # check diagonal down right
-                if board[r + 1][c + 1][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r + 1, c + 1)))
-                # check down
-                if board[r + 1][c][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r + 1, c)))
-                # check diagonal down left
-                if board[r + 1][c - 1][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r + 1, c - 1)))
-                # check left
-                if board[r][c - 1][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r, c - 1)))
-                # check diagonal up left
-                if board[r - 1][c - 1][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r - 1, c - 1)))
-            # if on 8,5
-            if r == 8 and c == 5:
-                # check up
-                if board[r - 1][c][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r - 1, c)))
-                # check left
-                if board[r][c - 1][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r, c - 1)))
-                # check down
-                if board[r + 1][c][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r + 1, c)))
-
-            # if on 9,3
-            if r == 9 and c == 3:
-                # check right
-                if board[r][c + 1][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r, c + 1)))
-                # check diag up right
-                if board[r - 1][c + 1][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r - 1, c + 1)))
-                # check up
-                if board[r - 1][c][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r - 1, c)))
-
-            # if on 9,4
-            if r == 9 and c == 4:
-                # check left
-                if board[r][c - 1][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r, c - 1)))
-                # check right
-                if board[r][c + 1][0] in blue_move_valid:
-                    moves.append((bg, (r, c), (r, c + 1)))
-                # check up
-                if board[r - 1][c][0] in blue_move_valid:
-                    moves.append((bg, (r, c), bg, (r - 1, c)))
-
-            # if on 9,5
-            if r == 9 and c == 5:
-                # check up
-                if board[r - 1][c][0] in blue_move_valid:
-                    moves.append((bg, (r, c), bg, (r - 1, c)))
-                # check left
-                if board[r][c - 1][0] in blue_move_valid:
-                    moves.append((bg, (r, c), bg, (r, c - 1)))
-                # check diag up left
-                if board[r - 1][c - 1][0] in blue_move_valid:
-                    moves.append((bg, (r, c), bg, (r - 1, c - 1)))
-
-        if not self._game.get_turn():  # red turn
-            # if on 2,7
-            if r == 2 and c == 3:
-                # check right
-                if board[r][c + 1][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r, c + 1)))
-                # check diagonal
-                if board[r - 1][c + 1][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r - 1, c + 1)))
-                # check up
-                if board[r - 1][c][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r - 1, c)))
-            # if on 3,4
-            if r == 2 and c == 4:
-                # check right
-                if board[r][c + 1][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r, c + 1)))
-                # check up
-                if board[r - 1][c][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r - 1, c)))
-                # check left
-                if board[r][c - 1][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r, c - 1)))
-            # if on 3,5
-            if r == 2 and c == 5:
-                # check left
-                if board[r][c - 1][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r, c - 1)))
-                # check diagonal
-                if board[r - 1][c - 1][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r - 1, c - 1)))
-                # check up
-                if board[r - 1][c][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r - 1, c)))
-            # if on 1,3
-            if r == 1 and c == 3:
-                # check up
-                if board[r - 1][c][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r - 1, c)))
-                # check right
-                if board[r][c + 1][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r, c + 1)))
-                # check down
-                if board[r + 1][c][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r + 1, c)))
-            # if on 1,4
-            if r == 1 and c == 4:
-                # check up
-                if board[r - 1][c][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r - 1, c)))
-                # check diagonal up right
-                if board[r - 1][c + 1][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r - 1, c + 1)))
-                # check right
-                if board[r][c + 1][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r, c + 1)))
-                # check diagonal down right
-                if board[r + 1][c + 1][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r + 1, c + 1)))
-                # check down
-                if board[r + 1][c][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r + 1, c)))
-                # check diagonal down left
-                if board[r + 1][c - 1][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r + 1, c - 1)))
-                # check left
-                if board[r][c - 1][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r, c - 1)))
-                # check diagonal up left
-                if board[r - 1][c - 1][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r - 1, c - 1)))
-            # if on 1,5
-            if r == 1 and c == 5:
-                # check up
-                if board[r - 1][c][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r - 1, c)))
-                # check left
-                if board[r][c - 1][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r, c - 1)))
-                # check down
-                if board[r + 1][c][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r + 1, c)))
-
-            # if on 0,3
-            if r == 0 and c == 3:
-                # check right
-                if board[r][c + 1][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r, c + 1)))
-                # check diag down right
-                if board[r + 1][c + 1][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r + 1, c + 1)))
-                # check down
-                if board[r + 1][c][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r + 1, c)))
-
-            # if on 0,4
-            if r == 0 and c == 4:
-                # check left
-                if board[r][c - 1][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r, c - 1)))
-                # check right
-                if board[r][c + 1][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r, c + 1)))
-                # check down
-                if board[r + 1][c][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r + 1, c)))
-
-            # if on 0,5
-            if r == 0 and c == 5:
-                # check down
-                if board[r + 1][c][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r + 1, c)))
-                # check left
-                if board[r][c - 1][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r, c - 1)))
-                # check diag down left
-                if board[r + 1][c - 1][0] in red_move_valid:
-                    moves.append((rg, (r, c), (r + 1, c - 1)))
-
-    def get_cannon_moves(self, r, c):
+        for to in PALACE_MOVES[sq]:
+            self.add_move(sq, to)
+
+    def get_general_moves(self, sq):
         """
-        Gets all the valid moves for the cannon piece
+        Gets all the valid moves for the general piece
         """
-        piece = "bF" if self._game.get_turn() else "rF"
-        takeable = "r" if self._game.get_turn() else "b"
-        board = self._game.get_board()
-        move_valid = ["r", "-"] if self._game.get_turn() else ["b", "-"]
-        moves = self._moves
-        red_palace = self.get_red_palace_moves()
-        blue_palace = self.get_blue_palace_moves()
-        pieces_jumped = 0
-
-        # move up
-        pieces_jumped = 0
-        for i in range(1, 11):
-            if 0 <= r - i <= 9:
-                if board[r - i][c][1] == "F":
-                    break
-                if pieces_jumped != 1:
-                    board[r - i][c]
-                    if board[r - i][c][0] in "rb":
-                        pieces_jumped += 1
-                else:
-                    if pieces_jumped == 1:
-                        if board[r - i][c][0] in piece:
-                            break
-                        elif board[r - i][c][0] == takeable:
-                            moves.append((piece, (r, c), (r - i, c)))
-                            break
-                        else:
-                            if board[r - i][c][0] in move_valid:
-                                moves.append((piece, (r, c), (r - i, c)))
-        # move down
-        pieces_jumped = 0
-        for i in range(1, 11):
-            if 0 <= r + i <= 9:
-                if board[r + i][c][1] == "F":
-                    break
-                if pieces_jumped != 1:
-                    board[r + i][c]
-                    if board[r + i][c][0] in "rb":
-                        pieces_jumped += 1
-                else:
-                    if pieces_jumped == 1:
-                        if board[r + i][c][0] in piece:
-                            break
-                        elif board[r + i][c][0] == takeable:
-                            moves.append((piece, (r, c), (r + i, c)))
-                            break
-                        else:
-                            if board[r + i][c][0] in move_valid:
-                                moves.append((piece, (r, c), (r + i, c)))
-        # move right
-        pieces_jumped = 0
-        for i in range(1, 10):
-            if 0 <= c + i <= 8:
-                if board[r][c + i][1] == "F":
-                    break
-                if pieces_jumped != 1:
-                    board[r][c + i]
-                    if board[r][c + i][0] in "rb":
-                        pieces_jumped += 1
-                else:
-                    if pieces_jumped == 1:
-                        if board[r][c + i][0] in piece:
-                            break
-                        elif board[r][c + i][0] == takeable:
-                            moves.append((piece, (r, c), (r, c + i)))
-                            break
-                        else:
-                            if board[r][c + i][0] in move_valid:
-                                moves.append((piece, (r, c), (r, c + i)))
-
-        # move left
-        pieces_jumped = 0
-        for i in range(1, 10):
-            if 0 <= c - i <= 8:
-                if board[r][c - i][1] == "F":
-                    break
-                if pieces_jumped != 1:
-                    board[r][c - i]
-                    if board[r][c - i][0] in "rb":
-                        pieces_jumped += 1
-                else:
-                    if pieces_jumped == 1:
-                        if board[r][c - i][0] in piece:
-                            break
-                        elif board[r][c - i][0] == takeable:
-                            moves.append((piece, (r, c), (r, c - i)))
-                            break
-                        else:
-                            if board[r][c - i][0] in move_valid:
-                                moves.append((piece, (r, c), (r, c - i)))
-
-        # if in red palace
-
-        # if in palace can move diagonally up to the right
-        if (
-            (r, c) in red_palace
-            and (r - 2 >= 0 or r - 1 >= 0)
-            and (c + 2 <= 5 or c + 1 <= 5)
-            and (r, c) not in [(3, 1), (4, 0), (5, 1), (4, 2)]
-        ):
-            pieces_jumped = 0
-            for i in range(1, 3):
-                if board[r - i][c + i][1] == "F":
-                    break
-                if pieces_jumped != 1:
-                    board[r - i][c + i]
-                    if board[r - i][c + i][0] in "rb":
-                        pieces_jumped += 1
-                else:
-                    if board[r - i][c + i][0] in piece:
-                        break
-                    elif board[r - i][c + i][0] == takeable:
-                        moves.append((piece, (r, c), (r - i, c + i)))
-                        break
-                    else:
-                        if board[r - i][c + i][0] in move_valid:
-                            moves.append((piece, (r, c), (r - i, c + i)))
-        # if in palace can move diagonally up to the left
-        if (
-            (r, c) in red_palace
-            and (r - 2 >= 0 or r - 1 >= 0)
-            and (c - 2 >= 3 or c - 1 >= 3)
-            and (r, c) not in [(3, 1), (4, 0), (5, 1), (4, 2)]
-        ):
-            pieces_jumped = 0
-            for i in range(1, 3):
-                if board[r - i][c - i][1] == "F":
-                    break
-                if pieces_jumped != 1:
-                    board[r - i][c - i]
-                    if board[r - i][c - i][0] in "rb":
-                        pieces_jumped += 1
-                else:
-                    if board[r - i][c - i][0] in piece:
-                        break
-                    elif board[r - i][c - i][0] == takeable:
-                        moves.append((piece, (r, c), (r - i, c + i)))
-                        break
-                    else:
-                        if board[r - i][c - i][0] in move_valid:
-                            moves.append((piece, (r, c), (r - i, c - i)))
-        # if in palace can move diagonally down to the left
-        if (
-            (r, c) in red_palace
-            and (r + 2 <= 2 or r + 1 <= 2)
-            and (c - 2 >= 3 or c - 1 >= 3)
-            and (r, c) not in [(3, 1), (4, 0), (5, 1), (4, 2)]
-        ):
-            pieces_jumped = 0
-            for i in range(1, 3):
-                if board[r + i][c - i][1] == "F":
-                    break
-                if pieces_jumped != 1:
-                    board[r + i][c - i]
-                    if board[r + i][c - i][0] in "rb":
-                        pieces_jumped += 1
-                else:
-                    if board[r + i][c - i][0] in piece:
-                        break
-                    elif board[r + i][c - i][0] == takeable:
-                        moves.append((piece, (r, c), (r - i, c - i)))
-                        break
-                    else:
-                        if board[r + i][c - i][0] in move_valid:
-                            moves.append((piece, (r, c), (r + i, c - i)))
-        # if in palace can move diag down to right
-        if (
-            (r, c) in red_palace
-            and (r + 2 <= 2 or r + 1 <= 2)
-            and (c + 2 <= 5 or c + 1 <= 5)
-            and (r, c) not in [(3, 1), (4, 0), (5, 1), (4, 2)]
-        ):
-            pieces_jumped = 0
-            for i in range(1, 3):
-                if board[r + i][c + i][1] == "F":
-                    break
-                if pieces_jumped != 1:
-                    board[r + i][c + i]
-                    if board[r + i][c + i][0] in "rb":
-                        pieces_jumped += 1
-                else:
-                    if board[r + i][c + i][0] in piece:
-                        break
-                    elif board[r + i][c + i][0] == takeable:
-                        moves.append((piece, (r, c), (r - i, c + i)))
-                        break
-                    else:
-                        if board[r + i][c + i][0] in move_valid:
-                            moves.append((piece, (r, c), (r + i, c + i)))
-
-        # if in blue palace
-
-        # if in palace can move diagonally up to the right
-        if (
-            (r, c) in blue_palace
-            and (r - 2 >= 7 or r - 1 >= 7)
-            and (c + 2 <= 5 or c + 1 <= 5)
-            and (r, c) not in [(7, 4), (8, 3), (8, 5), (9, 4)]
-        ):
-            pieces_jumped = 0
-            for i in range(1, 3):
-                if board[r - i][c + i][1] == "F":
-                    break
-                if pieces_jumped != 1:
-                    board[r - i][c + i]
-                    if board[r - i][c + i][0] in "rb":
-                        pieces_jumped += 1
-                else:
-                    if board[r - i][c + i][0] in piece:
-                        break
-                    elif board[r - i][c + i][0] == takeable:
-                        moves.append((piece, (r, c), (r - i, c + i)))
-                        break
-                    else:
-                        if board[r - i][c + i][0] in move_valid:
-                            moves.append((piece, (r, c), (r - i, c + i)))
-        # if in palace can move diagonally up to the left
-        if (
-            (r, c) in blue_palace
-            and (r - 2 >= 7 or r - 1 >= 7)
-            and (c - 2 >= 3 or c - 1 >= 3)
-            and (r, c) not in [(7, 4), (8, 3), (8, 5), (9, 4)]
-        ):
-            pieces_jumped = 0
-            for i in range(1, 3):
-                if board[r - i][c - i][1] == "F":
-                    break
-                if pieces_jumped != 1:
-                    board[r - i][c - i]
-                    if board[r - i][c - i][0] in "rb":
-                        pieces_jumped += 1
-                else:
-                    if board[r - i][c - i][0] in piece:
-                        break
-                    elif board[r - i][c - i][0] == takeable:
-                        moves.append((piece, (r, c), (r - i, c + i)))
-                        break
-                    else:
-                        if board[r - i][c - i][0] in move_valid:
-                            moves.append((piece, (r, c), (r - i, c - i)))
-        # if in palace can move diagonally down to the left
-        if (
-            (r, c) in blue_palace
-            and (r + 2 <= 0 or r + 1 <= 0)
-            and (c - 2 >= 3 or c - 1 >= 3)
-            and (r, c) not in [(7, 4), (8, 3), (8, 5), (9, 4)]
-        ):
-            pieces_jumped = 0
-            for i in range(1, 3):
-                if board[r + i][c - i][1] == "F":
-                    break
-                if pieces_jumped != 1:
-                    board[r + i][c - i]
-                    if board[r + i][c - i][0] in "rb":
-                        pieces_jumped += 1
-                else:
-                    if board[r + i][c - i][0] in piece:
-                        break
-                    elif board[r + i][c - i][0] == takeable:
-                        moves.append((piece, (r, c), (r - i, c - i)))
-                        break
-                    else:
-                        if board[r + i][c - i][0] in move_valid:
-                            moves.append((piece, (r, c), (r + i, c - i)))
-        # if in palace can move diag down to right
-        if (
-            (r, c) in blue_palace
-            and (r + 2 <= 0 or r + 1 <= 0)
-            and (c + 2 <= 5 or c + 1 <= 5)
-            and (r, c) not in [(7, 4), (8, 3), (8, 5), (9, 4)]
-        ):
-            pieces_jumped = 0
-            for i in range(1, 3):
-                if board[r + i][c + i][1] == "F":
-                    break
-                if pieces_jumped != 1:
-                    board[r + i][c + i]
-                    if board[r + i][c + i][0] in "rb":
-                        pieces_jumped += 1
-                else:
-                    if board[r + i][c + i][0] in piece:
-                        break
-                    elif board[r + i][c + i][0] == takeable:
-                        moves.append((piece, (r, c), (r + i, c + i)))
-                        break
-                    else:
-                        if board[r + i][c + i][0] in move_valid:
-                            moves.append((piece, (r, c), (r + i, c + i)))
+        for to in PALACE_MOVES[sq]:
+            self.add_move(sq, to)
 
-    def get_soldier_moves(self, r, c):
+    def get_soldier_moves(self, sq):
         """
         Gets all the valid moves for the soldier piece
         """
-        piece = "bS" if self._game.get_turn() else "rS"
-        valid_move = ["r", "-"] if self._game.get_turn() else ["b", "-"]
-
-        if self._game.get_turn():  # if blue turn
-            red_palace = self.get_red_palace_moves()
-            # if on final row
-            if r == 0:
-                # check boundaries
-                if c - 1 >= 0:
-                    if self._game.get_board()[r][c - 1][0] in valid_move:
-                        self._moves.append((piece, (r, c), (r, c - 1)))
-                if c + 1 <= 8:
-                    if self._game.get_board()[r][c + 1][0] in valid_move:
-                        self._moves.append((piece, (r, c), (r, c + 1)))
-            # forward move
-            if r - 1 >= 0:
-                if self._game.get_board()[r - 1][c][0] in valid_move:
-                    self._moves.append((piece, (r, c), (r - 1, c)))
-            # left horizonal move
-            if c - 1 >= 0:
-                if self._game.get_board()[r][c - 1][0] in valid_move:
-                    self._moves.append((piece, (r, c), (r, c - 1)))
-            # right horizonal move
-            if c + 1 <= 8:
-                if self._game.get_board()[r][c + 1][0] in valid_move:
-                    self._moves.append((piece, (r, c), (r, c + 1)))
-            # if in palace can move diagonally forward to the right
-            if (
-                (r, c) in red_palace
-                and r - 1 >= 0
-                and c + 1 <= 5
-                and (r, c) not in [(3, 1), (4, 0), (5, 1), (4, 2)]
-            ):
-                if self._game.get_board()[r - 1][c + 1] in valid_move:
-                    self._moves.append((piece, (r, c), (r - 1, c + 1)))
-            # if in palace can move diagonally forward to the left
-            if (
-                (r, c) in red_palace
-                and r - 1 >= 0
-                and c - 1 >= 3
-                and (r, c) not in [(3, 1), (4, 0), (5, 1), (4, 2)]
-            ):
-                if self._game.get_board()[r - 1][c - 1] in valid_move:
-                    self._moves.append((piece, (r, c), (r - 1, c - 1)))
-
-        if not self._game.get_turn():
-            # if not self._g.get_turn(): # if red turn
-            blue_palace = self.get_blue_palace_moves()
-            # if on final row
-            if r == 9:
-                if c - 1 >= 0:
-                    if self._game.get_board()[r][c - 1][0] in valid_move:
-                        self._moves.append((piece, (r, c), (r, c - 1)))
-                if c + 1 <= 8:
-                    if self._game.get_board()[r][c + 1][0] in valid_move:
-                        self._moves.append((piece, (r, c), (r, c + 1)))
-            # forward move
-            if r + 1 >= 0:
-                if self._game.get_board()[r + 1][c][0] in valid_move:
-                    self._moves.append((piece, (r, c), (r + 1, c)))
-            # left horizonal move
-            if c - 1 >= 0:
-                if self._game.get_board()[r][c - 1][0] in valid_move:
-                    self._moves.append((piece, (r, c), (r, c - 1)))
-            # right horizonal move
-            if c + 1 <= 8:
-                if self._game.get_board()[r][c + 1][0] in valid_move:
-                    self._moves.append((piece, (r, c), (r, c + 1)))
-            # if in palace can move diagonally forward to the right
-            if (
-                (r, c) in blue_palace
-                and r + 1 <= 9
-                and c + 1 <= 5
-                and (r, c) not in [(7, 4), (8, 3), (8, 5), (9, 4)]
-            ):
-                if self._game.get_board()[r + 1][c + 1] in valid_move:
-                    self._moves.append((piece, (r, c), (r + 1, c + 1)))
-            # if in palace can move diagonally forward to the left
-            if (
-                (r, c) in blue_palace
-                and r + 1 <= 9
-                and c - 1 >= 3
-                and (r, c) not in [(7, 4), (8, 3), (8, 5), (9, 4)]
-            ):
-                if self._game.get_board()[r + 1][c - 1] in valid_move:
-                    self._moves.append((piece, (r, c), (r + 1, c - 1)))
-
-    def get_red_palace_moves(self):
-        """
-        Creates a list of all the moves in the red palace
-        """
-        red_palace_moves = [
-            (0, 3),
-            (0, 4),
-            (0, 5),
-            (1, 3),
-            (1, 4),
-            (1, 5),
-            (2, 3),
-            (2, 4),
-            (2, 5),
-        ]
-        return red_palace_moves
-
-    def get_blue_palace_moves(self):
-        """
-        Creates a list of all the moves in the blue palace
-        """
-        blue_palace_moves = [
-            (7, 3),
-            (7, 4),
-            (7, 5),
-            (8, 3),
-            (8, 4),
-            (8, 5),
-            (8, 3),
-            (8, 4),
-            (8, 5),
-        ]
-        return blue_palace_moves
+        board = self._game.get_squares()
+        for to in SOLDIER_MOVES[board[sq] & COLOR_MASK][sq]:
+            self.add_move(sq, to)
 
 
 if __name__ == "__main__":
@@ -1612,5 +1214,3 @@ if __name__ == "__main__":
     g.make_move('e4', 'e5') # valid move by Red
     g.make_move('a5', 'a4') # capturing move by Blue
     g.make_move('c4', 'c5') # valid move by Red
-
-    g.print_board()
\ No newline at end of file
@@ -0,0 +1,405 @@
+"""
+Monte Carlo tree search player for JanggiGame.
+
+The tree lives in flat arrays indexed by node number, the children of a
+node being one block of consecutive nodes. Each search step walks down the
+tree by UCT, or PUCT when a prior function gives the move probabilities,
+adds the children of the leaf it reaches and scores the leaf with a
+rollout function. Values are between -1 and 1, for the side to move.
+
+Searching the game again after moves were made on it keeps the part of the
+tree below the new position. Several threads can search one tree, a virtual
+loss on the nodes a thread is visiting steers the others elsewhere.
+"""
+
+import copy
+import math
+import random
+import threading
+import time
+from array import array
+from collections import deque
+
+from JanggiGame import EMPTY, SQUARES, TYPE_MASK, PIECE_VALUES
+
+DEFAULT_NODES = 200000
+DEFAULT_ITERATIONS = 1000
+
+# exploration constants of UCT, and of PUCT when there is a prior
+UCT_EXPLORATION = 1.4
+PUCT_EXPLORATION = 1.5
+
+# random plies played by random_rollout, and the score that is worth a
+# value of one half when a rollout ends without mate
+ROLLOUT_PLIES = 16
+SCORE_SCALE = 1000
+
+# first_child of a node whose children have not been added yet, and of a
+# node whose side to move is mated
+UNEXPANDED = -1
+MATED = -2
+
+
+def squash(game):
+    """
+    Turns the static score of game into a value between -1 and 1 for the
+    side to move
+    """
+    score = game.get_score() if game.get_turn() else -game.get_score()
+    return score / (abs(score) + SCORE_SCALE)
+
+
+def random_rollout(game, rng):
+    """
+    Plays up to ROLLOUT_PLIES random legal moves, passing when there are
+    none and the side is not in check, then takes them back. Returns 1 or
+    -1 if a side got mated, else the squashed score, for the side to move
+    """
+    value = None
+    sign = 1
+    plies = 0
+    for i in range(ROLLOUT_PLIES):
+        moves = game.legal_moves()
+        if not moves:
+            if game.is_in_check("blue" if game.get_turn() else "red"):
+                value = -sign
+                break
+            move = game.pass_move()
+        else:
+            move = rng.choice(moves)
+        game.push(move)
+        plies += 1
+        sign = -sign
+
+    if value is None:
+        value = sign * squash(game)
+    for i in range(plies):
+        game.pop()
+    return value
+
+
+def evaluation_rollout(game, rng):
+    """
+    Scores the position without playing it out, from the static score
+    """
+    return squash(game)
+
+
+def capture_prior(game, moves):
+    """
+    Prior that favours captures, by the value of the piece taken
+    """
+    board = game.get_squares()
+    weights = [
+        1 + PIECE_VALUES.get(board[to] & TYPE_MASK, 0) / 100 if board[to] != EMPTY and move_from != to else 1
+        for move_from, to in moves
+    ]
+    total = sum(weights)
+    return [weight / total for weight in weights]
+
+
+class MCTS:
+    """
+    Monte Carlo tree search of the position of a JanggiGame
+
+    Threads share one lock around selection, expansion and backup, and
+    rollouts hold the GIL, so several threads give little real speedup
+    over one; they mainly spread the search out through virtual losses
+    """
+
+    def __init__(self, game, rollout=random_rollout, prior=None, max_nodes=DEFAULT_NODES, exploration=None, seed=None):
+        """
+        Initializes the search of game. rollout(game, rng) scores a leaf for
+        its side to move, prior(game, moves) gives the probabilities of the
+        legal moves and switches selection from UCT to PUCT. The tree holds
+        at most max_nodes nodes, leaves are no longer expanded once it is full
+        """
+        self._game = game
+        self._rollout = rollout
+        self._prior = prior
+        if exploration is None:
+            exploration = UCT_EXPLORATION if prior is None else PUCT_EXPLORATION
+        self._exploration = exploration
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._capacity = max_nodes
+
+        # one entry per node: first child and number of children,
+        # move from the parent as from * SQUARES + to, prior, visits, summed value
+        # for the side that made the move, virtual losses of the threads
+        # visiting it, and position hash once visited
+        self._first_child = array("l", [0]) * max_nodes
+        self._child_count = array("l", [0]) * max_nodes
+        self._move = array("l", [0]) * max_nodes
+        self._prior_of = array("d", [0.0]) * max_nodes
+        self._visits = array("l", [0]) * max_nodes
+        self._value = array("d", [0.0]) * max_nodes
+        self._virtual = array("l", [0]) * max_nodes
+        self._hash = array("Q", [0]) * max_nodes
+        self._size = 0
+        self.iterations = 0
+        self.reset()
+
+    def reset(self):
+        """
+        Throws the tree away, leaving a root for the current position
+        """
+        self._size = 0
+        self._allocate(1)
+        self._hash[0] = self._game.get_hash()
+
+    def size(self):
+        """
+        Returns the number of nodes in the tree
+        """
+        return self._size
+
+    def root_visits(self):
+        """
+        Returns the number of times the root was visited
+        """
+        return self._visits[0]
+
+    def _allocate(self, count):
+        """
+        Returns the first of count new nodes, or -1 if the tree is full
+        """
+        first = self._size
+        if first + count > self._capacity:
+            return -1
+        for node in range(first, first + count):
+            self._first_child[node] = UNEXPANDED
+            self._child_count[node] = 0
+            self._visits[node] = 0
+            self._value[node] = 0.0
+            self._virtual[node] = 0
+            self._hash[node] = 0
+        self._size += count
+        return first
+
+    def children(self, node=0):
+        """
+        Returns the ((from square, to square), visits, mean value) of the
+        children of node, the value for the side that moves to them
+        """
+        if self._first_child[node] < 0:
+            return []
+        result = []
+        for child in range(self._first_child[node], self._first_child[node] + self._child_count[node]):
+            visits = self._visits[child]
+            result.append((divmod(self._move[child], SQUARES), visits, self._value[child] / visits if visits else 0.0))
+        return result
+
+    def find(self, key):
+        """
+        Returns the node of the root, its children or grandchildren whose
+        position has hash key, or -1
+        """
+        nodes = [0]
+        for depth in range(3):
+            next_nodes = []
+            for node in nodes:
+                if self._hash[node] == key:
+                    return node
+                if self._first_child[node] >= 0:
+                    next_nodes.extend(range(self._first_child[node], self._first_child[node] + self._child_count[node]))
+            nodes = next_nodes
+        return -1
+
+    def reroot(self, node):
+        """
+        Makes node the root, copying its subtree to the front of the arrays
+        so that the rest of the tree is freed
+        """
+        fields = (self._first_child, self._child_count, self._move, self._prior_of, self._visits, self._value, self._hash)
+        old = [array(field.typecode, field[:self._size]) for field in fields]
+        old_first_child, old_child_count = old[0], old[1]
+
+        self._size = 0
+        self._allocate(1)
+        for field, values in zip(fields, old):
+            field[0] = values[node]
+
+        # breadth first, so that every block of children stays together
+        queue = deque([(node, 0)])
+        while queue:
+            old_node, new_node = queue.popleft()
+            first = old_first_child[old_node]
+            if first < 0:
+                continue
+            count = old_child_count[old_node]
+            block = self._allocate(count)
+            self._first_child[new_node] = block
+            for i in range(count):
+                for field, values in zip(fields, old):
+                    field[block + i] = values[first + i]
+                queue.append((first + i, block + i))
+
+    def run(self, iterations=None, time_limit=None, threads=1):
+        """
+        Searches for iterations steps or time_limit seconds, with neither
+        DEFAULT_ITERATIONS steps, and returns (best move, value) for the side
+        to move, the most visited move and its mean value. The tree of an
+        earlier search is kept if the game is now at a position in it
+        """
+        if iterations is None and time_limit is None:
+            iterations = DEFAULT_ITERATIONS
+
+        node = self.find(self._game.get_hash())
+        if node < 0:
+            self.reset()
+        elif node > 0:
+            self.reroot(node)
+
+        self._iterations_left = iterations
+        self._deadline = time.perf_counter() + time_limit if time_limit is not None else None
+        self.iterations = 0
+
+        if threads <= 1:
+            self._work(self._game, self._rng)
+        else:
+            workers = [
+                threading.Thread(target=self._work, args=(copy.deepcopy(self._game), random.Random(self._rng.random())))
+                for i in range(threads)
+            ]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+
+        return self.best_move()
+
+    def best_move(self):
+        """
+        Returns the most visited move of the root and its mean value, or
+        (None, value of the root) if it has no children
+        """
+        best = None
+        for move, visits, value in self.children():
+            if best is None or visits > best[1]:
+                best = (move, visits, value)
+        if best is None:
+            visits = self._visits[0]
+            return None, -self._value[0] / visits if visits else 0.0
+        return best[0], best[2]
+
+    def _work(self, game, rng):
+        """
+        Runs search steps on game, a copy of the root position for this
+        thread, until the iterations or time run out
+        """
+        while True:
+            with self._lock:
+                if self._iterations_left is not None:
+                    if self._iterations_left <= 0:
+                        return
+                    self._iterations_left -= 1
+                if self._deadline is not None and time.perf_counter() >= self._deadline and self.iterations > 0:
+                    return
+                self.iterations += 1
+                path = self._select(game)
+                leaf = path[-1]
+                if self._first_child[leaf] == UNEXPANDED:
+                    self._expand(leaf, game)
+                mated = self._first_child[leaf] == MATED
+
+            value = -1.0 if mated else self._rollout(game, rng)
+
+            with self._lock:
+                self._backup(path, value)
+            for i in range(len(path) - 1):
+                game.pop()
+
+    def _select(self, game):
+        """
+        Walks from the root to a leaf, making the moves on game and adding a
+        virtual loss to every node on the way, and returns the path
+        """
+        node = 0
+        path = [0]
+        self._virtual[0] += 1
+        while self._first_child[node] >= 0:
+            node = self._best_child(node)
+            move_from, move_to = divmod(self._move[node], SQUARES)
+            game.push((move_from, move_to))
+            if self._hash[node] == 0:
+                self._hash[node] = game.get_hash()
+            self._virtual[node] += 1
+            path.append(node)
+        return path
+
+    def _best_child(self, node):
+        """
+        Returns the child of node with the highest UCT or PUCT score, virtual
+        losses counting as visits lost
+        """
+        first = self._first_child[node]
+        parent_visits = self._visits[node] + self._virtual[node]
+        exploration = self._exploration
+        puct = self._prior is not None
+        if puct:
+            scale = exploration * math.sqrt(parent_visits)
+        else:
+            scale = exploration * math.sqrt(math.log(max(parent_visits, 1)))
+
+        best = first
+        best_score = -math.inf
+        for child in range(first, first + self._child_count[node]):
+            visits = self._visits[child] + self._virtual[child]
+            if visits:
+                mean = (self._value[child] - self._virtual[child]) / visits
+            elif not puct:
+                # every move is tried once before any is tried twice
+                return child
+            else:
+                mean = 0.0
+            if puct:
+                score = mean + scale * self._prior_of[child] / (1 + visits)
+            else:
+                score = mean + scale / math.sqrt(visits)
+            if score > best_score:
+                best = child
+                best_score = score
+        return best
+
+    def _expand(self, node, game):
+        """
+        Adds the children of node, whose position is on game. A side with no
+        legal move is mated if in check, and can only pass otherwise
+        """
+        moves = game.legal_moves()
+        if not moves:
+            if game.is_in_check("blue" if game.get_turn() else "red"):
+                self._first_child[node] = MATED
+                return
+            moves = [game.pass_move()]
+
+        first = self._allocate(len(moves))
+        if first < 0:
+            return
+        priors = self._prior(game, moves) if self._prior is not None else [1.0 / len(moves)] * len(moves)
+        for i, (move_from, move_to) in enumerate(moves):
+            self._move[first + i] = move_from * SQUARES + move_to
+            self._prior_of[first + i] = priors[i]
+        self._first_child[node] = first
+        self._child_count[node] = len(moves)
+
+    def _backup(self, path, value):
+        """
+        Adds the value of the leaf, for its side to move, to every node on
+        the path for the side that moved into it, and takes the virtual
+        losses back
+        """
+        for node in reversed(path):
+            value = -value
+            self._value[node] += value
+            self._visits[node] += 1
+            self._virtual[node] -= 1
+
+
+def search(game, iterations=None, time_limit=None, threads=1, rollout=random_rollout, prior=None, seed=None):
+    """
+    Searches the position of game with a new tree and returns (best move,
+    value), like JanggiEngine.search but with the value between -1 and 1
+    """
+    return MCTS(game, rollout, prior, seed=seed).run(iterations, time_limit, threads)
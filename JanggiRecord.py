@@ -0,0 +1,223 @@
+"""
+Binary game records for JanggiGame.
+
+A record file starts with the 8 byte magic JGREC1 and then holds games one
+after another, each made of:
+
+    tags length     unsigned 16 bit, bytes of tag text
+    move count      unsigned 16 bit
+    result          unsigned 8 bit, index into RESULTS
+    tags            UTF-8 text, one key=value per line
+    moves           two bytes per move, from square and to square, both
+                    PASS for a pass
+
+Games are read and written one at a time, so archives of any size can be
+streamed without holding more than one game in memory.
+
+Convert a text file with one game per line, moves written as c10-d8 and
+separated by spaces, with:
+    python JanggiRecord.py games.txt games.jgr
+"""
+
+import struct
+import sys
+
+from JanggiGame import JanggiGame, Move
+
+MAGIC = b"JGREC1\0\0"
+GAME_HEADER = struct.Struct("<HHB")
+
+# stands for both squares of a pass, which is replayed as a move of the
+# general of the side to move onto itself
+PASS = 255
+
+RESULTS = ("UNFINISHED", "BLUE_WON", "RED_WON")
+RESULT_CODES = {result: code for code, result in enumerate(RESULTS)}
+
+MAX_MOVES = 0xFFFF
+MAX_TAGS_LENGTH = 0xFFFF
+
+
+def encode_moves(moves):
+    """
+    Returns the bytes of a list of (from square, to square) moves, a move
+    from a square to itself or None being a pass
+    """
+    data = bytearray(2 * len(moves))
+    for i, move in enumerate(moves):
+        if move is None or move[0] == move[1]:
+            data[2 * i] = data[2 * i + 1] = PASS
+        else:
+            data[2 * i], data[2 * i + 1] = move
+    return data
+
+
+def decode_moves(data):
+    """
+    Returns the moves of encoded bytes as (from square, to square), None
+    for a pass
+    """
+    moves = list(zip(data[0::2], data[1::2]))
+    for i, move in enumerate(moves):
+        if move[0] == PASS:
+            moves[i] = None
+    return moves
+
+
+def encode_tags(tags):
+    """
+    Returns the bytes of a dict of tags
+    """
+    lines = []
+    for key, value in tags.items():
+        key, value = str(key), str(value)
+        if not key or "=" in key or "\n" in key or "\n" in value:
+            raise ValueError("tag cannot be stored: %r" % key)
+        lines.append(key + "=" + value)
+    return "\n".join(lines).encode("utf-8")
+
+
+def decode_tags(data):
+    """
+    Returns the dict of tags of encoded bytes
+    """
+    if not data:
+        return {}
+    return dict(line.split("=", 1) for line in data.decode("utf-8").split("\n"))
+
+
+class RecordWriter:
+    """
+    Writes games to a record file one at a time
+    """
+
+    def __init__(self, path):
+        """
+        Creates the record file at path, replacing any file there
+        """
+        self._file = open(path, "wb")
+        self._file.write(MAGIC)
+        self.count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, moves, result="UNFINISHED", tags=None):
+        """
+        Writes one game, its moves as (from square, to square), its result
+        as a game state and a dict of tags
+        """
+        if len(moves) > MAX_MOVES:
+            raise ValueError("a game can have at most %d moves" % MAX_MOVES)
+        tag_data = encode_tags(tags or {})
+        if len(tag_data) > MAX_TAGS_LENGTH:
+            raise ValueError("tags take more than %d bytes" % MAX_TAGS_LENGTH)
+        self._file.write(GAME_HEADER.pack(len(tag_data), len(moves), RESULT_CODES[result]))
+        self._file.write(tag_data)
+        self._file.write(encode_moves(moves))
+        self.count += 1
+
+    def write_game(self, game, tags=None):
+        """
+        Writes the moves and state of a game played from the start position
+        """
+        self.write(game.get_moves(), game.get_game_state(), tags)
+
+    def close(self):
+        """
+        Closes the record file
+        """
+        self._file.close()
+
+
+def write_records(path, records):
+    """
+    Writes an iterable of (moves, result, tags) games to a record file at
+    path, consuming it one game at a time. Returns the number of games
+    """
+    with RecordWriter(path) as writer:
+        for moves, result, tags in records:
+            writer.write(moves, result, tags)
+        return writer.count
+
+
+def read_records(path):
+    """
+    Yields the games of a record file as (moves, result, tags), moves as
+    (from square, to square) with None for a pass
+    """
+    with open(path, "rb") as record_file:
+        if record_file.read(len(MAGIC)) != MAGIC:
+            raise ValueError("not a record file: %s" % path)
+        while True:
+            header = record_file.read(GAME_HEADER.size)
+            if not header:
+                return
+            if len(header) < GAME_HEADER.size:
+                raise ValueError("truncated record file: %s" % path)
+            tags_length, move_count, result = GAME_HEADER.unpack(header)
+            tag_data = record_file.read(tags_length)
+            move_data = record_file.read(2 * move_count)
+            if len(tag_data) < tags_length or len(move_data) < 2 * move_count or result >= len(RESULTS):
+                raise ValueError("truncated record file: %s" % path)
+            yield decode_moves(move_data), RESULTS[result], decode_tags(tag_data)
+
+
+def replay_moves(moves, game):
+    """
+    Pushes the moves of a record onto game without validating them,
+    yielding each one just before it is pushed, a pass as the move of the
+    general onto itself
+    """
+    for move in moves:
+        if move is None:
+            move = game.pass_move()
+        yield move
+        game.push(move)
+
+
+def replay(moves, game=None):
+    """
+    Pushes the moves of a record onto game, a new game if None, without
+    validating them, and returns the game
+    """
+    if game is None:
+        game = JanggiGame()
+    for move in replay_moves(moves, game):
+        pass
+    return game
+
+
+def convert_text_games(text_path, path):
+    """
+    Converts a text file of games, one per line as space separated c10-d8
+    moves, to a record file, replaying every game with make_move and
+    stopping a game at its first illegal or unreadable move. Returns the
+    number of games
+    """
+    def records():
+        with open(text_path) as games_file:
+            for line in games_file:
+                if not line.split():
+                    continue
+                game = JanggiGame()
+                for token in line.split():
+                    try:
+                        move = Move.parse(token)
+                    except ValueError:
+                        break
+                    if not game.make_move(move):
+                        break
+                yield game.get_moves(), game.get_game_state(), None
+
+    return write_records(path, records())
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("usage: python JanggiRecord.py games.txt games.jgr")
+        sys.exit(2)
+    print("wrote %d games to %s" % (convert_text_games(sys.argv[1], sys.argv[2]), sys.argv[2]))
@@ -0,0 +1,330 @@
+"""
+Asyncio server hosting many JanggiGame sessions over a line protocol.
+
+Clients send one command per line and get one reply line, "OK ..." or
+"ERR reason":
+
+    NEW                     OK <game id>
+    MOVE <id> <from> <to>   OK <game state>, moves as in make_move, c10 d8
+    ENGINE <id> [depth]     OK <from> <to> <game state>, the engine moves
+    STATE <id>              OK <game state> <blue|red to move> <moves made>
+    SUB <id>                OK, then the moves of the game as events
+    UNSUB <id>              OK
+    QUIT                    closes the connection
+
+Bytes outside ASCII come back as ? in replies that repeat them, and a line
+longer than the stream limit gets "ERR line too long" and the connection
+is closed.
+
+Subscribers get "EVENT <id> <from> <to> <game state>" lines for every move
+made in the game, by any client. Engine searches run in an executor, a
+process pool unless another executor is given, so they never hold up the
+other games.
+
+A finished game is dropped FINISHED_TIMEOUT seconds after its last
+command, any other game after IDLE_TIMEOUT seconds without one. A
+subscriber that falls more than MAX_SUBSCRIBER_BUFFER bytes behind on its
+events is unsubscribed rather than left to buffer without bound.
+
+Run with:
+    python JanggiServer.py [port]
+"""
+
+import asyncio
+import copy
+import gc
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from JanggiGame import JanggiGame, SQUARE_NAMES, SQUARE_INDEX
+from JanggiEngine import search
+
+DEFAULT_PORT = 8765
+DEFAULT_ENGINE_DEPTH = 3
+MAX_ENGINE_DEPTH = 8
+
+# seconds a game is kept after its last command, once over or while unfinished
+FINISHED_TIMEOUT = 60
+IDLE_TIMEOUT = 3600
+SWEEP_INTERVAL = 30
+
+# bytes of events a subscriber may have waiting to be sent
+MAX_SUBSCRIBER_BUFFER = 64 * 1024
+
+# fewer young collections, each promoting more, keep the collector's passes
+# over the hosted boards rare
+GC_THRESHOLDS = (20000, 20, 20)
+
+
+def engine_move(game, depth):
+    """
+    Returns the move the engine plays in game, as board notation, or None
+    """
+    move, score = search(game, depth=depth)
+    if move is None:
+        return None
+    return SQUARE_NAMES[move[0]], SQUARE_NAMES[move[1]]
+
+
+def tune_gc():
+    """
+    Sets the collector up for a long running server, once at startup: the
+    objects made while starting are frozen out of its passes and its
+    thresholds raised
+    """
+    gc.freeze()
+    gc.set_threshold(*GC_THRESHOLDS)
+
+
+class Session:
+    """
+    One hosted game, its subscribers and the lock that keeps its moves in order
+    """
+
+    def __init__(self, game_id):
+        """
+        Initializes a new game
+        """
+        self.game_id = game_id
+        self.game = JanggiGame()
+        self.moves = 0
+        self.lock = asyncio.Lock()
+        self.subscribers = set()
+        self.last_active = time.monotonic()
+
+
+class JanggiServer:
+    """
+    Routes the commands of every connection to the sessions they name
+    """
+
+    def __init__(self, executor=None, engine_depth=DEFAULT_ENGINE_DEPTH):
+        """
+        Initializes a server with no games. Engine searches run in executor,
+        a process pool made on the first search if none is given
+        """
+        self._sessions = {}
+        self._next_id = 1
+        self._executor = executor
+        self._own_executor = executor is None
+        self._engine_depth = engine_depth
+        self._server = None
+        self._sweeper = None
+
+    async def start(self, host="127.0.0.1", port=DEFAULT_PORT):
+        """
+        Starts listening and returns the asyncio server, port 0 picks a free port
+        """
+        self._server = await asyncio.start_server(self.handle_client, host, port)
+        self._sweeper = asyncio.ensure_future(self.sweep())
+        return self._server
+
+    async def close(self):
+        """
+        Stops listening and shuts down the executor if the server made it
+        """
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._own_executor and self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def port(self):
+        """
+        Returns the port the server listens on
+        """
+        return self._server.sockets[0].getsockname()[1]
+
+    def game_count(self):
+        """
+        Returns the number of hosted games
+        """
+        return len(self._sessions)
+
+    def prune(self, now=None):
+        """
+        Drops the games finished FINISHED_TIMEOUT seconds or idle
+        IDLE_TIMEOUT seconds before now, skipping those the engine is
+        searching, and returns how many were dropped
+        """
+        if now is None:
+            now = time.monotonic()
+        stale = []
+        for game_id, session in self._sessions.items():
+            if session.lock.locked():
+                continue
+            idle = now - session.last_active
+            if idle > IDLE_TIMEOUT or (idle > FINISHED_TIMEOUT and session.game.get_game_state() != "UNFINISHED"):
+                stale.append(game_id)
+        for game_id in stale:
+            del self._sessions[game_id]
+        return len(stale)
+
+    async def sweep(self):
+        """
+        Prunes the games every SWEEP_INTERVAL seconds until cancelled
+        """
+        while True:
+            await asyncio.sleep(SWEEP_INTERVAL)
+            self.prune()
+
+    async def handle_client(self, reader, writer):
+        """
+        Answers the commands of one connection until it quits or closes
+        """
+        subscribed = set()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # longer than the reader's limit, the rest of the line
+                    # can't be told from the next command
+                    writer.write(b"ERR line too long\n")
+                    await writer.drain()
+                    break
+                if not line:
+                    break
+                words = line.decode("ascii", "replace").split()
+                if not words:
+                    continue
+                if words[0].upper() == "QUIT":
+                    break
+                reply = await self.dispatch(words, writer, subscribed)
+                writer.write((reply + "\n").encode("ascii", "replace"))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            for game_id in subscribed:
+                if game_id in self._sessions:
+                    self._sessions[game_id].subscribers.discard(writer)
+            writer.close()
+
+    async def dispatch(self, words, writer, subscribed):
+        """
+        Runs one command and returns its reply line
+        """
+        command = words[0].upper()
+        if command == "NEW":
+            return "OK %s" % self.new_game()
+
+        if len(words) < 2:
+            return "ERR missing game id"
+        session = self._sessions.get(words[1])
+        if command in ("MOVE", "ENGINE", "STATE", "SUB", "UNSUB") and session is None:
+            return "ERR unknown game %s" % words[1]
+        if session is not None:
+            session.last_active = time.monotonic()
+
+        if command == "MOVE":
+            if len(words) != 4:
+                return "ERR usage: MOVE <id> <from> <to>"
+            return await self.move(session, words[2], words[3])
+
+        if command == "ENGINE":
+            depth = self._engine_depth
+            if len(words) > 2:
+                if not words[2].isdigit() or not 1 <= int(words[2]) <= MAX_ENGINE_DEPTH:
+                    return "ERR depth should be 1 to %d" % MAX_ENGINE_DEPTH
+                depth = int(words[2])
+            return await self.engine(session, depth)
+
+        if command == "STATE":
+            game = session.game
+            return "OK %s %s %d" % (game.get_game_state(), "blue" if game.get_turn() else "red", session.moves)
+
+        if command == "SUB":
+            session.subscribers.add(writer)
+            subscribed.add(session.game_id)
+            return "OK"
+
+        if command == "UNSUB":
+            session.subscribers.discard(writer)
+            subscribed.discard(session.game_id)
+            return "OK"
+
+        return "ERR unknown command %s" % words[0]
+
+    def new_game(self):
+        """
+        Starts a game and returns its id
+        """
+        game_id = str(self._next_id)
+        self._next_id += 1
+        self._sessions[game_id] = Session(game_id)
+        return game_id
+
+    async def move(self, session, start, end):
+        """
+        Makes a move in a session, telling its subscribers
+        """
+        async with session.lock:
+            if start not in SQUARE_INDEX or end not in SQUARE_INDEX:
+                return "ERR bad square"
+            if not session.game.make_move(start, end):
+                return "ERR illegal move"
+            self.moved(session, start, end)
+            return "OK %s" % session.game.get_game_state()
+
+    async def engine(self, session, depth):
+        """
+        Lets the engine move in a session, searching a copy of the game in
+        the executor so the event loop keeps serving the other games
+        """
+        async with session.lock:
+            if session.game.get_game_state() != "UNFINISHED":
+                return "ERR game over"
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor()
+            loop = asyncio.get_running_loop()
+            move = await loop.run_in_executor(self._executor, engine_move, copy.deepcopy(session.game), depth)
+            if move is None or not session.game.make_move(*move):
+                return "ERR no move"
+            self.moved(session, *move)
+            return "OK %s %s %s" % (move[0], move[1], session.game.get_game_state())
+
+    def moved(self, session, start, end):
+        """
+        Counts a move made in a session and sends it to the subscribers once
+        the reply to the move has been written
+        """
+        session.moves += 1
+        event = ("EVENT %s %s %s %s\n" % (session.game_id, start, end, session.game.get_game_state())).encode("ascii")
+        asyncio.get_running_loop().call_soon(self.broadcast, session, event)
+
+    @staticmethod
+    def broadcast(session, event):
+        """
+        Writes an event line to the subscribers of a session, dropping those
+        that closed or have more than MAX_SUBSCRIBER_BUFFER bytes unsent
+        """
+        for subscriber in list(session.subscribers):
+            if subscriber.is_closing() or subscriber.transport.get_write_buffer_size() > MAX_SUBSCRIBER_BUFFER:
+                session.subscribers.discard(subscriber)
+            else:
+                subscriber.write(event)
+
+
+async def serve(port):
+    """
+    Runs a server on port until interrupted
+    """
+    server = JanggiServer()
+    listener = await server.start(port=port)
+    tune_gc()
+    print("serving Janggi games on port %d" % server.port())
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        await server.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(serve(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PORT))
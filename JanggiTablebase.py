@@ -0,0 +1,390 @@
+"""
+Endgame tablebases for JanggiGame, built by retrograde analysis.
+
+A tablebase covers every placement of a small set of pieces, named by the
+piece letters of blue then red, general first: "KCvK" is blue general and
+chariot against the red general. Generals and guards are only placed inside
+their own palace. Each position is stored in one byte:
+
+    0           draw, the side to move cannot be mated and cannot mate
+    255         not a position, two pieces on one square or the side to
+                move could take the enemy general
+    otherwise   b - 1 is the distance to mate in plies, odd when the side
+                to move wins and even when it gets mated
+
+A side that is not in check may pass, so a win has to force mate against
+every defence including passing.
+
+Build the tables into a directory with:
+    python JanggiTablebase.py directory KCvK KCvKG ...
+"""
+
+import os
+import sys
+from array import array
+from itertools import product
+
+from JanggiGame import (
+    JanggiGame, EMPTY, SQUARES, BLUE, RED, GENERAL, GUARD, TYPE_MASK, COLOR_MASK,
+    PIECE_CODES, PIECE_NAMES, RED_PALACE, BLUE_PALACE, to_square,
+)
+
+MAGIC = b"JGTB1\0\0\0"
+TABLE_SUFFIX = ".jtb"
+
+DRAW = 0
+INVALID = 255
+MAX_DTM = 253
+
+BLUE_PALACE_SQUARES = tuple(sorted(to_square(r, c) for r, c in BLUE_PALACE))
+RED_PALACE_SQUARES = tuple(sorted(to_square(r, c) for r, c in RED_PALACE))
+
+
+def parse_material(name):
+    """
+    Returns the piece codes of a material name like "KCvKG", in table order:
+    blue general, the other blue pieces, red general, the other red pieces
+    """
+    sides = name.split("v")
+    if len(sides) != 2:
+        raise ValueError("material should look like KCvKG: %s" % name)
+
+    codes = []
+    for color_name, letters in zip(("b", "r"), sides):
+        side = []
+        for letter in letters:
+            if color_name + letter not in PIECE_CODES:
+                raise ValueError("unknown piece %s in %s" % (letter, name))
+            side.append(PIECE_CODES[color_name + letter])
+        if [code & TYPE_MASK for code in side].count(GENERAL) != 1:
+            raise ValueError("each side needs exactly one general: %s" % name)
+        codes.extend(sort_side(side))
+    return tuple(codes)
+
+
+def sort_side(codes):
+    """
+    Orders the codes of one side general first, then by piece type
+    """
+    return sorted(codes, key=lambda code: (code & TYPE_MASK != GENERAL, code & TYPE_MASK))
+
+
+def material_name(codes):
+    """
+    Returns the name of a list of piece codes, the inverse of parse_material
+    """
+    sides = []
+    for color in (BLUE, RED):
+        sides.append("".join(PIECE_NAMES[code][1] for code in sort_side([i for i in codes if i & COLOR_MASK == color])))
+    return "v".join(sides)
+
+
+def game_material(game):
+    """
+    Returns the material name of the pieces on the board of game
+    """
+    codes = []
+    for color in (BLUE, RED):
+        for piece_type, squares in enumerate(game.get_pieces(color)):
+            codes.extend([color | piece_type] * len(squares))
+    return material_name(codes)
+
+
+def piece_count(game):
+    """
+    Returns the number of pieces on the board of game
+    """
+    return sum(len(squares) for color in (BLUE, RED) for squares in game.get_pieces(color))
+
+
+class Tablebase:
+    """
+    Results of every position of one material set, indexed in mixed radix
+    by the square of each piece and then by the side to move
+    """
+
+    def __init__(self, material, data=None):
+        """
+        Initializes an empty table for material, a name or a list of piece
+        codes, or one holding data
+        """
+        self.material = parse_material(material) if isinstance(material, str) else tuple(material)
+        self.name = material_name(self.material)
+
+        self.domains = []
+        for code in self.material:
+            if code & TYPE_MASK in (GENERAL, GUARD):
+                self.domains.append(BLUE_PALACE_SQUARES if code & BLUE else RED_PALACE_SQUARES)
+            else:
+                self.domains.append(tuple(range(SQUARES)))
+
+        # position of each square within the domain of each piece
+        self.positions = []
+        for domain in self.domains:
+            position = [-1] * SQUARES
+            for i, sq in enumerate(domain):
+                position[sq] = i
+            self.positions.append(position)
+
+        # the last piece varies fastest, as in itertools.product
+        self.weights = [1] * len(self.domains)
+        for k in range(len(self.domains) - 2, -1, -1):
+            self.weights[k] = self.weights[k + 1] * len(self.domains[k + 1])
+        self.size = self.weights[0] * len(self.domains[0])
+
+        self.data = bytearray(2 * self.size) if data is None else data
+        if len(self.data) != 2 * self.size:
+            raise ValueError("%s table should have %d entries" % (self.name, 2 * self.size))
+
+    def index(self, squares, blue_turn):
+        """
+        Returns the index of the position with the pieces on squares, in
+        table order, and blue or red to move
+        """
+        i = 0 if blue_turn else self.size
+        for position, weight, sq in zip(self.positions, self.weights, squares):
+            i += position[sq] * weight
+        return i
+
+    def squares_of(self, game):
+        """
+        Returns the squares of the pieces of game in table order
+        """
+        squares = []
+        for code in self.material:
+            if not squares or squares[-1][0] != code:
+                squares.append((code, sorted(game.get_pieces(code & COLOR_MASK)[code & TYPE_MASK])))
+        return [sq for code, group in squares for sq in group]
+
+    def probe(self, game):
+        """
+        Returns (result, distance to mate in plies) for the side to move in
+        game, result 1 for a win, 0 for a draw and -1 for a loss. Returns
+        None if the game does not have the material of this table
+        """
+        if game_material(game) != self.name:
+            return None
+        value = self.data[self.index(self.squares_of(game), game.get_turn())]
+        return decode(value)
+
+    def save(self, path):
+        """
+        Writes the table to path
+        """
+        with open(path, "wb") as table_file:
+            table_file.write(MAGIC)
+            table_file.write(self.name.encode("ascii").ljust(16, b"\0"))
+            table_file.write(self.data)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads a table written by save
+        """
+        with open(path, "rb") as table_file:
+            header = table_file.read(len(MAGIC) + 16)
+            if header[:len(MAGIC)] != MAGIC:
+                raise ValueError("not a tablebase: %s" % path)
+            name = header[len(MAGIC):].rstrip(b"\0").decode("ascii")
+            return cls(name, bytearray(table_file.read()))
+
+
+def decode(value):
+    """
+    Turns a table byte into (result, distance to mate) for the side to move
+    """
+    if value == DRAW or value == INVALID:
+        return 0, 0
+    dtm = value - 1
+    return (1 if dtm % 2 else -1), dtm
+
+
+class Tablebases:
+    """
+    The tablebase files of a directory, loaded when first probed
+    """
+
+    def __init__(self, directory=None):
+        """
+        Initializes the tables found in directory, if any
+        """
+        self._directory = directory
+        self._tables = {}
+        self._names = set()
+        if directory is not None:
+            for filename in os.listdir(directory):
+                if filename.endswith(TABLE_SUFFIX):
+                    self._names.add(filename[:-len(TABLE_SUFFIX)])
+        self.max_pieces = max([len(parse_material(name)) for name in self._names], default=0)
+
+    def add(self, table):
+        """
+        Adds a table held in memory
+        """
+        self._tables[table.name] = table
+        self._names.add(table.name)
+        self.max_pieces = max(self.max_pieces, len(table.material))
+
+    def probe(self, game):
+        """
+        Returns (result, distance to mate) for the side to move in game as
+        Tablebase.probe does, or None when no table has its material
+        """
+        if piece_count(game) > self.max_pieces:
+            return None
+        name = game_material(game)
+        if name not in self._names:
+            return None
+        if name not in self._tables:
+            self._tables[name] = Tablebase.load(os.path.join(self._directory, name + TABLE_SUFFIX))
+        return self._tables[name].probe(game)
+
+
+def generate(material, tables=None):
+    """
+    Builds the table of material, and first the tables of every material a
+    capture can lead to, which are kept in the tables dict by name
+    """
+    table = Tablebase(material)
+    if tables is None:
+        tables = {}
+    if table.name in tables:
+        return tables[table.name]
+
+    codes = table.material
+    subtables = {}
+    for k, code in enumerate(codes):
+        if code & TYPE_MASK != GENERAL:
+            subtables[k] = generate(codes[:k] + codes[k + 1:], tables)
+
+    size = table.size
+    total = 2 * size
+    data = table.data
+    weights = table.weights
+    positions = table.positions
+
+    # moves staying in the table, stored as the successor indexes of each
+    # position from first[i] to first[i] + count[i]
+    successors = array("I")
+    first = array("I", [0]) * total
+    count = array("H", [0]) * total
+
+    # a position whose every successor wins for the opponent is lost, in the
+    # longest of their distances plus one. drawn marks positions with a
+    # capture into a drawn subtable position, winning those with a capture
+    # into a lost one, which can never be lost
+    longest = bytearray(total)
+    drawn = bytearray(total)
+    winning = bytearray(total)
+
+    # positions known to be won or lost, by distance to mate
+    buckets = {}
+
+    game = JanggiGame()
+    for placement, squares in enumerate(product(*table.domains)):
+        if len(set(squares)) < len(squares):
+            data[placement] = data[size + placement] = INVALID
+            continue
+
+        board = [EMPTY] * SQUARES
+        slots = {}
+        for k, (code, sq) in enumerate(zip(codes, squares)):
+            board[sq] = code
+            slots[sq] = k
+
+        for blue_turn in (True, False):
+            i = placement if blue_turn else size + placement
+            other = size + placement if blue_turn else placement
+            color = BLUE if blue_turn else RED
+            enemy = RED if blue_turn else BLUE
+
+            game.set_position(board, blue_turn)
+            if game.square_attacked_by(game.get_general_square(enemy), color):
+                data[i] = INVALID
+                continue
+
+            first[i] = len(successors)
+            win = None
+            if not game.square_attacked_by(game.get_general_square(color), enemy):
+                successors.append(other)
+
+            for move_from, move_to in game.legal_moves():
+                k = slots[move_from]
+                if board[move_to] == EMPTY:
+                    successors.append(other + (positions[k][move_to] - positions[k][move_from]) * weights[k])
+                    continue
+
+                captured = slots[move_to]
+                after = list(squares)
+                after[k] = move_to
+                del after[captured]
+                subtable = subtables[captured]
+                value = subtable.data[subtable.index(after, not blue_turn)]
+                if value == DRAW:
+                    drawn[i] = 1
+                elif (value - 1) % 2 == 0:
+                    win = value if win is None else min(win, value)
+                else:
+                    longest[i] = max(longest[i], value)
+
+            count[i] = len(successors) - first[i]
+            if win is not None:
+                winning[i] = 1
+                buckets.setdefault(win, []).append(i)
+            elif count[i] == 0 and not drawn[i]:
+                # mated, or every capture loses
+                buckets.setdefault(longest[i], []).append(i)
+
+    # predecessors of each position, the successor lists turned around
+    predecessor_count = array("I", [0]) * (total + 1)
+    for j in successors:
+        predecessor_count[j + 1] += 1
+    for i in range(total):
+        predecessor_count[i + 1] += predecessor_count[i]
+    predecessor_first = array("I", predecessor_count)
+    predecessors = array("I", [0]) * len(successors)
+    for i in range(total):
+        for j in successors[first[i]:first[i] + count[i]]:
+            predecessors[predecessor_first[j]] = i
+            predecessor_first[j] += 1
+
+    # resolve positions in order of distance to mate, so the first distance
+    # found for a win is the shortest
+    while buckets:
+        dtm = min(buckets)
+        if dtm > MAX_DTM:
+            break
+        # a position is added once for every lost successor at the same
+        # distance, but must be resolved once
+        resolved = []
+        for i in buckets.pop(dtm):
+            if data[i] == DRAW:
+                data[i] = dtm + 1
+                resolved.append(i)
+        for i in resolved:
+            for j in predecessors[predecessor_count[i]:predecessor_count[i + 1]]:
+                if data[j] != DRAW:
+                    continue
+                if dtm % 2 == 0:
+                    buckets.setdefault(dtm + 1, []).append(j)
+                    continue
+                count[j] -= 1
+                longest[j] = max(longest[j], dtm + 1)
+                if count[j] == 0 and not drawn[j] and not winning[j]:
+                    buckets.setdefault(longest[j], []).append(j)
+
+    tables[table.name] = table
+    return table
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("usage: python JanggiTablebase.py directory KCvK [KCvKG ...]")
+        sys.exit(2)
+    built = {}
+    for name in sys.argv[2:]:
+        generate(name, built)
+    for name, table in sorted(built.items()):
+        table.save(os.path.join(sys.argv[1], name + TABLE_SUFFIX))
+        wins = sum(1 for value in table.data if value not in (DRAW, INVALID) and (value - 1) % 2)
+        print("%s: %d positions, %d won for the side to move" % (name, len(table.data), wins))
@@ -0,0 +1,57 @@
+"""
+Perft benchmark for the JanggiGame move generator.
+
+The positions and their known perft counts are in janggi_test_helpers.py.
+
+Run with:
+    python bench_perft.py [max depth]
+"""
+
+import sys
+import time
+
+from JanggiGame import SQUARE_NAMES
+from janggi_test_helpers import PERFT_POSITIONS, play
+
+
+def print_divide(game, depth):
+    """
+    Prints the perft count below each legal move
+    """
+    for (move_from, move_to), nodes in sorted(game.divide(depth).items()):
+        print("%s%s: %d" % (SQUARE_NAMES[move_from], SQUARE_NAMES[move_to], nodes))
+
+
+def main(max_depth):
+    """
+    Runs perft on every reference position up to max_depth, checking the counts
+    and reporting the speed in nodes per second
+    """
+    total_nodes = 0
+    total_time = 0.0
+    failed = False
+
+    for name, moves, counts in PERFT_POSITIONS:
+        game = play(moves)
+        for depth, expected in enumerate(counts[:max_depth], 1):
+            start = time.perf_counter()
+            nodes = game.perft(depth)
+            elapsed = time.perf_counter() - start
+            total_nodes += nodes
+            total_time += elapsed
+
+            status = "ok" if nodes == expected else "FAILED, expected %d" % expected
+            print(
+                "%-14s depth %d: %9d nodes %8.3fs %10.0f nodes/s %s"
+                % (name, depth, nodes, elapsed, nodes / max(elapsed, 1e-9), status)
+            )
+            if nodes != expected:
+                failed = True
+                print_divide(game, depth)
+
+    print("total: %d nodes in %.3fs, %.0f nodes/s" % (total_nodes, total_time, total_nodes / max(total_time, 1e-9)))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 3))
@@ -0,0 +1,83 @@
+"""
+Move latency benchmark for JanggiServer.
+
+Starts a server, connects one client per game and has every client play
+the same four move cycle, then reports the median and 99th percentile time
+from sending a move to reading its reply, for a growing number of
+concurrent games. The moves of all games together arrive at a fixed rate,
+so more games means more open, mostly idle games, as on a live server.
+
+Run with:
+    python bench_server.py [max games]
+"""
+
+import asyncio
+import random
+import sys
+import time
+
+from JanggiServer import JanggiServer, tune_gc
+
+# blue and red horses out and back, which leaves the board as it was
+MOVE_CYCLE = [("h10", "g8"), ("h1", "g3"), ("g8", "h10"), ("g3", "h1")]
+ROUNDS = 2
+
+# moves per second sent by all the games together
+MOVE_RATE = 1000
+
+
+async def play(port, interval, go, latencies):
+    """
+    Plays ROUNDS move cycles in a new game once go is set, one move every
+    interval seconds after a random start, adding the latency of every move
+    """
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(b"NEW\n")
+    game_id = (await reader.readline()).split()[1].decode("ascii")
+    await go.wait()
+    await asyncio.sleep(random.random() * interval)
+    for i in range(ROUNDS):
+        for start, end in MOVE_CYCLE:
+            await asyncio.sleep(interval)
+            sent = time.perf_counter()
+            writer.write(("MOVE %s %s %s\n" % (game_id, start, end)).encode("ascii"))
+            reply = await reader.readline()
+            latencies.append(time.perf_counter() - sent)
+            if not reply.startswith(b"OK"):
+                raise ValueError("move refused: %s" % reply)
+    writer.close()
+    await writer.wait_closed()
+
+
+async def main(max_games):
+    """
+    Measures the latency at 10, 100, ... concurrent games up to max_games
+    """
+    server = JanggiServer()
+    await server.start(port=0)
+    tune_gc()
+    total = 0
+    games = 10
+    while games <= max_games:
+        latencies = []
+        go = asyncio.Event()
+        clients = [asyncio.ensure_future(play(server.port(), games / MOVE_RATE, go, latencies)) for i in range(games)]
+        while server.game_count() < total + games:
+            await asyncio.sleep(0.01)
+        start = time.perf_counter()
+        go.set()
+        await asyncio.gather(*clients)
+        elapsed = time.perf_counter() - start
+        total += games
+        latencies.sort()
+        print(
+            "%5d games: %6d moves in %6.2fs, p50 %6.2fms p99 %6.2fms"
+            % (games, len(latencies), elapsed, latencies[len(latencies) // 2] * 1000,
+               latencies[int(len(latencies) * 0.99)] * 1000)
+        )
+        games *= 10
+    await server.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000))
@@ -0,0 +1,83 @@
+"""
+Positions and helpers shared by the tests and the perft benchmark.
+
+Each perft position is reached by playing its moves from the start with
+make_move, and lists the known perft counts for depth 1, 2, 3, ... Passes
+are not counted.
+"""
+
+from JanggiGame import JanggiGame
+
+PERFT_POSITIONS = [
+    ("start", [], [31, 961, 30506, 967906]),
+    (
+        "cannon check",
+        [
+            ("c7", "c6"), ("c1", "d3"), ("b10", "d7"), ("b3", "e3"), ("c10", "d8"), ("h1", "g3"),
+            ("e7", "e6"), ("e3", "e6"), ("h8", "c8"), ("d3", "e5"), ("c8", "c4"), ("e5", "c4"),
+            ("i10", "i8"), ("g4", "f4"), ("i8", "f8"), ("g3", "h5"), ("h10", "g8"), ("e6", "e3"),
+        ],
+        [4, 182, 6658, 280700],
+    ),
+    (
+        "middlegame 1",
+        [
+            ("e9", "d9"), ("c4", "d4"), ("c7", "c6"), ("d4", "c4"), ("a7", "a6"), ("e2", "d2"),
+            ("d9", "d8"), ("g4", "f4"), ("f10", "e10"), ("c1", "d3"), ("i7", "i6"), ("h1", "i3"),
+            ("b10", "d7"), ("e4", "d4"), ("d8", "e9"), ("g1", "e4"), ("i10", "i8"), ("d2", "e2"),
+            ("a10", "a7"), ("b3", "e3"), ("i6", "i5"), ("d3", "b2"), ("i8", "i7"), ("a4", "a5"),
+            ("c6", "d6"), ("a1", "a3"), ("a7", "b7"), ("i1", "g1"), ("d7", "b10"), ("b2", "a4"),
+        ],
+        [43, 1635, 64793],
+    ),
+    (
+        "middlegame 2",
+        [
+            ("e9", "f9"), ("d1", "d2"), ("e7", "d7"), ("e2", "d1"), ("d7", "d6"), ("d2", "d3"),
+            ("b10", "d7"), ("i4", "h4"), ("i10", "i9"), ("h3", "h5"), ("c7", "b7"), ("d3", "e2"),
+            ("b7", "b6"), ("f1", "e1"), ("g7", "f7"), ("a1", "a2"), ("d7", "g5"), ("h5", "e5"),
+            ("h8", "h3"), ("a2", "d2"), ("b8", "b5"), ("b1", "d4"), ("i9", "g9"), ("d4", "f7"),
+            ("g9", "g7"), ("h4", "i4"), ("f9", "f8"), ("g4", "h4"), ("g7", "g9"), ("i1", "i3"),
+        ],
+        [49, 1755, 83019],
+    ),
+    (
+        "middlegame 3",
+        [
+            ("d10", "d9"), ("d1", "e1"), ("c7", "b7"), ("a4", "a5"), ("d9", "d10"), ("i4", "i5"),
+            ("e9", "d9"), ("a5", "a6"), ("b10", "d7"), ("e2", "d2"), ("c10", "d8"), ("c1", "d3"),
+            ("a10", "b10"), ("a6", "a7"), ("d10", "e10"), ("e1", "d1"), ("i10", "i8"), ("g4", "g5"),
+            ("d7", "a5"), ("c4", "d4"), ("b10", "b9"), ("f1", "e2"), ("d8", "f7"), ("a1", "a4"),
+            ("d9", "d8"), ("i5", "i6"), ("b8", "b4"), ("a4", "b4"), ("f7", "e5"), ("b3", "b7"),
+        ],
+        [41, 1548, 61867],
+    ),
+]
+
+
+# the moves of test_a_checkmate_is_detected_correctly up to red's mating move c1-c9
+MATE_IN_ONE = [
+    ('c7', 'c6'), ('c1', 'd3'), ('b10', 'd7'), ('b3', 'e3'), ('c10', 'd8'), ('h1', 'g3'),
+    ('e7', 'e6'), ('e3', 'e6'), ('h8', 'c8'), ('d3', 'e5'), ('c8', 'c4'), ('e5', 'c4'),
+    ('i10', 'i8'), ('g4', 'f4'), ('i8', 'f8'), ('g3', 'h5'), ('h10', 'g8'), ('e6', 'e3'),
+    ('e9', 'd9'), ('c4', 'e5'), ('c6', 'd6'), ('e5', 'c4'), ('a7', 'a6'), ('h3', 'h9'),
+    ('a10', 'a7'), ('c4', 'd6'), ('a6', 'b6'), ('h5', 'g7'), ('b8', 'b1'), ('a1', 'b1'),
+    ('a7', 'a4'), ('b1', 'c1'), ('a4', 'a2'), ('e2', 'e1'), ('i7', 'h7'),
+]
+
+# blue chariot i10 can take the soldier on i5, but the red chariot on i3 takes it back
+DEFENDED_SOLDIER = [
+    ('g7', 'h7'), ('i4', 'i5'), ('h7', 'g7'), ('i1', 'i3'), ('i7', 'h7'),
+    ('e2', 'd2'), ('h8', 'h5'), ('b1', 'd4'), ('b10', 'd7'), ('f1', 'e1'),
+]
+
+
+def play(moves):
+    """
+    Returns a new game with the (start, end) moves played
+    """
+    game = JanggiGame()
+    for start, end in moves:
+        if not game.make_move(start, end):
+            raise ValueError("illegal move: %s %s" % (start, end))
+    return game
@@ -1,5 +1,6 @@
 import unittest
-from JanggiGame import JanggiGame
+from JanggiGame import JanggiGame, PALACE_MOVES, SOLDIER_MOVES, BLUE, RED, SOLDIER, GENERAL, START_FEN, SQUARE_NAMES, SQUARE_INDEX, Move, parse_moves, to_square
+from janggi_test_helpers import PERFT_POSITIONS, play
 
 class TestJanggiGame(unittest.TestCase):
     def setUp(self):
@@ -1628,3 +1629,304 @@ class TestJanggiGame(unittest.TestCase):
         except:
             self.fail("Game state should be RED_WON when the BLUE general is checkmated")
 
+
+    def test_push_and_pop_restore_the_board(self):
+        """PUSH/POP: test that pop takes back a capture made with push"""
+        g = JanggiGame()
+        board = g.get_board()
+        g.make_move('c7', 'c6')
+        g.make_move('c4', 'c5')
+        before_capture = g.get_board()
+        g.push((45 + 2, 36 + 2))  # blue soldier c6 captures c5
+        self.assertEqual(g.get_board()[4][2], 'bS')
+        self.assertIs(g.get_turn(), False)
+        self.assertEqual(g.pop(), (47, 38))
+        self.assertEqual(g.get_board(), before_capture)
+        self.assertIs(g.get_turn(), True)
+        g.pop()
+        g.pop()
+        self.assertEqual(g.get_board(), board)
+
+    def test_push_a_pass(self):
+        """PUSH/POP: test that pushing a move from a square to itself only passes the turn"""
+        g = JanggiGame()
+        board = g.get_board()
+        g.push((76, 76))
+        self.assertEqual(g.get_board(), board)
+        self.assertIs(g.get_turn(), False)
+        g.pop()
+        self.assertIs(g.get_turn(), True)
+
+    def test_hash_is_updated_by_every_move(self):
+        """HASH: test that the incremental hash matches a full recompute and is restored by pop"""
+        g = JanggiGame()
+        start_hash = g.get_hash()
+        self.assertEqual(start_hash, g.compute_hash())
+        g.make_move('c7', 'c6')
+        g.make_move('c4', 'c5')
+        g.make_move('c6', 'c5')  # blue soldier captures red
+        self.assertEqual(g.get_hash(), g.compute_hash())
+        g.make_move('e2', 'e2')  # red passes
+        self.assertEqual(g.get_hash(), g.compute_hash())
+        for i in range(4):
+            g.pop()
+        self.assertEqual(g.get_hash(), start_hash)
+
+    def test_hash_depends_on_side_to_move(self):
+        """HASH: test that the same placement with a different side to move hashes differently"""
+        g = JanggiGame()
+        start_hash = g.get_hash()
+        g.make_move('e9', 'e9')  # blue passes
+        self.assertNotEqual(g.get_hash(), start_hash)
+        g.make_move('e2', 'e2')  # red passes
+        self.assertEqual(g.get_hash(), start_hash)
+
+    def test_palace_move_tables(self):
+        """TABLES: test the palace lines used by guards and generals"""
+        self.assertEqual(len(PALACE_MOVES[to_square(1, 4)]), 8)
+        self.assertEqual(len(PALACE_MOVES[to_square(8, 4)]), 8)
+        self.assertEqual(
+            sorted(PALACE_MOVES[to_square(9, 3)]),
+            [to_square(8, 3), to_square(8, 4), to_square(9, 4)],
+        )
+        self.assertEqual(sorted(PALACE_MOVES[to_square(8, 3)]), [to_square(7, 3), to_square(8, 4), to_square(9, 3)])
+        self.assertEqual(PALACE_MOVES[to_square(5, 4)], ())
+
+    def test_soldier_move_tables_mirror_each_other(self):
+        """TABLES: test that the blue and red soldier tables are mirror images"""
+        for r in range(10):
+            for c in range(9):
+                blue = sorted(divmod(i, 9) for i in SOLDIER_MOVES[BLUE][to_square(r, c)])
+                red = sorted((9 - i // 9, i % 9) for i in SOLDIER_MOVES[RED][to_square(9 - r, c)])
+                self.assertEqual(blue, red)
+        self.assertIn(to_square(1, 4), SOLDIER_MOVES[BLUE][to_square(2, 3)])
+        self.assertNotIn(to_square(2, 3), SOLDIER_MOVES[BLUE][to_square(1, 4)])
+
+    def test_square_attacked_by(self):
+        """CHECK: test looking backwards from a square for attackers"""
+        g = JanggiGame()
+        self.assertIs(g.square_attacked_by(to_square(2, 3), RED), True)  # red horse c1 guards d3
+        self.assertIs(g.square_attacked_by(to_square(5, 4), RED), False)
+        self.assertIs(g.square_attacked_by(to_square(5, 4), BLUE), True)  # blue soldier e7
+        self.assertIs(g.square_attacked_by(to_square(2, 1), BLUE), False)  # a cannon cannot jump a cannon
+        g.make_move('c7', 'b7')
+        g.make_move('c4', 'c5')
+        # blue cannon b8 can now jump the soldier on b7 up the b file
+        self.assertIs(g.square_attacked_by(to_square(5, 1), BLUE), True)
+        self.assertIs(g.square_attacked_by(to_square(2, 1), BLUE), False)
+
+    def test_piece_lists_follow_moves_and_captures(self):
+        """PIECES: test that the piece lists and general squares are kept up to date"""
+        g = JanggiGame()
+        self.assertEqual(len(g.get_pieces(BLUE)[SOLDIER]), 5)
+        self.assertEqual(g.get_general_square(RED), to_square(1, 4))
+        g.make_move('c7', 'c6')
+        g.make_move('c4', 'c5')
+        g.make_move('c6', 'c5')  # blue soldier captures red
+        self.assertEqual(len(g.get_pieces(RED)[SOLDIER]), 4)
+        self.assertIn(to_square(4, 2), g.get_pieces(BLUE)[SOLDIER])
+        g.make_move('e2', 'e1')  # red general moves
+        self.assertEqual(g.get_general_square(RED), to_square(0, 4))
+        self.assertEqual(g.get_pieces(RED)[GENERAL], {to_square(0, 4)})
+        g.pop()
+        g.pop()
+        self.assertEqual(len(g.get_pieces(RED)[SOLDIER]), 5)
+        self.assertEqual(g.get_general_square(RED), to_square(1, 4))
+
+    def test_pass_move(self):
+        """PIECES: test that the pass is the general of the side to move onto itself"""
+        g = JanggiGame()
+        self.assertEqual(g.pass_move(), (to_square(8, 4), to_square(8, 4)))
+        g.push(g.pass_move())
+        self.assertEqual(g.pass_move(), (to_square(1, 4), to_square(1, 4)))
+
+    def test_legal_moves_at_the_start(self):
+        """LEGAL MOVES: test the number of legal moves for blue at the start, passing is not counted"""
+        g = JanggiGame()
+        self.assertEqual(len(g.legal_moves()), 31)
+        g.make_move('c7', 'c6')
+        self.assertEqual(len(g.legal_moves()), 31)
+
+    def test_legal_moves_only_counter_the_check(self):
+        """LEGAL MOVES: test that in check only the moves that counter it are legal and the game is unchanged"""
+        g = JanggiGame()
+        for start, end in [
+            ('c7', 'c6'), ('c1', 'd3'), ('b10', 'd7'), ('b3', 'e3'), ('c10', 'd8'), ('h1', 'g3'),
+            ('e7', 'e6'), ('e3', 'e6'), ('h8', 'c8'), ('d3', 'e5'), ('c8', 'c4'), ('e5', 'c4'),
+            ('i10', 'i8'), ('g4', 'f4'), ('i8', 'f8'), ('g3', 'h5'), ('h10', 'g8'),
+            ('e6', 'e3'),  # red cannon checks blue
+        ]:
+            self.assertIs(g.make_move(start, end), True)
+        self.assertIs(g.is_in_check('blue'), True)
+        board = g.get_board()
+        legal = g.legal_moves()
+        self.assertEqual(g.get_board(), board)
+        self.assertEqual(sorted(legal), sorted([
+            (to_square(7, 5), to_square(7, 4)),  # chariot f8 blocks on e8
+            (to_square(7, 1), to_square(7, 4)),  # cannon b8 jumps to e8 to block
+            (to_square(8, 4), to_square(8, 3)),  # general steps aside
+            (to_square(8, 4), to_square(8, 5)),
+        ]))
+        self.assertIs(g.make_move('e9', 'e10'), False)
+        self.assertIs(g.make_move('e9', 'd9'), True)
+
+    def test_perft_reference_positions(self):
+        """PERFT: test the move generator against the known node counts of the reference positions"""
+        for name, moves, counts in PERFT_POSITIONS:
+            g = play(moves)
+            for depth, expected in enumerate(counts[:2], 1):
+                self.assertEqual(g.perft(depth), expected, name)
+        self.assertEqual(JanggiGame().perft(3), 30506)
+
+    def test_divide_adds_up_to_perft(self):
+        """PERFT: test that the divide counts add up to the perft count"""
+        g = play(PERFT_POSITIONS[1][1])
+        counts = g.divide(2)
+        self.assertEqual(len(counts), 4)
+        self.assertEqual(sum(counts.values()), g.perft(2))
+
+    def test_score_is_kept_up_to_date(self):
+        """SCORE: test that the incremental evaluation matches a full recompute"""
+        g = JanggiGame()
+        self.assertEqual(g.get_score(), 0)
+        g.make_move('c7', 'c6')
+        g.make_move('c4', 'c5')
+        before_capture = g.get_score()
+        g.make_move('c6', 'c5')  # blue soldier captures red
+        self.assertEqual(g.get_score(), g.compute_score())
+        self.assertGreater(g.get_score() - before_capture, 200)
+        g.pop()
+        self.assertEqual(g.get_score(), before_capture)
+        for move in g.legal_moves():
+            g.push(move)
+            self.assertEqual(g.get_score(), g.compute_score())
+            g.pop()
+
+    def test_captures_only_moves(self):
+        """LEGAL MOVES: test that the capture only generator gives exactly the legal captures"""
+        for name, moves, counts in PERFT_POSITIONS:
+            g = play(moves)
+            board = g.get_squares()
+            captures = [move for move in g.legal_moves() if board[move[1]]]
+            self.assertEqual(sorted(g.legal_moves(captures_only=True)), sorted(captures), name)
+
+    def test_set_position(self):
+        """BOARD: test that setting up a board recomputes the hash, score and piece lists"""
+        g = play(PERFT_POSITIONS[1][1])
+        h = JanggiGame()
+        h.set_position(g.get_squares(), g.get_turn())
+        self.assertEqual(h.get_hash(), g.get_hash())
+        self.assertEqual(h.get_score(), g.get_score())
+        self.assertEqual(h.get_pieces(RED), g.get_pieces(RED))
+        self.assertEqual(h.get_general_square(BLUE), g.get_general_square(BLUE))
+        self.assertEqual(sorted(h.legal_moves()), sorted(g.legal_moves()))
+
+    def test_fen_round_trip(self):
+        """FEN: test that positions written as FEN read back with the same hash, score and moves"""
+        self.assertEqual(JanggiGame().to_fen(), START_FEN)
+        for name, moves, counts in PERFT_POSITIONS:
+            g = play(moves)
+            h = JanggiGame.from_fen(g.to_fen())
+            self.assertEqual(h.get_squares(), g.get_squares(), name)
+            self.assertEqual(h.get_hash(), g.get_hash(), name)
+            self.assertEqual(h.get_score(), g.get_score(), name)
+            self.assertEqual(sorted(h.legal_moves()), sorted(g.legal_moves()), name)
+            self.assertEqual(h.to_fen(), g.to_fen(), name)
+
+    def test_fen_counters(self):
+        """FEN: test the side to move and the move counters"""
+        g = JanggiGame()
+        g.make_move('c7', 'c6')
+        self.assertTrue(g.to_fen().endswith(" b - - 1 1"))
+        g.make_move('c4', 'c5')
+        g.make_move('c6', 'c5')  # blue soldier captures red
+        self.assertTrue(g.to_fen().endswith(" b - - 0 2"))
+
+        h = JanggiGame.from_fen(g.to_fen().replace(" 0 2", " 7 30"))
+        self.assertFalse(h.get_turn())
+        h.make_move('e4', 'e5')
+        self.assertTrue(h.to_fen().endswith(" w - - 8 31"))
+
+        # the "-" fields and the counters may be left out
+        h.set_fen(START_FEN.split()[0] + " b")
+        self.assertEqual(h.to_fen(), START_FEN.replace(" w ", " b "))
+        self.assertEqual(JanggiGame.from_fen(START_FEN.replace(" - -", "")).to_fen(), START_FEN)
+
+    def test_fen_errors(self):
+        """FEN: test that malformed FEN strings are refused"""
+        for fen in (
+            "",
+            "rbna1abnr/4k4 w",
+            "rbna1abnr/4k4/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/4K4/RBNA1ABNRR w",
+            "rbna1abnr/4k4/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/4K4/RBNA1ABNX w",
+            "rbna1abnr/4k4/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/4K4/RBNA1ABNR x",
+            "rbna1abnr/4k4/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/4K4/RBNA1ABNR w - - x 1",
+        ):
+            self.assertRaises(ValueError, JanggiGame.from_fen, fen)
+
+    def test_square_tables(self):
+        """NOTATION: test the square name tables against convert_user_input"""
+        g = JanggiGame()
+        self.assertEqual(len(SQUARE_NAMES), 90)
+        self.assertEqual(SQUARE_NAMES[0], 'a1')
+        self.assertEqual(SQUARE_NAMES[89], 'i10')
+        for sq, name in enumerate(SQUARE_NAMES):
+            self.assertEqual(SQUARE_INDEX[name], sq)
+            self.assertEqual(g.convert_user_input(name), "%d%d" % divmod(sq, 9))
+
+    def test_move_type(self):
+        """NOTATION: test that a Move is a (from, to) tuple with names"""
+        g = JanggiGame()
+        move = Move.parse('c7-c6')
+        self.assertEqual(move, (to_square(6, 2), to_square(5, 2)))
+        self.assertIn(move, g.legal_moves())
+        self.assertEqual(move.names(), ('c7', 'c6'))
+        self.assertEqual(str(move), 'c7-c6')
+        self.assertEqual(parse_moves([('c7', 'c6'), 'c1-d3']), [move, Move(SQUARE_INDEX['c1'], SQUARE_INDEX['d3'])])
+        self.assertRaises(ValueError, parse_moves, [('c7', 'c11')])
+        self.assertRaises(ValueError, Move.parse, 'j1-a1')
+
+    def test_make_move_with_squares(self):
+        """NOTATION: test make_move with square indexes and Moves as with names"""
+        g = JanggiGame()
+        h = JanggiGame()
+        for move in parse_moves(['c7-c6', 'c1-d3', 'e9-e9', 'b3-e3']):
+            self.assertIs(g.make_move(move), True)
+            self.assertIs(h.make_move(*move.names()), True)
+        self.assertEqual(g.get_hash(), h.get_hash())
+        self.assertIs(g.make_move(SQUARE_INDEX['h10'], SQUARE_INDEX['g8']), True)
+        self.assertIs(g.make_move(Move.parse('a1-a3')), True)
+        self.assertIs(g.make_move(Move.parse('a7-a5')), self.invalid_move)
+        self.assertIs(g.make_move('j7', 'j6'), self.invalid_move)
+        self.assertIs(g.make_move(90, 81), self.invalid_move)
+        self.assertIs(g.make_move('c10'), self.invalid_move)
+        self.assertIs(g.make_move(SQUARE_INDEX['c10']), self.invalid_move)
+
+    def test_chariot_reaches_last_row_and_column(self):
+        """CHARIOT: test that a chariot slides all the way to row 10 and column i"""
+        g = JanggiGame.from_fen('9/4k4/9/9/R8/9/9/9/4K4/9 w - - 0 1')
+        moves = g.legal_moves()
+        for end in ('a10', 'i5', 'a1'):
+            self.assertIn(Move(SQUARE_INDEX['a5'], SQUARE_INDEX[end]), moves, end)
+
+    def test_chariot_palace_diagonals(self):
+        """CHARIOT: test the palace diagonals, captures landing on the piece taken and none from the middle of a side"""
+        # blue chariot on a red palace corner takes the guard at the far corner
+        g = JanggiGame.from_fen('3R1k3/9/5a3/9/9/9/9/9/4K4/9 w - - 0 1')
+        moves = g.legal_moves()
+        self.assertIn(Move.parse('d1-e2'), moves)
+        self.assertIn(Move.parse('d1-f3'), moves)
+        self.assertIs(g.make_move('d1', 'f3'), True)
+        self.assertEqual(g.get_board()[2][5], 'bC')
+
+        # the blue palace bottom row is part of the palace too
+        g = JanggiGame.from_fen('9/4k4/9/9/9/9/9/5R3/9/3nK4 w - - 0 1')
+        moves = g.legal_moves()
+        self.assertIn(Move.parse('f8-e9'), moves)
+        self.assertIn(Move.parse('f8-d10'), moves)
+
+        # no diagonal line runs through the middle of a palace side
+        g = JanggiGame.from_fen('4R4/5k3/9/9/9/9/9/9/4K4/9 w - - 0 1')
+        moves = g.legal_moves()
+        self.assertNotIn(Move.parse('e1-d2'), moves)
+        self.assertNotIn(Move.parse('e1-f2'), moves)
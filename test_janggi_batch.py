@@ -0,0 +1,103 @@
+import random
+import unittest
+from JanggiGame import JanggiGame
+from janggi_test_helpers import PERFT_POSITIONS, play
+
+try:
+    import numpy
+    from JanggiBatch import BatchBoards, simulate, MOVE_LIMIT, BLUE_WON
+except ImportError:
+    numpy = None
+
+
+def random_games(count, seed):
+    rng = random.Random(seed)
+    games = []
+    for i in range(count):
+        g = JanggiGame()
+        for ply in range(rng.randrange(0, 100)):
+            moves = g.legal_moves()
+            if not moves:
+                break
+            g.push(rng.choice(moves))
+        games.append(g)
+    return games
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class TestJanggiBatch(unittest.TestCase):
+
+    def test_start_position(self):
+        """BATCH: test the legal moves of a batch of start positions"""
+        boards = BatchBoards(3)
+        self.assertEqual(boards.boards.shape, (3, 10, 9))
+        masks = boards.legal_move_masks()
+        self.assertEqual(masks.shape, (3, 90, 90))
+        self.assertEqual(masks.sum(axis=(1, 2)).tolist(), [31, 31, 31])
+        self.assertEqual(boards.in_check().tolist(), [False, False, False])
+
+    def test_reference_positions(self):
+        """BATCH: test that the batch counts the perft reference positions"""
+        games = [play(moves) for name, moves, counts in PERFT_POSITIONS]
+        lanes, froms, tos = BatchBoards.from_games(games).legal_moves()
+        self.assertEqual(numpy.bincount(lanes, minlength=len(games)).tolist(), [counts[0] for name, moves, counts in PERFT_POSITIONS])
+
+    def test_batch_matches_the_game(self):
+        """BATCH: test that every board gets the legal moves and checks of JanggiGame"""
+        games = random_games(300, 7)
+        boards = BatchBoards.from_games(games)
+        lanes, froms, tos = boards.legal_moves()
+        checks = boards.in_check()
+        for i, g in enumerate(games):
+            moves = sorted(zip(froms[lanes == i].tolist(), tos[lanes == i].tolist()))
+            self.assertEqual(moves, sorted(g.legal_moves()))
+            self.assertEqual(checks[i], g.is_in_check("blue" if g.get_turn() else "red"))
+
+    def test_to_game(self):
+        """BATCH: test that a board of the batch sets up the same game"""
+        games = random_games(5, 3)
+        boards = BatchBoards.from_games(games)
+        for i, g in enumerate(games):
+            self.assertEqual(boards.to_game(i).get_hash(), g.get_hash())
+
+    def test_simulate_statistics(self):
+        """SIMULATE: test that the outcome counts add up and a seed repeats the games"""
+        stats = simulate(40, max_plies=60, seed=2)
+        self.assertEqual(stats["blue_wins"] + stats["red_wins"] + stats["move_limit"], 40)
+        self.assertEqual(stats["total_plies"], stats["plies"].sum())
+        self.assertTrue((stats["plies"] <= 60).all())
+        self.assertTrue((stats["plies"][stats["results"] == MOVE_LIMIT] == 60).all())
+        self.assertEqual(simulate(40, max_plies=60, seed=2)["plies"].tolist(), stats["plies"].tolist())
+
+    def test_simulated_games_replay(self):
+        """SIMULATE: test that recorded games are legal and end as reported"""
+        stats = simulate(30, max_plies=150, seed=4, record=True)
+        self.assertGreater(stats["blue_wins"] + stats["red_wins"], 0)
+        for i in range(30):
+            g = JanggiGame()
+            for move_from, move_to in stats["moves"][i, :stats["plies"][i]].tolist():
+                if move_from == move_to:
+                    self.assertEqual(g.legal_moves(), [])
+                else:
+                    self.assertIn((move_from, move_to), g.legal_moves())
+                g.push((move_from, move_to))
+            self.assertTrue((stats["moves"][i, stats["plies"][i]:] == -1).all())
+            self.assertEqual(g.is_checkmated(), stats["results"][i] != MOVE_LIMIT)
+            if stats["results"][i] != MOVE_LIMIT:
+                self.assertEqual(g.get_game_state(), "BLUE_WON" if stats["results"][i] == BLUE_WON else "RED_WON")
+
+    def test_simulate_with_a_policy(self):
+        """SIMULATE: test that a policy chooses the moves of every board"""
+        def first_move(boards, lanes, froms, tos, rng):
+            counts = numpy.bincount(lanes, minlength=len(boards))
+            return numpy.cumsum(counts) - counts
+
+        stats = simulate(3, policy=first_move, max_plies=10, record=True)
+        self.assertEqual(stats["plies"].tolist(), [10, 10, 10])
+        self.assertTrue((stats["moves"][0] == stats["moves"][2]).all())
+        g = JanggiGame()
+        self.assertEqual(tuple(stats["moves"][0, 0]), min(g.legal_moves()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import os
+import pickle
+import random
+import tempfile
+import unittest
+from JanggiGame import JanggiGame, SQUARE_INDEX, parse_moves
+from JanggiBook import OpeningBook, build_book, read_text_games
+from JanggiEngine import search
+
+GAMES = [
+    [('c7', 'c6'), ('c1', 'd3'), ('b10', 'd7'), ('b3', 'e3')],
+    [('c7', 'c6'), ('c1', 'd3'), ('h10', 'g8')],
+    [('c7', 'c6'), ('h1', 'g3'), ('e9', 'e9'), ('g3', 'h5')],
+    [('a7', 'a6'), ('c1', 'd3')],
+]
+
+
+class TestJanggiBook(unittest.TestCase):
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".bin")
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_book_lookup(self):
+        """BOOK: test that a built book returns the moves played with their counts"""
+        self.assertEqual(build_book(GAMES, self.path, results=["BLUE_WON", "RED_WON", None, None]), 8)
+        book = OpeningBook(self.path)
+        self.assertEqual(len(book), 8)
+
+        g = JanggiGame()
+        c7, c6, a7, a6 = [SQUARE_INDEX[name] for name in ("c7", "c6", "a7", "a6")]
+        # most played first, learn counts blue's win minus red's
+        self.assertEqual(book.moves(g), [((c7, c6), 3, 0), ((a7, a6), 1, 0)])
+
+        g.make_move('c7', 'c6')
+        entries = book.moves(g)
+        self.assertEqual([entry[1] for entry in entries], [2, 1])
+        self.assertEqual(entries[0][0], (SQUARE_INDEX['c1'], SQUARE_INDEX['d3']))
+        self.assertEqual(entries[0][2], 0)
+        self.assertEqual(book.lookup(12345), [])
+        book.close()
+
+    def test_book_skips_passes_and_stops_at_max_ply(self):
+        """BOOK: test that passes and moves past max_ply are left out"""
+        build_book(GAMES[2:3], self.path, max_ply=3)
+        book = OpeningBook(self.path)
+        self.assertEqual(len(book), 2)
+        g = JanggiGame()
+        for start, end in GAMES[2][:3]:
+            g.make_move(start, end)
+        self.assertEqual(book.moves(g), [])
+        book.close()
+
+    def test_book_choose_and_search(self):
+        """BOOK: test that the engine plays a book move and searches out of book"""
+        build_book(GAMES, self.path)
+        book = OpeningBook(self.path)
+        g = JanggiGame()
+        moves = [entry[0] for entry in book.moves(g)]
+        self.assertIn(book.choose(g, random.Random(1)), moves)
+        self.assertEqual(search(g, depth=1, book=book)[1], 0)
+        self.assertIn(search(g, depth=1, book=book)[0], moves)
+
+        g.make_move('i7', 'i6')
+        self.assertIsNone(book.choose(g))
+        self.assertTrue(g.is_legal(search(g, depth=1, book=book)[0]))
+        book.close()
+
+    def test_book_pickles_by_path(self):
+        """BOOK: test that a pickled book maps the same file again"""
+        build_book(GAMES, self.path)
+        book = OpeningBook(self.path)
+        copy = pickle.loads(pickle.dumps(book))
+        self.assertEqual(copy.moves(JanggiGame()), book.moves(JanggiGame()))
+        copy.close()
+        book.close()
+
+    def test_book_rejects_other_files(self):
+        """BOOK: test that a file that is not a book is refused"""
+        with open(self.path, "wb") as f:
+            f.write(b"not a book at all")
+        self.assertRaises(ValueError, OpeningBook, self.path)
+
+    def test_read_text_games(self):
+        """BOOK: test reading games written as c10-d8 moves"""
+        with open(self.path, "w") as f:
+            f.write("c7-c6 c1-d3\n\na7-a6\n")
+        self.assertEqual(read_text_games(self.path), [[('c7', 'c6'), ('c1', 'd3')], [('a7', 'a6')]])
+
+    def test_read_text_games_with_results(self):
+        """BOOK: test that a result ending a line is read into the results list"""
+        with open(self.path, "w") as f:
+            f.write("c7-c6 c1-d3 BLUE_WON\na7-a6\nc7-c6 RED_WON\n")
+        results = []
+        records = read_text_games(self.path, results)
+        self.assertEqual(records, [[('c7', 'c6'), ('c1', 'd3')], [('a7', 'a6')], [('c7', 'c6')]])
+        self.assertEqual(results, ["BLUE_WON", None, "RED_WON"])
+
+    def test_book_from_square_indexes_and_moves(self):
+        """BOOK: test that records of square indexes or Moves build the same book as names"""
+        build_book(GAMES, self.path)
+        book = OpeningBook(self.path)
+        expected = [book.record(i) for i in range(len(book))]
+        book.close()
+
+        records = [parse_moves(record) for record in GAMES]
+        records[1] = [tuple(move) for move in records[1]]
+        build_book(records, self.path)
+        book = OpeningBook(self.path)
+        self.assertEqual([book.record(i) for i in range(len(book))], expected)
+        book.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+from JanggiGame import JanggiGame
+from JanggiRecord import write_records
+from JanggiDatabase import PositionDatabase, PASS_MOVE, signed_hash
+from janggi_test_helpers import play
+
+# the first two reach the same position with the moves in another order
+GAMES = [
+    ([('c7', 'c6'), ('c1', 'd3'), ('h10', 'g8')], "BLUE_WON"),
+    ([('h10', 'g8'), ('c1', 'd3'), ('c7', 'c6'), ('e2', 'e2')], "RED_WON"),
+    ([('c7', 'c6'), ('a4', 'a5')], "UNFINISHED"),
+]
+
+
+class TestJanggiDatabase(unittest.TestCase):
+
+    def setUp(self):
+        self.database = PositionDatabase()
+        self.games = [play(moves) for moves, result in GAMES]
+        self.ids = self.database.add_games(
+            [(g.get_moves(), result, {"n": i}) for i, (g, (moves, result)) in enumerate(zip(self.games, GAMES))]
+        )
+
+    def tearDown(self):
+        self.database.close()
+
+    def test_find_games_through_a_position(self):
+        """DATABASE: test that every game reaching a position is found with its ply and next move"""
+        self.assertEqual(self.database.game_count(), 3)
+        found = self.database.find(self.games[0])
+        self.assertEqual([(game_id, ply) for game_id, ply, move, result in found], [(self.ids[0], 3), (self.ids[1], 3)])
+        self.assertIsNone(found[0][2])
+        self.assertIsNone(found[1][2])  # the pass
+        self.assertEqual([result for game_id, ply, move, result in found], ["BLUE_WON", "RED_WON"])
+        self.assertEqual(self.database.find(12345), [])
+
+    def test_next_moves_with_results(self):
+        """DATABASE: test the moves played from a position with their counts and wins"""
+        g = JanggiGame()
+        entries = self.database.next_moves(g)
+        c7c6 = self.games[0].get_moves()[0]
+        self.assertEqual(entries[0], (c7c6, 2, 1, 0))
+        self.assertEqual(entries[1], (self.games[1].get_moves()[0], 1, 0, 1))
+        self.assertEqual(self.database.next_moves(g.get_hash()), entries)
+
+    def test_large_hashes(self):
+        """DATABASE: test that hashes above 2**63 are stored and found"""
+        self.assertLess(signed_hash(2 ** 64 - 1), 0)
+        g = JanggiGame()
+        for game in self.games:
+            for move in game.get_moves():
+                g.push(move)
+                if g.get_hash() >= 2 ** 63:
+                    self.assertTrue(self.database.find(g))
+            while g.get_moves():
+                g.pop()
+
+    def test_game_and_record_file(self):
+        """DATABASE: test reading a game back and indexing a record file"""
+        moves, result, tags = self.database.game(self.ids[1])
+        self.assertEqual(len(moves), 4)
+        self.assertIsNone(moves[3])
+        self.assertEqual((result, tags), ("RED_WON", {"n": "1"}))
+        self.assertIsNone(self.database.game(99))
+
+        handle, path = tempfile.mkstemp(suffix=".jgr")
+        os.close(handle)
+        write_records(path, [(self.games[2].get_moves(), "BLUE_WON", None)])
+        self.assertEqual(self.database.add_record_file(path), 1)
+        os.remove(path)
+        self.assertEqual(len(self.database.find(self.games[2])), 2)
+
+    def test_passes_are_stored_alike(self):
+        """DATABASE: test that a pass given as None or as the general's move is stored like the moves blob stores it"""
+        moves = self.games[1].get_moves()
+        self.assertEqual(
+            list(PositionDatabase.positions(1, moves[:3] + [None])),
+            list(PositionDatabase.positions(1, moves)),
+        )
+        self.assertEqual(list(PositionDatabase.positions(1, moves))[3][3], PASS_MOVE)
+        self.assertEqual(self.database.next_moves(self.games[0]), [(None, 1, 0, 1)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,219 @@
+import time
+import unittest
+from JanggiGame import JanggiGame, SQUARE_INDEX, Move
+from JanggiEngine import search, parallel_search, analyze_game, analyze_games, Search, MoveOrderer, TranspositionTable, MATE_SCORE, MAX_DEPTH, EXACT, LOWER_BOUND, UPPER_BOUND
+from janggi_test_helpers import MATE_IN_ONE, DEFENDED_SOLDIER, play
+
+
+class TestJanggiEngine(unittest.TestCase):
+
+    def test_search_finds_a_mate_in_one(self):
+        """SEARCH: test that the engine finds the mate and leaves the game unchanged"""
+        g = play(MATE_IN_ONE)
+        position = g.get_hash()
+        move, score = search(g, depth=2)
+        self.assertEqual(g.get_hash(), position)
+        self.assertGreaterEqual(score, MATE_SCORE - 2)
+        self.assertIs(g.make_move(*Move(*move).names()), True)
+        self.assertEqual(g.get_game_state(), 'RED_WON')
+
+    def test_search_returns_a_legal_move(self):
+        """SEARCH: test that the best move at the start is one of the legal moves"""
+        g = JanggiGame()
+        move, score = search(g, depth=2)
+        self.assertIn(move, g.legal_moves())
+
+    def test_principal_variation(self):
+        """SEARCH: test that the principal variation starts with the best move and is depth moves long"""
+        g = JanggiGame()
+        s = Search(g, depth=3)
+        move, score = s.run()
+        self.assertEqual(s.depth, 3)
+        self.assertEqual(s.pv[0], move)
+        self.assertEqual(len(s.pv), 3)
+        for pv_move in s.pv:
+            self.assertIn(pv_move, g.legal_moves())
+            g.push(pv_move)
+
+    def test_search_respects_the_time_limit(self):
+        """SEARCH: test that a timed search stops and keeps the last finished iteration"""
+        g = JanggiGame()
+        position = g.get_hash()
+        start = time.perf_counter()
+        s = Search(g, time_limit=0.5)
+        move, score = s.run()
+        self.assertLess(time.perf_counter() - start, 3)
+        self.assertGreaterEqual(s.depth, 1)
+        self.assertIn(move, g.legal_moves())
+        self.assertEqual(g.get_hash(), position)
+
+    def test_transposition_table_store_and_probe(self):
+        """TABLE: test that stored results come back unchanged"""
+        table = TranspositionTable(1)
+        self.assertIsNone(table.probe(12345))
+        table.store(12345, 5, EXACT, -250, (76, 67))
+        self.assertEqual(table.probe(12345), (5, EXACT, -250, (76, 67)))
+        table.store(12345, 6, LOWER_BOUND, MATE_SCORE - 3, None)
+        self.assertEqual(table.probe(12345), (6, LOWER_BOUND, MATE_SCORE - 3, None))
+        table.clear()
+        self.assertIsNone(table.probe(12345))
+
+    def test_transposition_table_replacement(self):
+        """TABLE: test that a bucket keeps the deepest result and always replaces the second slot"""
+        table = TranspositionTable(1)
+        buckets = table._buckets
+        deep, shallow, newer = 7, 7 + buckets, 7 + 2 * buckets  # same bucket
+        table.store(deep, 8, EXACT, 1, None)
+        table.store(shallow, 2, UPPER_BOUND, 2, None)
+        self.assertEqual(table.probe(deep)[0], 8)
+        self.assertEqual(table.probe(shallow)[0], 2)
+        table.store(newer, 3, LOWER_BOUND, 3, None)
+        self.assertEqual(table.probe(deep)[0], 8)
+        self.assertIsNone(table.probe(shallow))
+        self.assertEqual(table.probe(newer)[0], 3)
+        table.store(newer, 9, EXACT, 4, None)
+        self.assertEqual(table.probe(newer), (9, EXACT, 4, None))
+
+    def test_transposition_table_memory_cap(self):
+        """TABLE: test that the table size follows the memory cap"""
+        table = TranspositionTable(2)
+        self.assertEqual(len(table._buffer), 2 * 1024 * 1024)
+
+    def test_search_reuses_the_table(self):
+        """TABLE: test that a second search with the same table searches fewer nodes and agrees"""
+        g = JanggiGame()
+        table = TranspositionTable(4)
+        first = Search(g, depth=3, table=table)
+        first_result = first.run()
+        second = Search(g, depth=3, table=table)
+        second_result = second.run()
+        self.assertEqual(first_result, second_result)
+        self.assertLess(second.nodes, first.nodes)
+
+    def test_quiescence_sees_the_recapture(self):
+        """QUIESCENCE: test that a one ply search does not take a defended soldier with a chariot"""
+        g = play(DEFENDED_SOLDIER)
+        s = Search(g, depth=1)
+        move, score = s.run()
+        self.assertNotEqual(Move(*move).names(), ('i10', 'i5'))
+        self.assertLess(score, 200)
+        g.push((89, 44))  # i10 takes i5
+        self.assertLess(-s.quiescence(-100000, 100000, 1), 0)
+
+    def test_quiescence_stops_at_the_ply_cap_in_check(self):
+        """QUIESCENCE: test that a side in check at the deepest ply gets the static score without searching evasions"""
+        g = JanggiGame.from_fen('3k5/9/9/9/4r4/9/9/9/4K4/9 w - - 0 1')
+        self.assertTrue(g.is_in_check('blue'))
+        s = Search(g, depth=1)
+        self.assertEqual(s.quiescence(-100000, 100000, MAX_DEPTH * 2), s.evaluate())
+        self.assertEqual(s.nodes, 1)
+
+    def test_move_ordering_stages(self):
+        """ORDERING: test hash move, then captures by victim value, then killers, then quiet moves, each once"""
+        g = play(DEFENDED_SOLDIER)
+        board = g.get_squares()
+        ordering = MoveOrderer()
+        hash_move = (43, 70)  # cannon h5-h8
+        killer = (76, 75)  # general e9-d9
+        ordering.add_cutoff(killer, board[killer[0]], 3, 0)
+        moves = list(ordering.moves(g, 0, hash_move))
+
+        self.assertEqual(sorted(moves), sorted(g.legal_moves()))
+        self.assertEqual(moves[0], hash_move)
+        captures = len(g.legal_moves(captures_only=True))
+        self.assertTrue(all(board[move[1]] for move in moves[1:captures + 1]))
+        self.assertEqual(moves[captures + 1], killer)
+        self.assertTrue(all(board[move[1]] == 0 for move in moves[captures + 1:]))
+
+    def test_move_ordering_skips_an_illegal_hash_move(self):
+        """ORDERING: test that a hash move from a collision is not played"""
+        g = JanggiGame()
+        moves = list(MoveOrderer().moves(g, 0, (0, 1)))  # red chariot onto its own elephant
+        self.assertEqual(sorted(moves), sorted(g.legal_moves()))
+
+    def test_history_scores(self):
+        """ORDERING: test that cutoffs raise the history score of the piece and square"""
+        ordering = MoveOrderer()
+        ordering.add_cutoff((76, 75), 13, 4, 2)
+        ordering.add_cutoff((76, 75), 13, 2, 2)
+        self.assertEqual(ordering.history[13][75], 20)
+        self.assertEqual(ordering.killers[2], [(76, 75), None])
+
+    def test_torn_table_entries_are_not_found(self):
+        """TABLE: test that an entry whose words do not xor back to its key is ignored"""
+        table = TranspositionTable(1)
+        table.store(99, 4, EXACT, 10, (76, 75))
+        table._table[(99 % table._buckets) * 4 + 1] ^= 1 << 40  # another writer changed the data word
+        self.assertIsNone(table.probe(99))
+
+    def test_tables_can_share_a_buffer(self):
+        """TABLE: test that two tables over the same buffer see each other's results"""
+        buffer = bytearray(TranspositionTable.size_bytes(1))
+        first = TranspositionTable(1, buffer)
+        second = TranspositionTable(1, buffer)
+        first.store(1234, 6, LOWER_BOUND, 55, (10, 19))
+        self.assertEqual(second.probe(1234), (6, LOWER_BOUND, 55, (10, 19)))
+
+    def test_parallel_search(self):
+        """SMP: test that the parallel search finds the mate and leaves the game unchanged"""
+        g = play(MATE_IN_ONE)
+        position = g.get_hash()
+        move, score = parallel_search(g, depth=3, workers=2, table_mb=1)
+        self.assertEqual(g.get_hash(), position)
+        self.assertGreaterEqual(score, MATE_SCORE - 2)
+        self.assertIs(g.make_move(*Move(*move).names()), True)
+        self.assertEqual(g.get_game_state(), 'RED_WON')
+
+    def test_analyze_game_flags_the_blunder(self):
+        """ANALYSIS: test that the move allowing mate is a blunder and the mating move is not"""
+        analysis = analyze_game(MATE_IN_ONE + [('c1', 'c9')], depth=2)
+        self.assertEqual(len(analysis), len(MATE_IN_ONE) + 1)
+        self.assertEqual(analysis[-1]['move'], ('c1', 'c9'))
+        self.assertIs(analysis[-1]['blunder'], False)
+        self.assertGreaterEqual(analysis[-1]['score'], MATE_SCORE - 2)
+        self.assertEqual(analysis[-2]['move'], ('i7', 'h7'))
+        self.assertIs(analysis[-2]['blunder'], True)
+
+    def test_analyze_game_stops_at_an_invalid_move(self):
+        """ANALYSIS: test that the analysis ends at the first move make_move refuses"""
+        analysis = analyze_game([('c7', 'c6'), ('c4', 'c3'), ('c1', 'd3')], depth=1)
+        self.assertEqual([i['move'] for i in analysis], [('c7', 'c6')])
+
+    def test_analyze_games_over_a_pool(self):
+        """ANALYSIS: test that every game comes back once with the same analysis as a single game"""
+        records = [DEFENDED_SOLDIER[:4], DEFENDED_SOLDIER[:2], DEFENDED_SOLDIER]
+        results = dict(analyze_games(records, depth=1, workers=2, chunk_size=1))
+        self.assertEqual(sorted(results), [0, 1, 2])
+        for index, record in enumerate(records):
+            self.assertEqual(results[index], analyze_game(record, depth=1))
+
+    def test_analyze_game_best_move_loses_nothing(self):
+        """ANALYSIS: test that playing the engine's best move scores the same as the best move, at odd and even depths"""
+        for depth in (1, 2, 3):
+            g = JanggiGame()
+            record = []
+            for ply in range(4):
+                move, score = search(g, depth=depth)
+                record.append(Move(*move).names())
+                g.make_move(*record[-1])
+            analysis = analyze_game(record, depth)
+            matched = [entry for entry in analysis if entry['best_move'] == tuple(SQUARE_INDEX[i] for i in entry['move'])]
+            self.assertTrue(matched)
+            for entry in matched:
+                self.assertEqual(entry['loss'], 0, depth)
+                self.assertEqual(entry['score'], entry['best_score'], depth)
+
+    def test_analyze_games_reads_records_as_it_goes(self):
+        """ANALYSIS: test that records are read a few chunks ahead of the results, not all at once"""
+        read = []
+
+        def records():
+            for i in range(40):
+                read.append(i)
+                yield DEFENDED_SOLDIER[:2]
+
+        results = analyze_games(records(), depth=1, workers=1, chunk_size=1)
+        next(results)
+        self.assertLessEqual(len(read), 4)
+        self.assertEqual(len(list(results)), 39)
+        self.assertEqual(len(read), 40)
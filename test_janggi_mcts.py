@@ -0,0 +1,90 @@
+import random
+import unittest
+from JanggiGame import JanggiGame, Move
+from JanggiMCTS import MCTS, search, random_rollout, evaluation_rollout, capture_prior
+from janggi_test_helpers import MATE_IN_ONE, DEFENDED_SOLDIER, play
+
+
+class TestJanggiMCTS(unittest.TestCase):
+
+    def test_mcts_finds_a_mate_in_one(self):
+        """MCTS: test that the tree search finds the mate and leaves the game unchanged"""
+        g = play(MATE_IN_ONE)
+        position = g.get_hash()
+        move, value = search(g, iterations=600, rollout=evaluation_rollout, seed=1)
+        self.assertEqual(Move(*move).names(), ('c1', 'c9'))
+        self.assertEqual(value, 1.0)
+        self.assertEqual(g.get_hash(), position)
+
+    def test_random_rollout(self):
+        """MCTS: test that a random rollout gives a value and takes its moves back"""
+        g = play(DEFENDED_SOLDIER)
+        position = g.get_hash()
+        rng = random.Random(3)
+        for i in range(20):
+            self.assertTrue(-1 <= random_rollout(g, rng) <= 1)
+        self.assertEqual(g.get_hash(), position)
+
+    def test_node_pool_limit(self):
+        """MCTS: test that the tree stops growing at its node limit"""
+        g = JanggiGame()
+        tree = MCTS(g, rollout=evaluation_rollout, max_nodes=100, seed=1)
+        move, value = tree.run(iterations=200)
+        self.assertLessEqual(tree.size(), 100)
+        self.assertEqual(tree.root_visits(), 200)
+        self.assertIn(move, g.legal_moves())
+
+    def test_tree_reuse(self):
+        """MCTS: test that the tree below the moves played is kept"""
+        g = JanggiGame()
+        tree = MCTS(g, rollout=evaluation_rollout, seed=1)
+        move, value = tree.run(iterations=300)
+        g.push(move)
+        reply = max(tree.children(tree.find(g.get_hash())), key=lambda child: child[1])
+        g.push(reply[0])
+
+        tree.run(iterations=1)
+        self.assertEqual(tree.root_visits(), reply[1] + 1)
+        self.assertEqual(sorted(child[0] for child in tree.children()), sorted(g.legal_moves()))
+
+        # a position not in the tree starts a new one
+        for i in range(3):
+            g.push(g.legal_moves()[0])
+        self.assertEqual(tree.find(g.get_hash()), -1)
+        tree.run(iterations=1)
+        self.assertEqual(tree.root_visits(), 1)
+
+    def test_threads_with_virtual_loss(self):
+        """MCTS: test that threads share the iterations and leave no virtual loss behind"""
+        g = play(MATE_IN_ONE)
+        tree = MCTS(g, rollout=evaluation_rollout, seed=2)
+        move, value = tree.run(iterations=400, threads=3)
+        self.assertEqual(tree.iterations, 400)
+        self.assertEqual(tree.root_visits(), 400)
+        self.assertEqual(sum(tree._virtual[:tree.size()]), 0)
+        self.assertEqual(Move(*move).names(), ('c1', 'c9'))
+
+    def test_puct_with_a_prior(self):
+        """MCTS: test the capture prior and a PUCT search"""
+        g = play(DEFENDED_SOLDIER)
+        moves = g.legal_moves()
+        priors = capture_prior(g, moves)
+        self.assertAlmostEqual(sum(priors), 1.0)
+        board = g.get_squares()
+        capture = [i for i, (move_from, move_to) in enumerate(moves) if board[move_to]]
+        self.assertGreater(priors[capture[0]], min(priors))
+
+        move, value = search(g, iterations=200, rollout=evaluation_rollout, prior=capture_prior, seed=1)
+        self.assertIn(move, moves)
+
+    def test_time_limit(self):
+        """MCTS: test that the search stops when its time is up"""
+        g = JanggiGame()
+        tree = MCTS(g, seed=1)
+        move, value = tree.run(time_limit=0.2)
+        self.assertIn(move, g.legal_moves())
+        self.assertGreater(tree.iterations, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import os
+import tempfile
+import unittest
+from JanggiRecord import (
+    PASS, MAGIC, RecordWriter, write_records, read_records, replay, encode_moves, convert_text_games,
+)
+from janggi_test_helpers import play
+
+GAME = [('c7', 'c6'), ('c1', 'd3'), ('e9', 'e9'), ('b3', 'e3'), ('h10', 'g8')]
+
+
+class TestJanggiRecord(unittest.TestCase):
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".jgr")
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_record_round_trip(self):
+        """RECORD: test that games read back with their moves, result and tags"""
+        g = play(GAME)
+        with RecordWriter(self.path) as writer:
+            writer.write_game(g, {"Event": "club", "Blue": "kim"})
+            writer.write([], "RED_WON")
+            self.assertEqual(writer.count, 2)
+
+        games = list(read_records(self.path))
+        self.assertEqual(len(games), 2)
+        moves, result, tags = games[0]
+        self.assertEqual(len(moves), len(GAME))
+        self.assertIsNone(moves[2])
+        self.assertEqual(moves[0], g.get_moves()[0])
+        self.assertEqual(result, "UNFINISHED")
+        self.assertEqual(tags, {"Event": "club", "Blue": "kim"})
+        self.assertEqual(games[1], ([], "RED_WON", {}))
+
+        # two bytes a move after the 5 byte game header and the tags
+        tags_length = len("Event=club\nBlue=kim")
+        self.assertEqual(os.path.getsize(self.path), len(MAGIC) + 5 + tags_length + 2 * len(GAME) + 5)
+
+    def test_replay_matches_game(self):
+        """RECORD: test that replaying a record reaches the position of the game, passes included"""
+        g = play(GAME)
+        write_records(self.path, [(g.get_moves(), g.get_game_state(), None)])
+        moves, result, tags = next(read_records(self.path))
+        h = replay(moves)
+        self.assertEqual(h.get_hash(), g.get_hash())
+        self.assertEqual(h.get_squares(), g.get_squares())
+        self.assertEqual(h.get_turn(), g.get_turn())
+
+    def test_passes_encoded_specially(self):
+        """RECORD: test that a pass takes the PASS byte pair whatever square it was made on"""
+        self.assertEqual(encode_moves([(84, 84), None, (20, 29)]), bytes([PASS, PASS, PASS, PASS, 20, 29]))
+
+    def test_reader_streams(self):
+        """RECORD: test that games are read lazily and written from a generator"""
+        count = write_records(self.path, (([(20, 29)] * i, "UNFINISHED", {"n": i}) for i in range(1000)))
+        self.assertEqual(count, 1000)
+        reader = read_records(self.path)
+        self.assertEqual(next(reader)[2], {"n": "0"})
+        self.assertEqual(next(reader)[2], {"n": "1"})
+        self.assertEqual(sum(1 for game in reader), 998)
+
+    def test_bad_files(self):
+        """RECORD: test that other and truncated files are refused"""
+        with open(self.path, "wb") as f:
+            f.write(b"not a record")
+        self.assertRaises(ValueError, list, read_records(self.path))
+
+        g = play(GAME)
+        with RecordWriter(self.path) as writer:
+            writer.write_game(g)
+        with open(self.path, "r+b") as f:
+            f.truncate(os.path.getsize(self.path) - 1)
+        self.assertRaises(ValueError, list, read_records(self.path))
+        with RecordWriter(self.path) as writer:
+            self.assertRaises(ValueError, writer.write, [], "UNFINISHED", {"a=b": 1})
+
+    def test_convert_text_games(self):
+        """RECORD: test converting text games, stopping at an illegal move"""
+        handle, text_path = tempfile.mkstemp(suffix=".txt")
+        with os.fdopen(handle, "w") as f:
+            f.write("c7-c6 c1-d3\n\na7-a6 a1-a9 c1-d3\n")
+        self.assertEqual(convert_text_games(text_path, self.path), 2)
+        os.remove(text_path)
+        games = list(read_records(self.path))
+        self.assertEqual([len(moves) for moves, result, tags in games], [2, 1])
+
+    def test_convert_text_games_with_bad_moves(self):
+        """RECORD: test that a malformed move or unknown square ends only its own game"""
+        handle, text_path = tempfile.mkstemp(suffix=".txt")
+        with os.fdopen(handle, "w") as f:
+            f.write("c7-c6 c1c3 c4-c5\nc7-c6 c1-z3\nc7-c6 c1-d3 e7-e6\n")
+        self.assertEqual(convert_text_games(text_path, self.path), 3)
+        os.remove(text_path)
+        games = list(read_records(self.path))
+        self.assertEqual([len(moves) for moves, result, tags in games], [1, 1, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
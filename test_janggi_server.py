@@ -0,0 +1,178 @@
+import asyncio
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from JanggiServer import JanggiServer, FINISHED_TIMEOUT, IDLE_TIMEOUT, MAX_SUBSCRIBER_BUFFER
+from janggi_test_helpers import MATE_IN_ONE, play
+
+
+class Client:
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    async def send(self, line):
+        self.writer.write((line + "\n").encode("ascii"))
+        await self.writer.drain()
+        return (await self.reader.readline()).decode("ascii").strip()
+
+    async def event(self):
+        return (await asyncio.wait_for(self.reader.readline(), 5)).decode("ascii").strip()
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+class SlowTransport:
+
+    def __init__(self, buffered):
+        self.buffered = buffered
+
+    def get_write_buffer_size(self):
+        return self.buffered
+
+
+class SlowSubscriber:
+
+    def __init__(self, buffered):
+        self.transport = SlowTransport(buffered)
+        self.written = []
+
+    def is_closing(self):
+        return False
+
+    def write(self, data):
+        self.written.append(data)
+
+
+class TestJanggiServer(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.executor = ThreadPoolExecutor(2)
+        self.server = JanggiServer(executor=self.executor, engine_depth=1)
+        await self.server.start(port=0)
+        self.clients = []
+
+    async def asyncTearDown(self):
+        for client in self.clients:
+            await client.close()
+        await self.server.close()
+        self.executor.shutdown()
+
+    async def connect(self):
+        client = Client(*await asyncio.open_connection("127.0.0.1", self.server.port()))
+        self.clients.append(client)
+        return client
+
+    async def test_new_game_and_moves(self):
+        """SERVER: test creating a game and making moves in it"""
+        client = await self.connect()
+        self.assertEqual(await client.send("NEW"), "OK 1")
+        self.assertEqual(await client.send("STATE 1"), "OK UNFINISHED blue 0")
+        self.assertEqual(await client.send("MOVE 1 c7 c6"), "OK UNFINISHED")
+        self.assertEqual(await client.send("MOVE 1 c7 c6"), "ERR illegal move")
+        self.assertEqual(await client.send("MOVE 1 c4 c4"), "OK UNFINISHED")  # red passes
+        self.assertEqual(await client.send("STATE 1"), "OK UNFINISHED blue 2")
+
+    async def test_errors(self):
+        """SERVER: test the replies to bad commands"""
+        client = await self.connect()
+        self.assertEqual(await client.send("MOVE 7 c7 c6"), "ERR unknown game 7")
+        self.assertEqual(await client.send("STATE"), "ERR missing game id")
+        await client.send("NEW")
+        self.assertEqual(await client.send("MOVE 1 c7"), "ERR usage: MOVE <id> <from> <to>")
+        self.assertEqual(await client.send("MOVE 1 z7 c6"), "ERR bad square")
+        self.assertEqual(await client.send("ENGINE 1 99"), "ERR depth should be 1 to 8")
+        self.assertEqual(await client.send("JUMP 1"), "ERR unknown command JUMP")
+
+    async def test_subscribers_get_moves(self):
+        """SERVER: test that subscribers are sent the moves of other clients"""
+        player = await self.connect()
+        watcher = await self.connect()
+        game_id = (await player.send("NEW")).split()[1]
+        self.assertEqual(await watcher.send("SUB " + game_id), "OK")
+        await player.send("MOVE %s c7 c6" % game_id)
+        self.assertEqual(await watcher.event(), "EVENT %s c7 c6 UNFINISHED" % game_id)
+
+        self.assertEqual(await watcher.send("UNSUB " + game_id), "OK")
+        await player.send("MOVE %s c4 c5" % game_id)
+        self.assertEqual(await watcher.send("STATE " + game_id), "OK UNFINISHED blue 2")
+
+    async def test_engine_moves_in_the_executor(self):
+        """SERVER: test that the engine moves while other games keep playing"""
+        client = await self.connect()
+        other = await self.connect()
+        await client.send("NEW")
+        await other.send("NEW")
+        await client.send("SUB 1")
+
+        engine = asyncio.ensure_future(client.send("ENGINE 1 2"))
+        self.assertEqual(await other.send("MOVE 2 c7 c6"), "OK UNFINISHED")
+        reply = (await engine).split()
+        self.assertEqual(reply[0], "OK")
+        self.assertEqual(await client.event(), "EVENT 1 %s %s UNFINISHED" % (reply[1], reply[2]))
+        self.assertEqual(await client.send("STATE 1"), "OK UNFINISHED red 1")
+
+    async def test_many_concurrent_games(self):
+        """SERVER: test that many clients playing at once each get their own game"""
+        clients = [await self.connect() for i in range(50)]
+        ids = [(await client.send("NEW")).split()[1] for client in clients]
+        self.assertEqual(len(set(ids)), 50)
+
+        async def play_game(client, game_id):
+            replies = []
+            for start, end in (("c7", "c6"), ("c4", "c5"), ("c6", "c5")):
+                replies.append(await client.send("MOVE %s %s %s" % (game_id, start, end)))
+            return replies
+
+        results = await asyncio.gather(*[play_game(client, game_id) for client, game_id in zip(clients, ids)])
+        self.assertTrue(all(replies == ["OK UNFINISHED"] * 3 for replies in results))
+        self.assertEqual(self.server.game_count(), 50)
+
+    async def test_non_ascii_and_long_lines(self):
+        """SERVER: test that non ASCII bytes are answered and a too long line closes the connection"""
+        client = await self.connect()
+        client.writer.write(b"STATE \xc3\xa9\n")
+        self.assertEqual((await client.event()), "ERR unknown game ??")
+        client.writer.write(b"\xc3\xa9\n")
+        self.assertEqual((await client.event()), "ERR missing game id")
+        self.assertEqual(await client.send("NEW"), "OK 1")
+
+        client.writer.write(b"STATE " + b"1" * 100000 + b"\n")
+        self.assertEqual(await client.event(), "ERR line too long")
+        self.assertEqual(await client.event(), "")  # closed
+        self.assertEqual(await (await self.connect()).send("STATE 1"), "OK UNFINISHED blue 0")
+
+    async def test_finished_and_idle_games_are_dropped(self):
+        """SERVER: test that over games go after FINISHED_TIMEOUT and others after IDLE_TIMEOUT"""
+        client = await self.connect()
+        for i in range(3):
+            await client.send("NEW")
+        self.server._sessions["1"].game = play(MATE_IN_ONE)
+        self.assertEqual(await client.send("MOVE 1 c1 c9"), "OK RED_WON")
+        await client.send("MOVE 2 c7 c6")
+        last = max(session.last_active for session in self.server._sessions.values())
+
+        self.assertEqual(self.server.prune(last + FINISHED_TIMEOUT / 2), 0)
+        self.assertEqual(self.server.prune(last + FINISHED_TIMEOUT + 1), 1)
+        self.assertEqual(await client.send("STATE 1"), "ERR unknown game 1")
+        self.assertEqual(self.server.prune(last + IDLE_TIMEOUT + 1), 2)
+        self.assertEqual(self.server.game_count(), 0)
+
+    async def test_slow_subscribers_are_dropped(self):
+        """SERVER: test that a subscriber with too many unsent bytes stops getting events"""
+        client = await self.connect()
+        await client.send("NEW")
+        session = self.server._sessions["1"]
+        keeping_up = SlowSubscriber(0)
+        behind = SlowSubscriber(MAX_SUBSCRIBER_BUFFER + 1)
+        session.subscribers.update((keeping_up, behind))
+        JanggiServer.broadcast(session, b"EVENT\n")
+        self.assertEqual(keeping_up.written, [b"EVENT\n"])
+        self.assertEqual(behind.written, [])
+        self.assertEqual(session.subscribers, {keeping_up})
+
+
+if __name__ == '__main__':
+    unittest.main()
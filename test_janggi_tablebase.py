@@ -0,0 +1,179 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from itertools import product
+from JanggiGame import JanggiGame, EMPTY, SQUARES, BLUE, RED, CHARIOT, GENERAL, GUARD
+from JanggiTablebase import Tablebase, Tablebases, generate, parse_material, material_name, game_material, decode, DRAW, INVALID, TABLE_SUFFIX
+from JanggiEngine import search, TABLEBASE_WIN
+
+
+def position(table, squares, blue_turn):
+    board = [EMPTY] * SQUARES
+    for code, sq in zip(table.material, squares):
+        board[sq] = code
+    g = JanggiGame()
+    g.set_position(board, blue_turn)
+    return g
+
+
+def scored_from_successors(tables, table, squares, blue_turn):
+    """the (result, distance to mate) a position has from its moves and pass"""
+    g = position(table, squares, blue_turn)
+    color = BLUE if blue_turn else RED
+    moves = g.legal_moves()
+    if not g.is_in_check("blue" if blue_turn else "red"):
+        moves.append((g.get_general_square(color),) * 2)
+    results = []
+    for move in moves:
+        g.push(move)
+        results.append(tables[game_material(g)].probe(g))
+        g.pop()
+
+    wins = [dtm for result, dtm in results if result == -1]
+    if wins:
+        return 1, min(wins) + 1
+    if results and all(result == 1 for result, dtm in results):
+        return -1, max(dtm for result, dtm in results) + 1
+    if not results:
+        return -1, 0
+    return 0, 0
+
+
+class TestJanggiTablebase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tables = {}
+        cls.table = generate("KCvKG", cls.tables)
+
+    def find(self, value, blue_turn=True):
+        data = self.table.data
+        offset = 0 if blue_turn else self.table.size
+        for placement, squares in enumerate(product(*self.table.domains)):
+            if data[offset + placement] == value:
+                return squares
+        return None
+
+    def test_material_names(self):
+        """TABLEBASE: test parsing and naming material sets"""
+        self.assertEqual(parse_material("KCvKG"), (BLUE | GENERAL, BLUE | CHARIOT, RED | GENERAL, RED | GUARD))
+        self.assertEqual(material_name([RED | GUARD, BLUE | CHARIOT, RED | GENERAL, BLUE | GENERAL]), "KCvKG")
+        self.assertEqual(parse_material("CKvK"), parse_material("KCvK"))
+        self.assertRaises(ValueError, parse_material, "KC")
+        self.assertRaises(ValueError, parse_material, "CvK")
+        self.assertRaises(ValueError, parse_material, "KXvK")
+        self.assertEqual(sorted(self.tables), ["KCvK", "KCvKG", "KvK", "KvKG"])
+        self.assertEqual(len(self.table.data), 2 * 9 * 90 * 9 * 9)
+
+    def test_invalid_positions(self):
+        """TABLEBASE: test that overlapping pieces and a capturable general are not positions"""
+        g = JanggiGame()
+        e9, e2 = g.get_general_square(BLUE), g.get_general_square(RED)
+        self.assertEqual(self.table.data[self.table.index([e9, e2, e2, 3], True)], INVALID)
+        # the blue chariot on e5 attacks the red general on e2, so only red can be to move
+        self.assertEqual(self.table.data[self.table.index([e9, 40, e2, 3], True)], INVALID)
+        self.assertNotEqual(self.table.data[self.table.index([e9, 40, e2, 3], False)], INVALID)
+
+    def test_mated_and_mate_in_one(self):
+        """TABLEBASE: test that mated positions and mates in one are found"""
+        mated = self.find(1, blue_turn=False)
+        g = position(self.table, mated, False)
+        self.assertTrue(g.is_checkmated())
+        self.assertEqual(self.table.probe(g), (-1, 0))
+
+        squares = self.find(2)
+        g = position(self.table, squares, True)
+        self.assertEqual(self.table.probe(g), (1, 1))
+        mates = []
+        for move in g.legal_moves():
+            g.push(move)
+            if g.is_in_check("red") and not g.legal_moves():
+                mates.append(move)
+            g.pop()
+        self.assertTrue(mates)
+
+    def test_table_agrees_with_its_successors(self):
+        """TABLEBASE: test that every sampled position is scored from its moves and pass"""
+        rng = random.Random(5)
+        checked = 0
+        while checked < 300:
+            squares = [rng.choice(domain) for domain in self.table.domains]
+            blue_turn = rng.random() < 0.5
+            if len(set(squares)) < len(squares) or self.table.data[self.table.index(squares, blue_turn)] == INVALID:
+                continue
+            g = position(self.table, squares, blue_turn)
+            self.assertEqual(self.table.probe(g), scored_from_successors(self.tables, self.table, squares, blue_turn))
+            checked += 1
+
+    def test_probe_other_material(self):
+        """TABLEBASE: test that probing a game with other material returns None"""
+        g = JanggiGame()
+        self.assertIsNone(self.table.probe(g))
+        self.assertIsNone(Tablebases().probe(g))
+        self.assertEqual(decode(0), (0, 0))
+
+    def test_save_load_and_directory(self):
+        """TABLEBASE: test writing tables and probing them from a directory"""
+        directory = tempfile.mkdtemp()
+        try:
+            for name, table in self.tables.items():
+                table.save(os.path.join(directory, name + TABLE_SUFFIX))
+            loaded = Tablebase.load(os.path.join(directory, "KCvKG" + TABLE_SUFFIX))
+            self.assertEqual(loaded.name, "KCvKG")
+            self.assertEqual(loaded.data, self.table.data)
+
+            tablebases = Tablebases(directory)
+            self.assertEqual(tablebases.max_pieces, 4)
+            g = position(self.table, self.find(2), True)
+            self.assertEqual(tablebases.probe(g), (1, 1))
+            self.assertIsNone(tablebases.probe(JanggiGame()))
+        finally:
+            shutil.rmtree(directory)
+
+    def test_search_with_tablebases(self):
+        """TABLEBASE: test that the search scores its moves from the tables"""
+        tablebases = Tablebases()
+        for table in self.tables.values():
+            tablebases.add(table)
+        g = position(self.table, self.find(2), True)
+        move, score = search(g, depth=1, tablebases=tablebases)
+        self.assertEqual(score, TABLEBASE_WIN)
+        g.push(move)
+        self.assertTrue(g.is_in_check("red"))
+        self.assertEqual(g.legal_moves(), [])
+
+
+class TestTwoAttackingPieces(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # cannon and soldier can mate the same position in more than one way,
+        # which once resolved it twice and miscounted its predecessors
+        cls.tables = {}
+        cls.table = generate("KFSvK", cls.tables)
+
+    def test_every_decided_position_agrees_with_its_successors(self):
+        """TABLEBASE: test every won or lost position of a two attacker table, and a sample of the drawn ones"""
+        rng = random.Random(7)
+        data = self.table.data
+        decided = drawn = 0
+        for blue_turn in (True, False):
+            offset = 0 if blue_turn else self.table.size
+            for placement, squares in enumerate(product(*self.table.domains)):
+                value = data[offset + placement]
+                if value == INVALID or (value == DRAW and rng.random() > 0.0005):
+                    continue
+                if value == DRAW:
+                    drawn += 1
+                else:
+                    decided += 1
+                g = position(self.table, squares, blue_turn)
+                self.assertEqual(self.table.probe(g), scored_from_successors(self.tables, self.table, squares, blue_turn))
+        self.assertGreater(decided, 0)
+        self.assertGreater(drawn, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()